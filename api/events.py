@@ -5,18 +5,40 @@ from extensions import mongo, socketio
 from models.event import Event
 from utils.decorators import organizer_required
 from utils.geolocation import find_nearby_events
-from utils.file_upload import upload_photo_to_cloud, allowed_file
+from utils.file_upload import allowed_file
+from utils.upload_queue import upload_queue, UploadQueueFull, InvalidUpload
+from utils.image_variants import image_processor
+from utils import event_photos
+from utils.validators import validate_coordinates
+from utils.db_probe import db_probe
+from utils.user_cache import get_current_user, invalidate_user
+from utils.message_buffer import message_buffer
+from utils.chat_history import chat_history
+from utils.rooms import organizer_room, geo_room
+from utils.coalescer import rsvp_broadcaster
+from utils.response_cache import response_cache
+from utils.json_stream import json_shape, raw_batches, document_batches, stream_response
 from bson import ObjectId
 from datetime import datetime
+from functools import partial
 import math
 
 event_bp = Blueprint('events', __name__)
 
+# Server-side conversion of event documents to their JSON form (EVENTS_RAW_PIPELINE)
+_EVENT_JSON_SHAPE = json_shape(
+    id_field='event_id',
+    strings=('organizer_id',),
+    string_lists=('rsvps', 'arrivals'),
+    dates=('date', 'created_at')
+)
+
 @event_bp.route('', methods=['GET'])
+@response_cache.cached('events')
 def get_events():
     """Fetch list of events with optional filtering"""
     try:
-        if mongo.db is None:
+        if not db_probe.available():
             # Return sample events if database is not available
             sample_events = [
                 {
@@ -65,22 +87,22 @@ def get_events():
                 {'location_address': {'$regex': search, '$options': 'i'}}
             ]
 
+        batch_size = current_app.config.get('JSON_STREAM_BATCH_SIZE', 500)
+
         # Geospatial query for nearby events
         if latitude is not None and longitude is not None:
-            events = find_nearby_events(latitude, longitude, radius_km, query)
+            batches = [find_nearby_events(latitude, longitude, radius_km, query)]
+        elif current_app.config.get('EVENTS_RAW_PIPELINE'):
+            # Documents leave MongoDB JSON-shaped, as raw BSON batches
+            pipeline = [{'$match': query}, {'$sort': {'date': 1}}] + _EVENT_JSON_SHAPE
+            batches = raw_batches(mongo.db.events, pipeline, batch_size)
         else:
-            # Get all events without distance calculation
-            events_cursor = mongo.db.events.find(query).sort('date', 1)
-            events = []
-            for event in events_cursor:
-                event['event_id'] = str(event.pop('_id'))
-                event['organizer_id'] = str(event['organizer_id'])
-                event['date'] = event['date'].isoformat()
-                event['rsvps'] = [str(oid) for oid in event.get('rsvps', [])]
-                event['arrivals'] = [str(oid) for oid in event.get('arrivals', [])]
-                events.append(event)
-
-        return jsonify({'events': events}), 200
+            # ObjectIds and dates are encoded by the app's JSON provider
+            cursor = mongo.db.events.find(query).sort('date', 1)
+            batches = document_batches(cursor, batch_size, id_field='event_id')
+
+        # Streamed batch by batch (or as NDJSON), so memory does not grow with the listing
+        return stream_response('events', batches), 200
 
     except Exception as e:
         current_app.logger.error(f"Failed to fetch events: {e}")
@@ -100,8 +122,9 @@ def create_event():
         if not all(field in data for field in required_fields):
             return jsonify({'message': 'Missing required fields'}), 400
         
-        # Validate location format
-        if 'type' not in data['location'] or 'coordinates' not in data['location']:
+        # Validate location format; checked before saving, since the new
+        # event is announced to the geo room of these coordinates
+        if not _valid_location(data['location']):
             return jsonify({'message': 'Invalid location format'}), 400
         
         # Create event
@@ -117,16 +140,20 @@ def create_event():
         )
         
         event_id = event.save()
+        response_cache.invalidate('events')
         
+        # Read the (cached) organizer before created_events changes underneath it
+        user = get_current_user()
+
         # Add to organizer's created_events
         mongo.db.users.update_one(
             {'_id': ObjectId(user_id)},
             {'$push': {'created_events': event_id}}
         )
+        invalidate_user(user_id)
         
         # Create activity
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-        mongo.db.activities.insert_one({
+        mongo.db_for('bulk').activities.insert_one({
             'actor_id': ObjectId(user_id),
             'actor_name': user['username'],
             'type': 'EVENT_CREATED',
@@ -135,7 +162,7 @@ def create_event():
             'timestamp': datetime.utcnow()
         })
 
-        # Broadcast event creation
+        # Announce the event to sockets subscribed to its area
         event_data = {
             "_id": str(event_id),
             "title": data['title'],
@@ -144,7 +171,8 @@ def create_event():
             "location_address": data['location_address'],
             "organizer_id": str(user_id)
         }
-        socketio.emit("event_created", event_data)
+        longitude, latitude = data['location']['coordinates'][:2]
+        socketio.emit("event_created", event_data, to=geo_room(longitude, latitude))
 
         return jsonify({
             'message': 'Event created successfully',
@@ -183,6 +211,8 @@ def update_event(event_id):
         if 'location_address' in data:
             update_data['location_address'] = data['location_address']
         if 'location' in data:
+            if not _valid_location(data['location']):
+                return jsonify({'message': 'Invalid location format'}), 400
             update_data['location'] = data['location']
         if 'category' in data:
             update_data['category'] = data['category']
@@ -194,6 +224,7 @@ def update_event(event_id):
             {'_id': ObjectId(event_id)},
             {'$set': update_data}
         )
+        response_cache.invalidate('events', f'event:{event_id}')
         
         return jsonify({'message': 'Event updated successfully'}), 200
         
@@ -219,16 +250,21 @@ def delete_event(event_id):
         
         # Delete event
         mongo.db.events.delete_one({'_id': ObjectId(event_id)})
+        response_cache.invalidate('events', f'event:{event_id}')
         
         # Remove from organizer's created_events
         mongo.db.users.update_one(
             {'_id': ObjectId(user_id)},
             {'$pull': {'created_events': ObjectId(event_id)}}
         )
+        invalidate_user(user_id)
         
         # Clean up related data
+        message_buffer.discard_event(ObjectId(event_id))
+        chat_history.discard(event_id)
         mongo.db.messages.delete_many({'event_id': ObjectId(event_id)})
         mongo.db.activities.delete_many({'event_id': ObjectId(event_id)})
+        event_photos.delete_event_photos(event)
         
         return jsonify({'message': 'Event deleted successfully'}), 200
         
@@ -252,21 +288,25 @@ def rsvp_event(event_id):
         if ObjectId(user_id) in event.get('rsvps', []):
             return jsonify({'message': 'Already RSVP\'d to this event'}), 400
         
+        # Read the (cached) user before rsvped_events changes underneath it
+        user = get_current_user()
+
         # Add RSVP
         mongo.db.events.update_one(
             {'_id': ObjectId(event_id)},
             {'$push': {'rsvps': ObjectId(user_id)}}
         )
+        response_cache.invalidate('events', f'event:{event_id}')
         
         # Add to user's rsvped_events
         mongo.db.users.update_one(
             {'_id': ObjectId(user_id)},
             {'$push': {'rsvped_events': ObjectId(event_id)}}
         )
+        invalidate_user(user_id)
         
         # Create activity
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-        mongo.db.activities.insert_one({
+        mongo.db_for('bulk').activities.insert_one({
             'actor_id': ObjectId(user_id),
             'actor_name': user['username'],
             'type': 'RSVP',
@@ -275,11 +315,12 @@ def rsvp_event(event_id):
             'timestamp': datetime.utcnow()
         })
 
-        # 🔥 Notify organizer instantly
-        socketio.emit(
-            "rsvp_update",
-            {"event_id": event_id, "count": len(event.get('rsvps', [])) + 1},
-            room=f"organizer_{event['organizer_id']}"
+        # 🔥 Notify organizer (coalesced during RSVP bursts)
+        rsvp_broadcaster.update(
+            event_id,
+            len(event.get('rsvps', [])) + 1,
+            organizer_room(event['organizer_id']),
+            extra={"event_id": event_id}
         )
 
         return jsonify({'message': 'RSVP successful'}), 201
@@ -309,6 +350,7 @@ def record_arrival(event_id):
             {'_id': ObjectId(event_id)},
             {'$push': {'arrivals': ObjectId(user_id)}}
         )
+        response_cache.invalidate('events', f'event:{event_id}')
         
         return jsonify({'message': 'Arrival recorded'}), 200
         
@@ -442,15 +484,28 @@ def get_organizer_rsvp_stats():
         return jsonify({'message': 'Failed to get RSVP stats'}), 500
 
 @event_bp.route('/<string:event_id>/photos', methods=['GET'])
+@response_cache.cached('event:{event_id}')
 def get_event_photos(event_id):
-    """Get all photos for an event"""
+    """Get an event's photos, newest first, a page at a time (?limit=, ?cursor=next_cursor)"""
     try:
-        event = mongo.db.events.find_one({'_id': ObjectId(event_id)})
+        event = mongo.db.events.find_one({'_id': ObjectId(event_id)}, {'_id': 1})
         if not event:
             return jsonify({'message': 'Event not found'}), 404
-        
-        photos = event.get('photo_gallery', [])
-        return jsonify({'photos': photos}), 200
+
+        page_size = current_app.config.get('EVENT_PHOTOS_PAGE_SIZE', 30)
+        limit = request.args.get('limit', type=int, default=page_size)
+        limit = max(1, min(limit, current_app.config.get('EVENT_PHOTOS_MAX_PAGE_SIZE', 100)))
+        try:
+            photos, next_cursor = event_photos.photo_page(event_id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        gallery = [event_photos.serialize(photo) for photo in photos]
+        return jsonify({
+            'photos': [photo['url'] for photo in gallery],
+            'gallery': gallery,
+            'next_cursor': next_cursor
+        }), 200
         
     except Exception as e:
         current_app.logger.error(f"Failed to get photos: {e}")
@@ -468,12 +523,7 @@ def upload_event_photo(event_id):
         if not event:
             return jsonify({'message': 'Event not found'}), 404
         
-        # Check if user is attendee or organizer
-        user_obj_id = ObjectId(user_id)
-        is_organizer = str(event['organizer_id']) == user_id
-        is_attendee = user_obj_id in event.get('rsvps', []) or user_obj_id in event.get('arrivals', [])
-        
-        if not (is_organizer or is_attendee):
+        if not _can_add_photos(event, user_id):
             return jsonify({'message': 'Must be an attendee or organizer to upload photos'}), 403
         
         # Check if file was uploaded
@@ -487,37 +537,136 @@ def upload_event_photo(event_id):
         if not allowed_file(file.filename):
             return jsonify({'message': 'File type not allowed'}), 400
         
-        # Upload to cloud storage
-        photo_url = upload_photo_to_cloud(file, event_id)
-        if not photo_url:
-            return jsonify({'message': 'Photo upload failed'}), 500
-        
-        # Add photo URL to event
-        mongo.db.events.update_one(
-            {'_id': ObjectId(event_id)},
-            {'$push': {'photo_gallery': photo_url}}
-        )
-        
-        # Create activity
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-        mongo.db.activities.insert_one({
-            'actor_id': ObjectId(user_id),
-            'actor_name': user['username'],
-            'type': 'PHOTO_UPLOADED',
-            'event_id': ObjectId(event_id),
-            'summary': f"{user['username']} uploaded a photo to '{event['title']}'",
-            'timestamp': datetime.utcnow()
-        })
-        
+        # Stored by the upload pool; the photo joins the gallery once it is up
+        user = get_current_user()
+        try:
+            upload = upload_queue.submit(
+                file, event_id, 'event_photo', user_id,
+                on_complete=partial(_add_event_photo, actor_name=user['username'], event_title=event['title']),
+                process=image_processor.process,
+                event_id=event_id
+            )
+        except UploadQueueFull:
+            return jsonify({'message': 'Too many uploads in progress, try again shortly'}), 503
+
         return jsonify({
-            'message': 'Photo uploaded successfully',
-            'photo_url': photo_url
-        }), 201
+            'message': 'Photo upload accepted',
+            'upload_id': str(upload['_id']),
+            'status': upload['status'],
+            'photo_url': upload['url']
+        }), 202
 
     except Exception as e:
         current_app.logger.error(f"Photo upload failed: {e}")
         return jsonify({'message': 'Photo upload failed'}), 500
 
+@event_bp.route('/<string:event_id>/photos/upload-url', methods=['POST'])
+@jwt_required()
+def create_event_photo_upload(event_id):
+    """Reserve a direct upload of an event photo: the client posts the file to storage itself"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        event = mongo.db.events.find_one({'_id': ObjectId(event_id)}, {'organizer_id': 1, 'rsvps': 1, 'arrivals': 1})
+        if not event:
+            return jsonify({'message': 'Event not found'}), 404
+
+        if not _can_add_photos(event, user_id):
+            return jsonify({'message': 'Must be an attendee or organizer to upload photos'}), 403
+
+        filename = data.get('filename') or ''
+        if not allowed_file(filename):
+            return jsonify({'message': 'File type not allowed'}), 400
+
+        upload, form = upload_queue.reserve(filename, event_id, 'event_photo', user_id, event_id=event_id)
+        return jsonify({
+            'upload_id': str(upload['_id']),
+            'upload': form,
+            'expires_in': upload_queue.url_expires,
+            'max_bytes': upload_queue.max_bytes,
+            'photo_url': upload['url']
+        }), 201
+
+    except Exception as e:
+        current_app.logger.error(f"Failed to create photo upload: {e}")
+        return jsonify({'message': 'Failed to create photo upload'}), 500
+
+@event_bp.route('/<string:event_id>/photos/<string:upload_id>/confirm', methods=['POST'])
+@jwt_required()
+def confirm_event_photo_upload(event_id, upload_id):
+    """Add a directly uploaded photo to the event once the client has stored it"""
+    try:
+        user_id = get_jwt_identity()
+        upload = None
+        if ObjectId.is_valid(upload_id):
+            upload = mongo.db.uploads.find_one({
+                '_id': ObjectId(upload_id),
+                'user_id': ObjectId(user_id),
+                'kind': 'event_photo',
+                'event_id': event_id
+            })
+        if not upload:
+            return jsonify({'message': 'Upload not found'}), 404
+
+        event = mongo.db.events.find_one({'_id': ObjectId(event_id)}, {'title': 1})
+        if not event:
+            return jsonify({'message': 'Event not found'}), 404
+
+        user = get_current_user()
+        try:
+            upload = upload_queue.confirm(
+                upload,
+                on_complete=partial(_add_event_photo, actor_name=user['username'], event_title=event['title']),
+                process=image_processor.process
+            )
+        except InvalidUpload as e:
+            return jsonify({'message': str(e)}), 400
+        except UploadQueueFull:
+            return jsonify({'message': 'Too many uploads in progress, try again shortly'}), 503
+
+        return jsonify({
+            'message': 'Photo upload accepted',
+            'upload_id': str(upload['_id']),
+            'status': upload['status'],
+            'photo_url': upload['url']
+        }), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Photo upload confirmation failed: {e}")
+        return jsonify({'message': 'Photo upload confirmation failed'}), 500
+
+def _valid_location(location):
+    """A GeoJSON point with numeric [longitude, latitude] in range"""
+    if not isinstance(location, dict) or 'type' not in location:
+        return False
+    coordinates = location.get('coordinates')
+    return (isinstance(coordinates, (list, tuple)) and len(coordinates) == 2
+            and validate_coordinates(*coordinates))
+
+def _can_add_photos(event, user_id):
+    """Attendees and the organizer may add photos to an event"""
+    user_obj_id = ObjectId(user_id)
+    is_organizer = str(event['organizer_id']) == user_id
+    is_attendee = user_obj_id in event.get('rsvps', []) or user_obj_id in event.get('arrivals', [])
+    return is_organizer or is_attendee
+
+def _add_event_photo(upload, actor_name, event_title):
+    """Upload pool callback: add a stored photo and its variants to the event's gallery"""
+    event_id = upload['event_id']
+    event_photos.add_photo(event_id, upload)
+    response_cache.invalidate(f'event:{event_id}')
+
+    # Create activity
+    mongo.db_for('bulk').activities.insert_one({
+        'actor_id': upload['user_id'],
+        'actor_name': actor_name,
+        'type': 'PHOTO_UPLOADED',
+        'event_id': ObjectId(event_id),
+        'summary': f"{actor_name} uploaded a photo to '{event_title}'",
+        'timestamp': datetime.utcnow()
+    })
+
 @event_bp.route('/<string:event_id>/location/share', methods=['POST'])
 @jwt_required()
 def share_location(event_id):
@@ -564,7 +713,7 @@ def recommend_events():
             radius_km = 20.0
 
         # Load user and their RSVPed events
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        user = get_current_user()
         if not user:
             return jsonify({'message': 'User not found'}), 404
 
@@ -3,6 +3,9 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
 from utils.decorators import organizer_required
+from utils.user_cache import get_current_user
+from utils.json_stream import document_batches, stream_response
+from utils.db_probe import db_probe
 from bson import ObjectId
 
 feed_bp = Blueprint('feed', __name__)
@@ -18,9 +21,9 @@ def get_feed():
         limit = request.args.get('limit', type=int, default=20)
         offset = request.args.get('offset', type=int, default=0)
         
-        # Get user's following list
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-        following_ids = user.get('following', [])
+        # Get user's following list (copied: the cached document is shared)
+        user = get_current_user()
+        following_ids = list(user.get('following', []))
         following_ids.append(ObjectId(user_id))  # Include own activities
         
         # Fetch activities from followed users
@@ -67,7 +70,7 @@ def get_feed():
 def get_organizer_events():
     """Get all events created by the authenticated organizer"""
     try:
-        if mongo.db is None:
+        if not db_probe.available():
             return jsonify({'message': 'Database not available'}), 503
 
         user_id = get_jwt_identity()
@@ -77,14 +80,9 @@ def get_organizer_events():
             'organizer_id': ObjectId(user_id)
         }).sort('date', 1)
 
-        events = []
-        for event in events_cursor:
-            event['event_id'] = str(event.pop('_id'))
-            event['organizer_id'] = str(event['organizer_id'])
-            event['date'] = event['date'].isoformat()
-            events.append(event)
-
-        return jsonify({'events': events}), 200
+        batches = document_batches(events_cursor, current_app.config.get('JSON_STREAM_BATCH_SIZE', 500),
+                                   id_field='event_id')
+        return stream_response('events', batches), 200
 
     except Exception as e:
         current_app.logger.error(f"Failed to fetch organizer events: {e}")
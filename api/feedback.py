@@ -2,6 +2,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo, socketio
+from utils.rooms import organizer_room, event_room, user_room
+from utils.json_stream import document_batches, stream_response
 from bson import ObjectId
 from datetime import datetime
 
@@ -27,12 +29,16 @@ def submit_feedback():
             "timestamp": datetime.utcnow()
         })
 
-        # Broadcast feedback creation
+        # Notify the event's organizer and followers only
+        rooms = [event_room(event_id)]
+        event = mongo.db.events.find_one({"_id": ObjectId(event_id)}, {"organizer_id": 1})
+        if event:
+            rooms.append(organizer_room(event["organizer_id"]))
         socketio.emit("feedback_created", {
             "event_id": event_id,
             "rating": rating,
             "comment": comment
-        }, broadcast=True)
+        }, to=rooms)
 
         return jsonify({"success": True})
 
@@ -48,29 +54,29 @@ def get_organizer_feedbacks():
         user_id = get_jwt_identity()
 
         # Find all events organized by this user
-        events = mongo.db.events.find({"organizer_id": user_id}, {"_id": 1})
-        event_ids = [str(event["_id"]) for event in events]
+        events = mongo.db.events.find({"organizer_id": ObjectId(user_id)}, {"_id": 1, "title": 1})
+        event_titles = {str(event["_id"]): event.get("title") for event in events}
 
         # Get feedbacks for these events
-        feedbacks = mongo.db.feedbacks.find({"event_id": {"$in": event_ids}})
-
-        feedback_list = []
-        for feedback in feedbacks:
-            # Get event details
-            event = mongo.db.events.find_one({"_id": ObjectId(feedback["event_id"])})
-            # Get user details
-            user = mongo.db.users.find_one({"_id": ObjectId(feedback["user_id"])})
-
-            feedback_list.append({
-                "event_id": feedback["event_id"],
-                "event_title": event["title"] if event else "Unknown Event",
-                "attendee_name": user["username"] if user else "Anonymous",
-                "rating": feedback["rating"],
-                "feedback": feedback["comment"],
-                "timestamp": feedback["timestamp"].isoformat()
-            })
-
-        return jsonify({"feedbacks": feedback_list})
+        feedbacks = mongo.db.feedbacks.find({"event_id": {"$in": list(event_titles)}})
+        batches = document_batches(feedbacks, current_app.config.get('JSON_STREAM_BATCH_SIZE', 500))
+
+        def feedback_batches():
+            for batch in batches:
+                # One user lookup per batch instead of one per feedback
+                user_ids = {ObjectId(f["user_id"]) for f in batch if ObjectId.is_valid(f["user_id"])}
+                users = mongo.db.users.find({"_id": {"$in": list(user_ids)}}, {"username": 1})
+                usernames = {str(user["_id"]): user.get("username") for user in users}
+                yield [{
+                    "event_id": feedback["event_id"],
+                    "event_title": event_titles.get(feedback["event_id"], "Unknown Event"),
+                    "attendee_name": usernames.get(str(feedback["user_id"]), "Anonymous"),
+                    "rating": feedback["rating"],
+                    "feedback": feedback["comment"],
+                    "timestamp": feedback["timestamp"]
+                } for feedback in batch]
+
+        return stream_response("feedbacks", feedback_batches())
 
     except Exception as e:
         current_app.logger.error(f"Failed to get organizer feedbacks: {e}")
@@ -94,11 +100,11 @@ def send_feedback_to_organizer():
             "timestamp": datetime.utcnow()
         })
 
-        # Broadcast feedback creation
+        # Notify the organizer only
         socketio.emit("feedback_to_organizer", {
             "organizer_id": organizer_id,
             "message": message
-        }, broadcast=True)
+        }, to=organizer_room(organizer_id))
 
         return jsonify({"success": True})
 
@@ -162,7 +168,7 @@ def send_chat_message():
             "receiver_id": receiver_id,
             "message": message,
             "timestamp": datetime.utcnow().isoformat()
-        }, room=f"user_{receiver_id}")
+        }, to=user_room(receiver_id))
 
         return jsonify({"success": True})
 
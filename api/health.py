@@ -1,13 +1,18 @@
+import os
+import time
 from flask import Blueprint, jsonify, current_app
 from extensions import mongo
 from datetime import datetime
+from utils.db_probe import db_probe
 
 health_bp = Blueprint('health', __name__)
 
+_STARTED = time.time()
+
 
 @health_bp.route('/', methods=['GET'])
 def health_check():
-    """Health check endpoint. Returns DB connectivity and timestamp."""
+    """Health check endpoint. Returns DB connectivity (cached, see utils/db_probe.py) and timestamp."""
     status = {
         'timestamp': datetime.utcnow().isoformat() + 'Z',
         'db': 'unavailable',
@@ -15,28 +20,76 @@ def health_check():
     }
 
     try:
-        # Try a lightweight ping using the underlying client when available
-        client = getattr(mongo, 'client', None) or getattr(mongo, '_py', None)
-        if client is not None:
-            # If we have a pymongo.MongoClient instance, run ping
-            try:
-                # Some wrappers expose .client, others expose .cx; try both
-                real_client = getattr(mongo, 'client', None) or getattr(mongo, '_py', None)
-                real_client.admin.command('ping')
-                status['db'] = 'ok'
-            except Exception:
-                # Fall back to attempting a simple operation on mongo.db
-                try:
-                    if getattr(mongo, 'db', None) is not None:
-                        # list collections is lightweight
-                        _ = mongo.db.list_collection_names(limit=1)
-                        status['db'] = 'ok'
-                except Exception:
-                    status['db'] = 'unavailable'
-        else:
-            status['db'] = 'unknown'
+        probe = db_probe.status(wait=current_app.config.get('HEALTH_FIRST_PROBE_WAIT_SECONDS', 5))
+        status['db'] = probe['status']
+        status['services']['db_probe'] = probe
     except Exception as e:
-        current_app.logger.error(f"Health check DB probe failed: {e}")
+        current_app.logger.error(f"Health check DB status failed: {e}")
         status['db'] = 'unavailable'
 
+    try:
+        status['services']['mongo_pool'] = mongo.pool_stats()
+    except Exception as e:
+        current_app.logger.error(f"Health check pool stats failed: {e}")
+
     return jsonify({'status': 'ok' if status['db'] == 'ok' else 'degraded', 'details': status}), 200 if status['db'] == 'ok' else 503
+
+
+@health_bp.route('/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the worker is serving requests. Does no I/O."""
+    return jsonify({'status': 'alive', 'pid': os.getpid(), 'uptime_seconds': round(time.time() - _STARTED, 1)}), 200
+
+
+@health_bp.route('/ready', methods=['GET'])
+def readiness():
+    """
+    Readiness probe: the cached DB status, pool saturation and queue backlogs.
+
+    Returns 503 with the failing checks in ``reasons`` when the database is
+    unavailable, the connection pool is saturated or chat messages are
+    backing up, so the load balancer routes traffic to other workers.
+    """
+    try:
+        from utils.message_buffer import message_buffer
+        from utils.coalescer import rsvp_broadcaster, rsvp_total_broadcaster
+
+        config = current_app.config
+        reasons = []
+
+        db = db_probe.status()
+        if db['status'] != 'ok':
+            reasons.append(f"database {db['status']}")
+
+        pool = mongo.pool_stats()
+        max_pool_size = pool['max_pool_size'] or config.get('MONGO_MAX_POOL_SIZE', 50)
+        saturation = pool['checked_out'] / max_pool_size if max_pool_size else 0.0
+        max_saturation = config.get('READY_MAX_POOL_SATURATION', 0.95)
+        if saturation >= max_saturation:
+            reasons.append(f"connection pool {saturation:.0%} in use")
+
+        backlog = message_buffer.depth
+        max_backlog = config.get('READY_MAX_MESSAGE_BACKLOG', 10000)
+        if backlog >= max_backlog:
+            reasons.append(f"{backlog} chat messages waiting to be written")
+
+        checks = {
+            'db': db,
+            'pool': {
+                'checked_out': pool['checked_out'],
+                'max_pool_size': max_pool_size,
+                'saturation': round(saturation, 3),
+                'max_saturation': max_saturation,
+                'checkout_failures': sum(pool['checkout_failures'].values())
+            },
+            'queues': {
+                'message_buffer': backlog,
+                'max_message_backlog': max_backlog,
+                'rsvp_broadcasts': rsvp_broadcaster.depth + rsvp_total_broadcaster.depth
+            }
+        }
+        ready = not reasons
+        return jsonify({'status': 'ready' if ready else 'not_ready', 'reasons': reasons, 'checks': checks}), 200 if ready else 503
+    except Exception as e:
+        current_app.logger.error(f"Readiness check failed: {e}")
+        return jsonify({'status': 'not_ready', 'reasons': [str(e)]}), 503
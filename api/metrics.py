@@ -0,0 +1,49 @@
+# api/metrics.py - Runtime metrics for operators
+import hmac
+from functools import wraps
+from flask import Blueprint, Response, jsonify, request, current_app
+from utils.prometheus import CONTENT_TYPE, render_metrics
+from utils.request_metrics import request_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def metrics_auth(fn):
+    """Require ``Authorization: Bearer <METRICS_TOKEN>`` when a token is configured"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+                return jsonify({'message': 'Unauthorized'}), 401
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@metrics_bp.route('', methods=['GET'], strict_slashes=False)
+@metrics_auth
+def prometheus_metrics():
+    """All metrics of this worker in the Prometheus text format"""
+    try:
+        return Response(render_metrics(), status=200, content_type=CONTENT_TYPE)
+    except Exception as e:
+        current_app.logger.error(f"Error rendering metrics: {e}")
+        return jsonify({'message': 'Failed to render metrics'}), 500
+
+
+@metrics_bp.route('/routes', methods=['GET'])
+@metrics_auth
+def route_metrics():
+    """Per-route latency, DB time and DB round trips (p50/p95/p99), slowest first"""
+    try:
+        sort_by = request.args.get('sort', 'latency_ms')
+        if sort_by not in ('latency_ms', 'db_ms', 'db_calls'):
+            return jsonify({'message': "sort must be one of latency_ms, db_ms, db_calls"}), 400
+
+        routes = request_metrics.report()
+        ordered = sorted(routes.items(), key=lambda item: (item[1][sort_by] or {}).get('p95', 0), reverse=True)
+        return jsonify({'routes': [{'route': route, **entry} for route, entry in ordered]}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error building route metrics: {e}")
+        return jsonify({'message': 'Failed to build metrics'}), 500
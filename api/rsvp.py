@@ -1,7 +1,9 @@
 # api/rsvp.py - RSVP Endpoints
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import mongo, socketio
+from extensions import mongo
+from utils.rooms import organizer_room
+from utils.coalescer import rsvp_total_broadcaster
 from bson import ObjectId
 from datetime import datetime
 
@@ -27,12 +29,14 @@ def submit_rsvp():
         stats = mongo.db.rsvps.count_documents({"event_id": event_id})
 
         # Notify organizer
-        event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
+        event = mongo.db.events.find_one({"_id": ObjectId(event_id)}, {"organizer_id": 1})
         if event:
-            socketio.emit("rsvp_update", {
-                "event_id": event_id,
-                "total_rsvps": stats
-            }, broadcast=True)
+            rsvp_total_broadcaster.update(
+                event_id,
+                stats,
+                organizer_room(event["organizer_id"]),
+                extra={"event_id": event_id}
+            )
 
         return jsonify({"success": True, "total_rsvps": stats})
 
@@ -0,0 +1,64 @@
+# api/uploads.py - Status of background photo uploads
+import os
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import mongo
+from utils.file_upload import photo_storage
+from bson import ObjectId
+
+uploads_bp = Blueprint('uploads', __name__)
+
+@uploads_bp.route('/<string:upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """Status of an upload started by the current user (pending, uploading, done or failed)"""
+    try:
+        if not ObjectId.is_valid(upload_id):
+            return jsonify({'message': 'Upload not found'}), 404
+
+        upload = mongo.db.uploads.find_one({'_id': ObjectId(upload_id)})
+        if not upload or str(upload['user_id']) != get_jwt_identity():
+            return jsonify({'message': 'Upload not found'}), 404
+
+        body = {
+            'upload_id': upload['_id'],
+            'kind': upload['kind'],
+            'status': upload['status'],
+            'url': upload['url'],
+            'size': upload.get('size'),
+            'error': upload.get('error'),
+            'created_at': upload['created_at'],
+            'updated_at': upload['updated_at']
+        }
+        if 'event_id' in upload:
+            body['event_id'] = upload['event_id']
+        return jsonify(body), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Failed to get upload {upload_id}: {e}")
+        return jsonify({'message': 'Failed to get upload'}), 500
+
+@uploads_bp.route('/files/<path:key>', methods=['GET'])
+def get_local_file(key):
+    """Objects of the local storage stand-in (UPLOAD_STORAGE=local)"""
+    if not photo_storage.is_local:
+        return jsonify({'message': 'Not found'}), 404
+    root = photo_storage.backend.root
+    return send_from_directory(root, key, max_age=86400)
+
+@uploads_bp.route('/files', methods=['POST'])
+def post_local_file():
+    """Presigned form posts on the local storage stand-in, where S3 would take them"""
+    if not photo_storage.is_local:
+        return jsonify({'message': 'Not found'}), 404
+    file = request.files.get('file')
+    if file is None:
+        return jsonify({'message': 'No file provided'}), 400
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    try:
+        photo_storage.backend.receive(request.form, file.stream, size)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 403
+    return '', 204
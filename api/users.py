@@ -2,6 +2,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
+from utils.user_cache import get_user, get_current_user, invalidate_user
+from utils.response_cache import response_cache
 from bson import ObjectId
 from datetime import datetime
 
@@ -9,6 +11,7 @@ users_bp = Blueprint('users', __name__)
 
 
 @users_bp.route('/<string:user_id>', methods=['GET'])
+@response_cache.cached('user:{user_id}')
 def get_public_profile(user_id):
     """Return a public view of a user's profile by id."""
     try:
@@ -16,14 +19,9 @@ def get_public_profile(user_id):
         if not user:
             return jsonify({'message': 'User not found'}), 404
 
-        user['_id'] = str(user['_id'])
-        if user.get('home_location') and user['home_location'].get('coordinates'):
-            user['home_location']['coordinates'] = list(user['home_location']['coordinates'])
-
-        # Convert follower/following ObjectIds to strings
-        user['followers'] = [str(x) for x in user.get('followers', [])]
-        user['following'] = [str(x) for x in user.get('following', [])]
-
+        # ObjectIds and dates are encoded by the app's JSON provider
+        user.setdefault('followers', [])
+        user.setdefault('following', [])
         return jsonify(user), 200
     except Exception as e:
         current_app.logger.error(f"Error fetching user profile: {e}")
@@ -68,14 +66,11 @@ def update_user_profile(user_id):
             {'_id': ObjectId(user_id)},
             {'$set': allowed_fields}
         )
+        invalidate_user(user_id)
 
         updated = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'password_hash': 0})
-        updated['_id'] = str(updated['_id'])
-        if updated.get('home_location') and updated['home_location'].get('coordinates'):
-            updated['home_location']['coordinates'] = list(updated['home_location']['coordinates'])
-
-        updated['followers'] = [str(x) for x in updated.get('followers', [])]
-        updated['following'] = [str(x) for x in updated.get('following', [])]
+        updated.setdefault('followers', [])
+        updated.setdefault('following', [])
 
         return jsonify({'message': 'Profile updated', 'user': updated}), 200
     except Exception as e:
@@ -99,34 +94,103 @@ def upload_user_avatar(user_id):
         if file.filename == '':
             return jsonify({'message': 'No file selected'}), 400
 
-        # Import upload helper lazily to avoid circular imports at module load
-        from utils.file_upload import upload_photo_to_cloud, allowed_file
+        # Import upload helpers lazily to avoid circular imports at module load
+        from utils.file_upload import allowed_file
+        from utils.upload_queue import upload_queue, UploadQueueFull
+        from utils.image_variants import image_processor
 
         if not allowed_file(file.filename):
             return jsonify({'message': 'File type not allowed'}), 400
 
-        # Upload to cloud (avatars folder)
-        photo_url = upload_photo_to_cloud(file, folder_name=f"avatars/{user_id}")
-        if not photo_url:
-            return jsonify({'message': 'Avatar upload failed'}), 500
-
-        # Update user document
-        mongo.db.users.update_one(
-            {'_id': ObjectId(user_id)},
-            {'$set': {'photo_url': photo_url}}
-        )
+        # Stored by the upload pool (avatars folder); the profile points at it once it is up
+        try:
+            upload = upload_queue.submit(file, f"avatars/{user_id}", 'avatar', user_id,
+                                         on_complete=_set_avatar, process=image_processor.process)
+        except UploadQueueFull:
+            return jsonify({'message': 'Too many uploads in progress, try again shortly'}), 503
 
-        updated = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'password_hash': 0})
-        updated['_id'] = str(updated['_id'])
-        updated['followers'] = [str(x) for x in updated.get('followers', [])]
-        updated['following'] = [str(x) for x in updated.get('following', [])]
-
-        return jsonify({'message': 'Avatar uploaded', 'user': updated, 'photo_url': photo_url}), 201
+        return jsonify({
+            'message': 'Avatar upload accepted',
+            'upload_id': str(upload['_id']),
+            'status': upload['status'],
+            'photo_url': upload['url']
+        }), 202
 
     except Exception as e:
         current_app.logger.error(f"Avatar upload failed: {e}")
         return jsonify({'message': 'Avatar upload failed'}), 500
 
+@users_bp.route('/<string:user_id>/avatar/upload-url', methods=['POST'])
+@jwt_required()
+def create_avatar_upload(user_id):
+    """Reserve a direct upload of an avatar: the client posts the file to storage itself"""
+    try:
+        if get_jwt_identity() != user_id:
+            return jsonify({'message': 'Unauthorized to update this profile'}), 403
+
+        from utils.file_upload import allowed_file
+        from utils.upload_queue import upload_queue
+
+        filename = (request.get_json() or {}).get('filename') or ''
+        if not allowed_file(filename):
+            return jsonify({'message': 'File type not allowed'}), 400
+
+        upload, form = upload_queue.reserve(filename, f"avatars/{user_id}", 'avatar', user_id)
+        return jsonify({
+            'upload_id': str(upload['_id']),
+            'upload': form,
+            'expires_in': upload_queue.url_expires,
+            'max_bytes': upload_queue.max_bytes,
+            'photo_url': upload['url']
+        }), 201
+
+    except Exception as e:
+        current_app.logger.error(f"Failed to create avatar upload: {e}")
+        return jsonify({'message': 'Failed to create avatar upload'}), 500
+
+@users_bp.route('/<string:user_id>/avatar/<string:upload_id>/confirm', methods=['POST'])
+@jwt_required()
+def confirm_avatar_upload(user_id, upload_id):
+    """Point the profile at a directly uploaded avatar once the client has stored it"""
+    try:
+        if get_jwt_identity() != user_id:
+            return jsonify({'message': 'Unauthorized to update this profile'}), 403
+
+        from utils.upload_queue import upload_queue, UploadQueueFull, InvalidUpload
+        from utils.image_variants import image_processor
+
+        upload = None
+        if ObjectId.is_valid(upload_id):
+            upload = mongo.db.uploads.find_one({'_id': ObjectId(upload_id), 'user_id': ObjectId(user_id), 'kind': 'avatar'})
+        if not upload:
+            return jsonify({'message': 'Upload not found'}), 404
+
+        try:
+            upload = upload_queue.confirm(upload, on_complete=_set_avatar, process=image_processor.process)
+        except InvalidUpload as e:
+            return jsonify({'message': str(e)}), 400
+        except UploadQueueFull:
+            return jsonify({'message': 'Too many uploads in progress, try again shortly'}), 503
+
+        return jsonify({
+            'message': 'Avatar upload accepted',
+            'upload_id': str(upload['_id']),
+            'status': upload['status'],
+            'photo_url': upload['url']
+        }), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Avatar upload confirmation failed: {e}")
+        return jsonify({'message': 'Avatar upload confirmation failed'}), 500
+
+def _set_avatar(upload):
+    """Upload pool callback: point the user's profile at the stored avatar and its variants"""
+    mongo.db.users.update_one(
+        {'_id': upload['user_id']},
+        {'$set': {'photo_url': upload['url'], 'photo_variants': upload.get('variants', [])}}
+    )
+    invalidate_user(str(upload['user_id']))
+
 @users_bp.route('/<string:user_id>/follow', methods=['POST'])
 @jwt_required()
 def follow_user(user_id):
@@ -139,12 +203,12 @@ def follow_user(user_id):
             return jsonify({'message': 'Cannot follow yourself'}), 400
         
         # Verify target user exists
-        target_user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        target_user = get_user(user_id)
         if not target_user:
             return jsonify({'message': 'User not found'}), 404
         
         # Check if already following
-        follower = mongo.db.users.find_one({'_id': ObjectId(follower_id)})
+        follower = get_current_user()
         if ObjectId(user_id) in follower.get('following', []):
             return jsonify({'message': 'Already following this user'}), 400
         
@@ -159,9 +223,10 @@ def follow_user(user_id):
             {'_id': ObjectId(user_id)},
             {'$push': {'followers': ObjectId(follower_id)}}
         )
+        invalidate_user(follower_id, user_id)
         
         # Create activity
-        mongo.db.activities.insert_one({
+        mongo.db_for('bulk').activities.insert_one({
             'actor_id': ObjectId(follower_id),
             'actor_name': follower['username'],
             'type': 'FOLLOW',
@@ -184,7 +249,7 @@ def unfollow_user(user_id):
         follower_id = get_jwt_identity()
         
         # Verify target user exists
-        target_user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        target_user = get_user(user_id)
         if not target_user:
             return jsonify({'message': 'User not found'}), 404
         
@@ -199,6 +264,7 @@ def unfollow_user(user_id):
             {'_id': ObjectId(user_id)},
             {'$pull': {'followers': ObjectId(follower_id)}}
         )
+        invalidate_user(follower_id, user_id)
         
         return jsonify({'message': 'Unfollow successful'}), 200
         
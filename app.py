@@ -1,25 +1,43 @@
 # app.py
 import os
 import json
+import threading
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
+from socketio import PubSubManager
 import firebase_admin
 from firebase_admin import credentials
 from dotenv import load_dotenv
 
-from flask_compress import Compress
-
 from extensions import mongo, jwt, socketio, bcrypt
 from routes import register_blueprints
 from websocket_handlers import register_socketio_handlers
 from config import DevelopmentConfig, ProductionConfig, TestingConfig
+from utils.token_blocklist import token_blocklist
+from utils.message_buffer import message_buffer
+from utils.chat_history import chat_history
+from utils.socketio_queue import socketio_queue_options
+from utils.coalescer import rsvp_broadcaster, rsvp_total_broadcaster
+from utils.indexes import bootstrap_indexes
+from utils.query_profiler import query_profiler
+from utils.request_metrics import request_metrics
+from utils.db_probe import db_probe
+from utils.response_cache import response_cache
+from utils.json_provider import BSONJSONProvider
+from utils.compression import response_compressor
+from utils.file_upload import photo_storage
+from utils.upload_queue import upload_queue
+from utils.image_variants import image_processor
+import concurrency
 
 load_dotenv()
 
 def create_app(config_name=None):
     app = Flask(__name__)
+    # Encodes ObjectId and datetime, so views can return Mongo documents as-is
+    app.json = BSONJSONProvider(app)
 
     # ---------------- CONFIG ----------------
     if config_name is None:
@@ -33,9 +51,8 @@ def create_app(config_name=None):
     app.config.from_object(config_map.get(config_name, ProductionConfig))
 
     # ---------------- PERFORMANCE OPTIMIZATIONS ----------------
-    # Enable gzip compression
-    compress = Compress()
-    compress.init_app(app)
+    # zstd / br / gzip compression, negotiated per request (utils/compression.py)
+    response_compressor.init_app(app)
 
     # Request timeout settings
     app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour
@@ -44,6 +61,17 @@ def create_app(config_name=None):
     # ---------------- MONGODB ----------------
     app.config["MONGO_URI"] = os.getenv("MONGO_URI") or os.getenv("MONGODB_URI") or app.config.get("MONGO_URI")
     mongo.init_app(app)
+    query_profiler.init_app(app)
+    request_metrics.init_app(app)
+    db_probe.init_app(app)
+    response_cache.init_app(app)
+    message_buffer.init_app(app)
+    chat_history.init_app(app)
+    rsvp_broadcaster.init_app(app)
+    rsvp_total_broadcaster.init_app(app)
+    photo_storage.init_app(app)
+    upload_queue.init_app(app)
+    image_processor.init_app(app)
 
     # ---------------- EXTENSIONS ----------------
     CORS(app, resources={
@@ -55,16 +83,30 @@ def create_app(config_name=None):
         }
     })
     jwt.init_app(app)
+    token_blocklist.init_app(app)
     bcrypt.init_app(app)
 
+    # Concurrency model comes from ASYNC_MODE (see concurrency.py)
+    async_mode = concurrency.get_async_mode()
+    concurrency.validate(async_mode)
+    if not concurrency.is_patched(async_mode):
+        app.logger.warning(f"ASYNC_MODE={async_mode} but the standard library is not monkey-patched; "
+                           f"start through wsgi.py or run_prod.py")
+    app.config['ASYNC_MODE'] = async_mode
+
     socketio.init_app(
         app,
         cors_allowed_origins="*",
-        async_mode="threading",
+        async_mode=async_mode,
         ping_timeout=10,
         ping_interval=25,
-        max_http_buffer_size=1000000
+        max_http_buffer_size=1000000,
+        # Pub/sub backend so broadcasts reach clients of every worker
+        **socketio_queue_options(app.config)
     )
+    if isinstance(socketio.server.manager, PubSubManager):
+        # Chat rooms held by this worker also get messages sent through the others
+        chat_history.follow(socketio.server.manager)
 
     # ---------------- FIREBASE ----------------
     if not firebase_admin._apps:
@@ -84,28 +126,38 @@ def create_app(config_name=None):
     register_blueprints(app)
     register_socketio_handlers(socketio)
 
-    # ---------------- SAFE INDEX CREATION ----------------
-    def ensure_indexes():
-        try:
-            mongo.db.users.create_index("email", unique=True)
-            mongo.db.users.create_index("username", unique=True)
-            mongo.db.events.create_index([("location", "2dsphere")])
-        except Exception:
-            pass  # NEVER crash or log TLS noise
-
-    @app.before_request
-    def lazy_index_init():
-        if not getattr(app, "_indexes_initialized", False):
-            app._indexes_initialized = True
-            ensure_indexes()
+    # ---------------- INDEXES ----------------
+    # Built off the request path (see utils/indexes.py and scripts/migrate_indexes.py)
+    bootstrap_indexes(app)
 
     return app
 
 
-app = create_app()
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+    """Return this process's application, creating it on first use"""
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    # `app` (e.g. `gunicorn app:app`) is created on first access instead of at
+    # import, so importing create_app never builds a second app or touches Mongo
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ---------------- GUNICORN ENTRY ----------------
 if __name__ == "__main__":
+    app = get_app()
     bind_host = os.environ.get("BIND_HOST", "0.0.0.0")
     bind_port = int(os.environ.get("PORT", 10000))
 
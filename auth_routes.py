@@ -1,10 +1,14 @@
 # auth_routes.py: Handles /api/v1/auth/* and /api/v1/user/* endpoints
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from bson import ObjectId
 from datetime import datetime
 from firebase_admin import auth
+from pymongo.errors import ConnectionFailure
 from extensions import mongo, bcrypt
+from utils.user_cache import invalidate_user
+from utils.token_blocklist import token_blocklist
+from utils.db_probe import db_probe
 import time
 
 auth_bp = Blueprint('auth_routes', __name__)
@@ -20,7 +24,7 @@ def _validate_request_data(data, required_fields):
 def register():
     start_time = time.time()
     try:
-        if mongo.db is None:
+        if not db_probe.available():
             return jsonify({"message": "Database connection not available"}), 503
 
         data = request.get_json()
@@ -58,7 +62,7 @@ def register():
         }
 
         # Insert with timeout
-        result = mongo.db.users.insert_one(user_data)
+        result = mongo.db_for('critical').users.insert_one(user_data)
         user_id = result.inserted_id
 
         # Remove sensitive data
@@ -77,6 +81,10 @@ def register():
             "processing_time_ms": round(processing_time * 1000, 2)
         }), 201
 
+    except ConnectionFailure as e:
+        # Went down since the last probe
+        current_app.logger.error(f"Database unavailable during registration: {e}")
+        return jsonify({"message": "Database connection not available"}), 503
     except Exception as e:
         processing_time = time.time() - start_time
         current_app.logger.error(f"Error in user registration after {processing_time:.3f}s: {e}")
@@ -86,7 +94,7 @@ def register():
 def login():
     start_time = time.time()
     try:
-        if mongo.db is None:
+        if not db_probe.available():
             return jsonify({"message": "Database connection not available"}), 503
 
         data = request.get_json()
@@ -135,6 +143,9 @@ def login():
             "processing_time_ms": round(processing_time * 1000, 2)
         }), 200
 
+    except ConnectionFailure as e:
+        current_app.logger.error(f"Database unavailable during login: {e}")
+        return jsonify({"message": "Database connection not available"}), 503
     except Exception as e:
         processing_time = time.time() - start_time
         current_app.logger.error(f"Error in user login after {processing_time:.3f}s: {e}")
@@ -190,11 +201,12 @@ def forgot_password():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    # In a stateless JWT setup, logout is handled client-side by deleting the token.
-    # This endpoint can be used to confirm token validity and log the action.
+    # Revoke the presented token until it would have expired anyway; the
+    # blocklist loader rejects it on every later request.
     try:
-        # Optionally, you could add the token to a blacklist here.
         jwt_identity = get_jwt_identity()
+        claims = get_jwt()
+        token_blocklist.revoke(claims['jti'], datetime.utcfromtimestamp(claims['exp']))
         current_app.logger.info(f"User {jwt_identity} logged out.")
         return jsonify({"message": "Logged out successfully."}), 200
     except Exception as e:
@@ -247,6 +259,7 @@ def update_user_location():
         )
         if result.matched_count == 0:
             return jsonify({"message": "User not found"}), 404
+        invalidate_user(user_id)
         return jsonify({"success": True, "message": "Home location updated"})
     except Exception as e:
         current_app.logger.error(f"Error updating user location: {e}")
@@ -272,7 +285,7 @@ def change_password():
             return jsonify({"message": "Current password is incorrect"}), 400
 
         hashed_new_password = bcrypt.generate_password_hash(new_password).decode('utf-8')
-        mongo.db.users.update_one(
+        mongo.db_for('critical').users.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"password_hash": hashed_new_password}}
         )
@@ -314,7 +327,7 @@ def verify_firebase_token():
                 "followers": [],
                 "created_at": datetime.utcnow().isoformat()
             }
-            user_id = mongo.db.users.insert_one(new_user).inserted_id
+            user_id = mongo.db_for('critical').users.insert_one(new_user).inserted_id
             user_data = mongo.db.users.find_one({"_id": user_id})
 
         access_token = create_access_token(
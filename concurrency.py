@@ -0,0 +1,79 @@
+# concurrency.py - Single place that selects the server concurrency model
+"""
+The Socket.IO async mode, the monkey-patching it needs and the matching
+Gunicorn worker class are all derived from the ``ASYNC_MODE`` environment
+variable here, so ``app.py``, ``wsgi.py``, ``run_prod.py`` and
+``gunicorn.conf.py`` can never disagree.
+
+- ``threading`` (default): no monkey-patching; Gunicorn ``gthread`` worker
+  with ``GUNICORN_THREADS`` threads; WebSocket via simple-websocket.
+- ``eventlet``: requires the ``eventlet`` package; Gunicorn ``eventlet`` worker.
+- ``gevent``: requires ``gevent`` (and ``gevent-websocket`` for WebSocket);
+  Gunicorn gevent(-websocket) worker.
+
+This module must be imported and ``monkey_patch()`` called before anything
+else in entry points, because eventlet/gevent have to patch the standard
+library before sockets and threads are created.
+"""
+import importlib.util
+import os
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+_patched_mode = None
+
+
+def get_async_mode():
+    """Return the configured async mode, validated against ``ASYNC_MODES``"""
+    mode = (os.environ.get('ASYNC_MODE') or 'threading').strip().lower()
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"ASYNC_MODE must be one of {', '.join(ASYNC_MODES)}; got '{mode}'")
+    return mode
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def validate(mode):
+    """Raise RuntimeError if the packages required by ``mode`` are missing"""
+    if mode in ('eventlet', 'gevent') and not _installed(mode):
+        raise RuntimeError(f"ASYNC_MODE={mode} requires the '{mode}' package to be installed")
+
+
+def monkey_patch():
+    """Validate the configured mode and apply its monkey-patching once"""
+    global _patched_mode
+    mode = get_async_mode()
+    validate(mode)
+    if _patched_mode is None:
+        if mode == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+        elif mode == 'gevent':
+            from gevent import monkey
+            monkey.patch_all()
+        _patched_mode = mode
+    return mode
+
+
+def is_patched(mode):
+    """Return True if the standard library is patched for ``mode``"""
+    if mode == 'eventlet':
+        from eventlet import patcher
+        return patcher.is_monkey_patched('socket')
+    if mode == 'gevent':
+        from gevent import monkey
+        return monkey.is_module_patched('socket')
+    return True
+
+
+def gunicorn_worker_class(mode):
+    """Return the Gunicorn worker class that serves ``mode``"""
+    if mode == 'eventlet':
+        return 'eventlet'
+    if mode == 'gevent':
+        if _installed('geventwebsocket'):
+            return 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+        return 'gevent'
+    return 'gthread'
@@ -1,5 +1,6 @@
 # config.py - Application Configuration
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -17,12 +18,108 @@ class Config:
     MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS') or 5000)
     MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS') or 5000)
     MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS') or 5000)
+    MONGO_MAX_CONNECTING = int(os.environ.get('MONGO_MAX_CONNECTING') or 2)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS') or 2000)
+    MONGO_RETRY_WRITES = (os.environ.get('MONGO_RETRY_WRITES') or 'true').lower() == 'true'
+    # Wire compression, in order of preference; unavailable ones are skipped
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS') or 'zstd,snappy,zlib'
+    MONGO_ZLIB_COMPRESSION_LEVEL = int(os.environ.get('MONGO_ZLIB_COMPRESSION_LEVEL') or 6)
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE') or 'primary'
+    # Write concern per write class (see utils/mongo_client.py): a number or 'majority'
+    MONGO_WRITE_CONCERN_DEFAULT = os.environ.get('MONGO_WRITE_CONCERN_DEFAULT') or '1'
+    MONGO_WRITE_CONCERN_BULK = os.environ.get('MONGO_WRITE_CONCERN_BULK') or '1'
+    MONGO_WRITE_CONCERN_BULK_JOURNAL = False
+    MONGO_WRITE_CONCERN_CRITICAL = os.environ.get('MONGO_WRITE_CONCERN_CRITICAL') or 'majority'
+    MONGO_WRITE_CONCERN_CRITICAL_JOURNAL = True
+    MONGO_WRITE_CONCERN_TIMEOUT_MS = int(os.environ.get('MONGO_WRITE_CONCERN_TIMEOUT_MS') or 5000)
+
+    # Index creation at boot: 'background' or 'off' (use scripts/migrate_indexes.py)
+    INDEX_BOOTSTRAP = os.environ.get('INDEX_BOOTSTRAP') or 'background'
+    INDEX_BOOTSTRAP_ATTEMPTS = int(os.environ.get('INDEX_BOOTSTRAP_ATTEMPTS') or 5)
+    INDEX_BOOTSTRAP_RETRY_SECONDS = int(os.environ.get('INDEX_BOOTSTRAP_RETRY_SECONDS') or 30)
+
+    # Query profiler (see utils/query_profiler.py and scripts/index_advisor.py)
+    QUERY_PROFILER_ENABLED = (os.environ.get('QUERY_PROFILER_ENABLED') or 'false').lower() == 'true'
+    QUERY_SLOW_MS = int(os.environ.get('QUERY_SLOW_MS') or 100)
+    QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('QUERY_EXPLAIN_SAMPLE_RATE') or 0.01)
+    QUERY_PROFILE_PATH = os.environ.get('QUERY_PROFILE_PATH')
+
+    # Request metrics (see utils/request_metrics.py, /api/v1/metrics)
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+    METRICS_DB_BYTES = (os.environ.get('METRICS_DB_BYTES') or 'false').lower() == 'true'
+    METRICS_DB_CALLS_WARNING = int(os.environ.get('METRICS_DB_CALLS_WARNING') or 25)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Health probes (see utils/db_probe.py, /api/v1/health/live and /ready)
+    HEALTH_PROBE_INTERVAL_SECONDS = float(os.environ.get('HEALTH_PROBE_INTERVAL_SECONDS') or 10)
+    HEALTH_FIRST_PROBE_WAIT_SECONDS = float(os.environ.get('HEALTH_FIRST_PROBE_WAIT_SECONDS') or 5)
+    READY_MAX_POOL_SATURATION = float(os.environ.get('READY_MAX_POOL_SATURATION') or 0.95)
+    READY_MAX_MESSAGE_BACKLOG = int(os.environ.get('READY_MAX_MESSAGE_BACKLOG') or 10000)
+
+    # Cached public GET responses (see utils/response_cache.py); redis://... to share between workers
+    RESPONSE_CACHE_ENABLED = (os.environ.get('RESPONSE_CACHE_ENABLED') or 'true').lower() == 'true'
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL')
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS') or 30)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 1000)
+    RESPONSE_CACHE_MAX_BODY_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BODY_BYTES') or 1048576)
+
+    # GET /events without coordinates through a JSON-shaped aggregation read as
+    # raw BSON batches (utils/json_stream.py); needs MongoDB 4.0+
+    EVENTS_RAW_PIPELINE = (os.environ.get('EVENTS_RAW_PIPELINE') or 'false').lower() == 'true'
+    # Documents per cursor round trip and per streamed chunk of large listings
+    JSON_STREAM_BATCH_SIZE = int(os.environ.get('JSON_STREAM_BATCH_SIZE') or 500)
+
+    # Response compression (utils/compression.py, scripts/bench_compression.py).
+    # Encodings in order of preference; zstd and br need zstandard / brotli
+    COMPRESS_ENABLED = (os.environ.get('COMPRESS_ENABLED') or 'true').lower() == 'true'
+    COMPRESS_ALGORITHMS = os.environ.get('COMPRESS_ALGORITHMS') or 'zstd,br,gzip'
+    # Smaller bodies fit in a packet or two and are sent uncompressed
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    # Levels for bodies compressed on every request: fast, most of the ratio
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL') or 4)
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL') or 4)
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL') or 3)
+    # Levels for response cache entries, compressed once and served many times
+    COMPRESS_CACHED_GZIP_LEVEL = int(os.environ.get('COMPRESS_CACHED_GZIP_LEVEL') or 9)
+    COMPRESS_CACHED_BR_LEVEL = int(os.environ.get('COMPRESS_CACHED_BR_LEVEL') or 6)
+    COMPRESS_CACHED_ZSTD_LEVEL = int(os.environ.get('COMPRESS_CACHED_ZSTD_LEVEL') or 12)
+
+    # Authenticated user cache (per worker process)
+    USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE') or 10000)
+    USER_CACHE_TTL_SECONDS = int(os.environ.get('USER_CACHE_TTL_SECONDS') or 60)
+
+    # Chat message write-behind buffer
+    MESSAGE_FLUSH_INTERVAL_MS = int(os.environ.get('MESSAGE_FLUSH_INTERVAL_MS') or 250)
+    MESSAGE_FLUSH_BATCH_SIZE = int(os.environ.get('MESSAGE_FLUSH_BATCH_SIZE') or 100)
+    MESSAGE_BUFFER_MAX_PENDING = int(os.environ.get('MESSAGE_BUFFER_MAX_PENDING') or 50000)
+
+    # Recent chat history kept in memory per room
+    CHAT_HISTORY_SIZE = int(os.environ.get('CHAT_HISTORY_SIZE') or 50)
+    CHAT_HISTORY_MAX_ROOMS = int(os.environ.get('CHAT_HISTORY_MAX_ROOMS') or 1000)
+    CHAT_HISTORY_TTL_SECONDS = int(os.environ.get('CHAT_HISTORY_TTL_SECONDS') or 300)
+
+    # Socket.IO fan-out between workers/nodes (see utils/socketio_queue.py)
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL') or 'flask-socketio'
+    # Size (degrees) of the grid cells used as rooms for new-event announcements
+    GEO_ROOM_CELL_DEGREES = float(os.environ.get('GEO_ROOM_CELL_DEGREES') or 0.5)
+    # Minimum interval between rsvp_update emits for the same event
+    RSVP_BROADCAST_INTERVAL_MS = int(os.environ.get('RSVP_BROADCAST_INTERVAL_MS') or 500)
 
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
+    # Token revocation (logout) blocklist
+    JWT_BLOCKLIST_CAPACITY = int(os.environ.get('JWT_BLOCKLIST_CAPACITY') or 100000)
+    JWT_BLOCKLIST_ERROR_RATE = float(os.environ.get('JWT_BLOCKLIST_ERROR_RATE') or 0.001)
+    JWT_BLOCKLIST_LRU_SIZE = int(os.environ.get('JWT_BLOCKLIST_LRU_SIZE') or 1024)
+    JWT_BLOCKLIST_SYNC_SECONDS = int(os.environ.get('JWT_BLOCKLIST_SYNC_SECONDS') or 5)
+    # Accept a token whose revocation cannot be checked (database down) instead of refusing it
+    JWT_BLOCKLIST_FAIL_OPEN = (os.environ.get('JWT_BLOCKLIST_FAIL_OPEN') or 'false').lower() == 'true'
+
     # Flask Performance Settings
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)
     SESSION_TYPE = 'filesystem'
@@ -31,6 +128,40 @@ class Config:
     # File uploads
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or './uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # 's3', or 'local' to store objects under UPLOAD_FOLDER (utils/file_upload.py)
+    UPLOAD_STORAGE = os.environ.get('UPLOAD_STORAGE') or 's3'
+    CLOUD_STORAGE_BUCKET = os.environ.get('CLOUD_STORAGE_BUCKET')
+    # Base URL of stored objects (CDN); defaults to the bucket's S3 URL
+    CLOUD_STORAGE_PUBLIC_URL = os.environ.get('CLOUD_STORAGE_PUBLIC_URL')
+    AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    AWS_REGION = os.environ.get('AWS_REGION')
+    # S3-compatible endpoint instead of AWS (MinIO, LocalStack)
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+    UPLOAD_MULTIPART_THRESHOLD_MB = int(os.environ.get('UPLOAD_MULTIPART_THRESHOLD_MB') or 8)
+    UPLOAD_MULTIPART_CHUNK_MB = int(os.environ.get('UPLOAD_MULTIPART_CHUNK_MB') or 8)
+    UPLOAD_MULTIPART_CONCURRENCY = int(os.environ.get('UPLOAD_MULTIPART_CONCURRENCY') or 4)
+    # Background upload pool per worker process (utils/upload_queue.py)
+    UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS') or 4)
+    UPLOAD_QUEUE_SIZE = int(os.environ.get('UPLOAD_QUEUE_SIZE') or 64)
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR')
+    # Direct uploads (POST .../upload-url, then .../confirm): the client posts
+    # the photo to storage with a presigned form valid this many seconds
+    UPLOAD_URL_EXPIRES = int(os.environ.get('UPLOAD_URL_EXPIRES') or 900)
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES') or 16 * 1024 * 1024)
+    # GET /events/<id>/photos page size (?limit= up to the maximum)
+    EVENT_PHOTOS_PAGE_SIZE = int(os.environ.get('EVENT_PHOTOS_PAGE_SIZE') or 30)
+    EVENT_PHOTOS_MAX_PAGE_SIZE = int(os.environ.get('EVENT_PHOTOS_MAX_PAGE_SIZE') or 100)
+    # Thumbnail and responsive widths made for every uploaded photo
+    # (utils/image_variants.py); formats this Pillow cannot encode are skipped
+    IMAGE_VARIANTS_ENABLED = (os.environ.get('IMAGE_VARIANTS_ENABLED') or 'true').lower() == 'true'
+    IMAGE_VARIANT_FORMATS = os.environ.get('IMAGE_VARIANT_FORMATS') or 'avif,webp'
+    IMAGE_VARIANT_WIDTHS = os.environ.get('IMAGE_VARIANT_WIDTHS') or '320,640,1280'
+    IMAGE_THUMBNAIL_SIZE = int(os.environ.get('IMAGE_THUMBNAIL_SIZE') or 160)
+    IMAGE_WEBP_QUALITY = int(os.environ.get('IMAGE_WEBP_QUALITY') or 80)
+    IMAGE_AVIF_QUALITY = int(os.environ.get('IMAGE_AVIF_QUALITY') or 60)
+    # Larger images are stored without variants (decompression bombs)
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS') or 40000000)
 
     # Firebase
     FIREBASE_SERVICE_ACCOUNT_KEY = os.environ.get('FIREBASE_SERVICE_ACCOUNT_KEY')
@@ -65,3 +196,5 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     MONGO_URI = os.environ.get('MONGO_URI')
+    UPLOAD_STORAGE = 'local'
+    UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'event-uploads-test')
@@ -1,6 +1,7 @@
 # extensions.py - Flask Extensions Initialization
 from flask_pymongo import PyMongo
 import os
+import threading
 import pymongo
 from config import Config
 from flask_jwt_extended import JWTManager
@@ -14,33 +15,142 @@ class _MongoWrapper:
 	Some MongoDB URIs (notably mongodb+srv without a path) may not expose a default
 	database to Flask-PyMongo. This wrapper ensures `mongo.db` is always available
 	after `init_app(app)` by falling back to a direct `pymongo.MongoClient` when needed.
+
+	The client is created lazily, on first access to `mongo.client` or `mongo.db`
+	in each process: `init_app` only records the settings, so importing or
+	creating the app never blocks on an unreachable server, and a process forked
+	by a pre-forking server (Gunicorn) builds its own client instead of
+	inheriting the parent's sockets and monitor threads.
 	"""
 	def __init__(self):
 		self._py = PyMongo()
-		self.db = None
-		self.client = None
+		self._settings = None
+		self._dbs = {}
+		self._dbs_base = None
+		self._pid = None
+		self._lock = threading.Lock()
+		self._logger = None
+		self._listeners = []
+		if hasattr(os, 'register_at_fork'):
+			os.register_at_fork(after_in_child=self._after_fork)
 
 	def init_app(self, app):
+	    # Imported here: utils imports this module for `mongo`
+	    from utils.mongo_client import WRITE_CLASSES, mongo_client_options, write_concern_for
+
 	    uri = app.config.get('MONGO_URI') or os.environ.get('MONGO_URI') or Config.MONGO_URI
 	    dbname = app.config.get('MONGO_DBNAME') or os.environ.get('MONGO_DBNAME') or getattr(Config, 'MONGO_DBNAME', 'event_management')
-	    
-	    try:
-	        client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=20000)
-	        client.admin.command('ping')  # safer than server_info() in some cases
-	        self.client = client
-	        self.db = client[dbname]
-	        app.logger.info(f"✅ Connected to MongoDB Atlas: {dbname}")
-	    except Exception as e:
-	        app.logger.error(f"❌ Failed to connect to MongoDB Atlas: {e}")
+
+	    self.reset()
+	    self._settings = {
+	        'uri': uri,
+	        'dbname': dbname,
+	        'options': mongo_client_options(app.config),
+	        'write_concerns': {kind: write_concern_for(app.config, kind) for kind in WRITE_CLASSES}
+	    }
+	    self._logger = app.logger
+
+	def _connect(self):
+		"""Create this process's client; returns the database or None if not configured"""
+		from utils.mongo_client import pool_metrics
+		with self._lock:
+			if 'db' in self.__dict__:
+				return self.__dict__['db']
+			if self._settings is None:
+				return None
+			settings = self._settings
+			options = settings['options']
+			try:
+				pool_metrics.reset()
+				client = pymongo.MongoClient(settings['uri'], event_listeners=[pool_metrics] + self._listeners,
+				                             **options)
+				db = client[settings['dbname']]
+				self._dbs = {
+					kind: db.with_options(write_concern=write_concern)
+					for kind, write_concern in settings['write_concerns'].items()
+				}
+			except Exception as e:
+				if self._logger:
+					self._logger.error(f"❌ Failed to create MongoDB client: {e}")
+				return None
+			self._pid = os.getpid()
+			self.client = client
+			self.db = db
+			self._dbs_base = db
+			if self._logger:
+				self._logger.info(f"✅ MongoDB client ready: {settings['dbname']} (pid {self._pid}, "
+				                  f"pool {options['minPoolSize']}-{options['maxPoolSize']}, "
+				                  f"compressors: {options.get('compressors', 'none')})")
+			return db
+
+	def add_event_listener(self, listener):
+		"""Attach a pymongo monitoring listener to the client of every process"""
+		if listener not in self._listeners:
+			self._listeners.append(listener)
+			# Listeners are fixed at client creation
+			self.reset()
+
+	def reset(self):
+		"""Drop the client so the next access creates a new one"""
+		client = self.__dict__.pop('client', None)
+		self.__dict__.pop('db', None)
+		self._dbs = {}
+		self._dbs_base = None
+		if client is not None and self._pid == os.getpid():
+			client.close()
+		self._pid = None
+
+	def _after_fork(self):
+		# The inherited client belongs to the parent: never use or close it here
+		# (reset() only closes a client created by the current pid)
+		self._lock = threading.Lock()
+		self.reset()
+
+	def db_for(self, kind):
+		"""Return the database handle using the write concern of a write class
+		('default', 'bulk' or 'critical', see utils/mongo_client.py)"""
+		db = self.db
+		# Handles are only valid for the database they were derived from
+		if db is None or db is not self._dbs_base:
+			return db
+		return self._dbs.get(kind, db)
+
+	def pool_stats(self):
+		"""Return connection pool counters (checked out, wait times, failures)"""
+		from utils.mongo_client import pool_metrics
+		stats = pool_metrics.stats()
+		client = self.__dict__.get('client')
+		options = client.options.pool_options if client is not None else None
+		stats['max_pool_size'] = options.max_pool_size if options else None
+		stats['min_pool_size'] = options.min_pool_size if options else None
+		return stats
 
 	def __getattr__(self, name):
+		# Only called for attributes not set yet: create the client on first use
+		if name in ('client', 'db'):
+			self._connect()
+			return self.__dict__.get(name)
+		if name.startswith('_'):
+			raise AttributeError(name)
 		# Proxy other attributes/methods to the underlying PyMongo instance
 		return getattr(self._py, name)
 
 
+class _CountingSocketIO(SocketIO):
+	"""SocketIO that counts the events emitted by this process, for /api/v1/metrics"""
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.emit_counts = {}
+		self._emit_lock = threading.Lock()
+
+	def emit(self, event, *args, **kwargs):
+		with self._emit_lock:
+			self.emit_counts[event] = self.emit_counts.get(event, 0) + 1
+		return super().emit(event, *args, **kwargs)
+
+
 mongo = _MongoWrapper()
 jwt = JWTManager()
-# Do not force `async_mode` here – allow Flask-SocketIO to auto-detect the best
-# available async framework (eventlet/gevent) for production performance.
-socketio = SocketIO()
+# The async mode is chosen in create_app from ASYNC_MODE (see concurrency.py)
+socketio = _CountingSocketIO()
 bcrypt = Bcrypt()
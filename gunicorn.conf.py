@@ -0,0 +1,37 @@
+# gunicorn.conf.py - Gunicorn settings derived from ASYNC_MODE
+# Usage: gunicorn -c gunicorn.conf.py wsgi:application
+import os
+import sys
+
+import concurrency
+
+_async_mode = concurrency.get_async_mode()
+concurrency.validate(_async_mode)
+
+bind = f"{os.environ.get('BIND_HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+worker_class = concurrency.gunicorn_worker_class(_async_mode)
+
+# Socket.IO long-polling needs sticky sessions, which Gunicorn cannot provide
+# between its own workers: scale with more containers/nodes instead (see
+# docker-compose.prod.yml and SOCKETIO_MESSAGE_QUEUE).
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Concurrent requests/sockets per worker in threading mode
+threads = int(os.environ.get('GUNICORN_THREADS', 100))
+# Concurrent greenlets per worker in eventlet/gevent mode
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 10000))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+accesslog = '-'
+errorlog = '-'
+
+# With preload the app is imported once in the master and shared copy-on-write
+# by the workers; the Mongo client is still created per worker (see post_fork)
+preload_app = (os.environ.get('GUNICORN_PRELOAD') or 'false').lower() == 'true'
+
+
+def post_fork(server, worker):
+    """Make sure no worker reuses a Mongo client created in the master"""
+    extensions = sys.modules.get('extensions')
+    if extensions is not None:
+        extensions.mongo.reset()
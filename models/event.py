@@ -16,7 +16,6 @@ class Event:
         self.organizer_id = organizer_id
         self.rsvps = []
         self.arrivals = []
-        self.photo_gallery = []
         self.geofence_radius = geofence_radius
         self.created_at = datetime.utcnow()
     
@@ -32,7 +31,6 @@ class Event:
             'organizer_id': self.organizer_id,
             'rsvps': self.rsvps,
             'arrivals': self.arrivals,
-            'photo_gallery': self.photo_gallery,
             'geofence_radius': self.geofence_radius,
             'created_at': self.created_at
         }
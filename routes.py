@@ -7,6 +7,8 @@ from api.health import health_bp
 from api.rsvp import rsvp_bp
 from api.feedback import feedback_bp
 from api.ai import ai_bp
+from api.metrics import metrics_bp
+from api.uploads import uploads_bp
 
 def register_blueprints(app):
     """Register all application blueprints"""
@@ -19,6 +21,8 @@ def register_blueprints(app):
     app.register_blueprint(rsvp_bp, url_prefix='/api/v1/rsvp')
     app.register_blueprint(feedback_bp, url_prefix='/api/v1/feedback')
     app.register_blueprint(ai_bp, url_prefix='/api/v1/ai')
+    app.register_blueprint(metrics_bp, url_prefix='/api/v1/metrics')
+    app.register_blueprint(uploads_bp, url_prefix='/api/v1/uploads')
 
     # Root endpoint: provide a small JSON landing page and link to health
     try:
@@ -1,36 +1,32 @@
 """run_prod.py
 Production-grade runner for the Flask + Socket.IO application.
-Prefers Eventlet (already listed in requirements) for async support.
-Usage: set env vars (MONGO_URI, BIND_HOST, PORT) then run `python run_prod.py`.
+The concurrency model (threading/eventlet/gevent) is selected by ASYNC_MODE,
+see concurrency.py.
+Usage: set env vars (MONGO_URI, BIND_HOST, PORT, ASYNC_MODE) then run `python run_prod.py`.
 """
+import concurrency
+
+_async_mode = concurrency.monkey_patch()
+
 import os
 import logging
 
-try:
-    import eventlet
-    eventlet.monkey_patch()
-    _has_eventlet = True
-except Exception:
-    _has_eventlet = False
-
-from app import create_app, socketio
+from app import get_app, socketio
 
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    env = os.environ.get('FLASK_ENV', 'production')
-    app = create_app(env)
+    app = get_app()
 
     bind_host = os.environ.get('BIND_HOST', '0.0.0.0')
     port = int(os.environ.get('PORT', 5000))
 
-    if _has_eventlet:
-        app.logger.info('Starting server with eventlet (recommended for Socket.IO)')
-    else:
-        app.logger.warning('Eventlet not available; falling back to default Socket.IO server. For best performance install eventlet.')
+    app.logger.info(f'Starting server with async mode: {_async_mode}')
 
-    # In production, debug=False and use_reloader=False
-    socketio.run(app, host=bind_host, port=port, debug=False, use_reloader=False)
+    # In production, debug=False and use_reloader=False. Threading mode runs on
+    # the Werkzeug server here; prefer `gunicorn -c gunicorn.conf.py` for it.
+    socketio.run(app, host=bind_host, port=port, debug=False, use_reloader=False,
+                 allow_unsafe_werkzeug=_async_mode == 'threading')
 
 
 if __name__ == '__main__':
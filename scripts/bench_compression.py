@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression on typical API payloads.
+
+Builds the JSON bodies of GET /events (a page and a large listing), GET /feed
+and a small single-object response, then compresses each with every
+installed encoding (utils/compression.py) at a range of levels. Reports the
+compressed size, the ratio, the CPU time per response and the throughput, so
+COMPRESS_*_LEVEL (per request) and COMPRESS_CACHED_*_LEVEL (once per cache
+entry) can be chosen from numbers. Bodies under COMPRESS_MIN_SIZE are not
+compressed at all.
+
+Usage: python scripts/bench_compression.py [--events 50,2000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from flask import Flask
+from utils.compression import CODECS
+from utils.json_provider import BSONJSONProvider
+
+LEVELS = {'gzip': (1, 4, 5, 6, 9), 'br': (1, 4, 5, 6, 9, 11), 'zstd': (1, 3, 6, 12, 19)}
+
+
+def events_body(provider, count):
+    start = datetime(2026, 1, 1, 10, 0)
+    organizers = [ObjectId() for _ in range(50)]
+    events = [{
+        'title': f'Event {i}',
+        'description': f'Meetup number {i} for people who like benchmarks and good coffee.',
+        'date': start + timedelta(hours=i),
+        'category': ('Tech', 'Music', 'Sports', 'General')[i % 4],
+        'location_address': 'Nairobi, Kenya',
+        'location': {'type': 'Point', 'coordinates': [36.817223 + i / 1000, -1.286389 - i / 1000]},
+        'organizer_id': organizers[i % len(organizers)],
+        'rsvps': [ObjectId() for _ in range(i % 30)],
+        'arrivals': [ObjectId() for _ in range(i % 10)],
+        'photo_gallery': [f'https://cdn.example.com/events/{i}/{n}.jpg' for n in range(i % 3)],
+        'geofence_radius': 200,
+        'created_at': start - timedelta(days=i % 60),
+        'event_id': ObjectId()
+    } for i in range(count)]
+    return provider.dumps({'events': events}).encode()
+
+
+def feed_body(provider, count=20):
+    start = datetime(2026, 1, 1, 10, 0)
+    kinds = ('EVENT_CREATED', 'RSVP', 'FOLLOW')
+    feed = [{
+        'activity_id': str(ObjectId()),
+        'actor_id': str(ObjectId()),
+        'actor_name': f'user{i % 7}',
+        'type': kinds[i % 3],
+        'summary': f"user{i % 7} {('created event', 'is going to', 'followed')[i % 3]} 'Event {i}'",
+        'timestamp': (start - timedelta(minutes=13 * i)).isoformat(),
+        'event_id': str(ObjectId()),
+        'event_title': f'Event {i}'
+    } for i in range(count)]
+    return provider.dumps({'feed': feed}).encode()
+
+
+def small_body(provider):
+    return provider.dumps({'message': 'RSVP successful', 'event_id': str(ObjectId()), 'rsvp_count': 12}).encode()
+
+
+def timed(compress, body, level, repeat):
+    best = None
+    out = b''
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = compress(body, level)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--events', default='50,2000', help='event counts of the /events bodies')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    provider = BSONJSONProvider(Flask(__name__))
+    payloads = [(f'/events x{n}', events_body(provider, int(n))) for n in args.events.split(',')]
+    payloads += [('/feed x20', feed_body(provider)), ('small object', small_body(provider))]
+
+    missing = [name for name in LEVELS if name not in CODECS]
+    if missing:
+        print(f"not installed: {', '.join(missing)}\n")
+    for label, body in payloads:
+        print(f'{label}: {len(body)} bytes (best of {args.repeat})')
+        print(f"{'encoding':>10} {'level':>5} {'bytes':>9} {'ratio':>6} {'ms':>8} {'MB/s':>7}")
+        for name, levels in LEVELS.items():
+            if name not in CODECS:
+                continue
+            for level in levels:
+                seconds, size = timed(CODECS[name][0], body, level, args.repeat)
+                print(f'{name:>10} {level:>5} {size:>9} {len(body) / size:>5.1f}x '
+                      f'{seconds * 1000:>8.3f} {len(body) / seconds / 1e6:>7.0f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
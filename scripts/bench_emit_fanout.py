@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of one Socket.IO emit as the number of connected clients grows.
+
+Compares a global broadcast (what feedback/RSVP/event_created used to do) with
+an emit addressed to a single room of fixed size (organizer/event/geo rooms).
+Clients are registered directly with the server's manager and packets are
+counted instead of written to sockets, so the numbers isolate the fan-out
+work done by the server per emit.
+
+Usage: python scripts/bench_emit_fanout.py [--clients 100,1000,10000] [--room-size 20]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.rooms import organizer_room  # noqa: E402
+
+
+def build_server(num_clients, room_size):
+    server = socketio.Server(async_mode='threading')
+    sent = {'packets': 0}
+
+    def count_packet(eio_sid, eio_pkt):
+        eio_pkt.encode()  # framing is done once per recipient
+        sent['packets'] += 1
+
+    server._send_eio_packet = count_packet
+    server.manager.initialize()
+    for i in range(num_clients):
+        sid = server.manager.connect(uuid.uuid4().hex, '/')
+        if i < room_size:
+            server.manager.enter_room(sid, '/', organizer_room('bench'))
+    return server, sent
+
+
+def time_emit(server, sent, repeat, **kwargs):
+    payload = {'event_id': 'bench', 'total_rsvps': 42}
+    sent['packets'] = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        server.emit('rsvp_update', payload, **kwargs)
+    elapsed = time.perf_counter() - started
+    return elapsed / repeat * 1000, sent['packets'] // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', default='100,1000,10000')
+    parser.add_argument('--room-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'broadcast ms':>13} {'packets':>8} {'room ms':>9} {'packets':>8} {'speedup':>8}")
+    for num_clients in [int(n) for n in args.clients.split(',')]:
+        server, sent = build_server(num_clients, min(args.room_size, num_clients))
+        broadcast_ms, broadcast_packets = time_emit(server, sent, args.repeat)
+        room_ms, room_packets = time_emit(server, sent, args.repeat, to=organizer_room('bench'))
+        print(f"{num_clients:>8} {broadcast_ms:>13.3f} {broadcast_packets:>8} "
+              f"{room_ms:>9.3f} {room_packets:>8} {broadcast_ms / room_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
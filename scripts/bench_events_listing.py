@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/v1/events: document path vs. the raw BSON pipeline.
+
+Seeds --events events into a scratch database on a real MongoDB server and
+requests the full listing through the app with EVENTS_RAW_PIPELINE off
+(decode to dicts, rename, encode ObjectIds/datetimes while serializing) and
+on (JSON-shaped aggregation, raw batches), plus the document path as NDJSON.
+Bodies are consumed chunk by chunk as a client would read them. Reports the
+best wall time and the peak Python memory allocated while serving, which
+should stay flat as --events grows, and checks that the JSON bodies are
+identical. The scratch database is dropped afterwards.
+
+Usage: python scripts/bench_events_listing.py --uri mongodb://localhost:27017 [--events 5000] [--repeat 5]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(db, count, rsvps):
+    from bson import ObjectId
+    db.events.drop()
+    start = datetime(2026, 1, 1, 10, 0)
+    organizers = [ObjectId() for _ in range(50)]
+    docs = [{
+        'title': f'Event {i}',
+        'description': 'A gathering of people who like benchmarks. ' * 4,
+        'date': start + timedelta(hours=i, milliseconds=i % 7),
+        'category': 'Tech',
+        'location_address': 'Nairobi, Kenya',
+        'location': {'type': 'Point', 'coordinates': [36.817223, -1.286389]},
+        'organizer_id': organizers[i % len(organizers)],
+        'rsvps': [ObjectId() for _ in range(rsvps)],
+        'arrivals': [ObjectId() for _ in range(rsvps // 2)],
+        'photo_gallery': [],
+        'geofence_radius': 200,
+        'created_at': datetime.utcnow()
+    } for i in range(count)]
+    for offset in range(0, count, 1000):
+        db.events.insert_many(docs[offset:offset + 1000])
+    db.events.create_index('date')
+
+
+def measure(client, repeat, headers):
+    best = None
+    peak = 0
+    body = ''
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get('/api/v1/events', headers=headers)
+        digest = hashlib.sha1()
+        for chunk in response.iter_encoded():
+            digest.update(chunk)
+        body = digest.hexdigest()
+        elapsed = time.perf_counter() - started
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if response.status_code != 200:
+            raise RuntimeError(f'GET /api/v1/events returned {response.status_code}')
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, peak / 1024 / 1024, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--uri', required=True, help='MongoDB server to seed and query')
+    parser.add_argument('--database', default='bench_events_listing')
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rsvps', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.update({
+        'MONGO_URI': args.uri,
+        'MONGO_DBNAME': args.database,
+        'INDEX_BOOTSTRAP': 'off',
+        'RESPONSE_CACHE_ENABLED': 'false'
+    })
+    from app import create_app
+    from extensions import mongo
+
+    app = create_app()
+    client = app.test_client()
+    seed(mongo.db, args.events, args.rsvps)
+    try:
+        results = {}
+        paths = (
+            ('documents', False, {}),
+            ('raw pipeline', True, {}),
+            ('ndjson', False, {'Accept': 'application/x-ndjson'})
+        )
+        for name, raw, headers in paths:
+            app.config['EVENTS_RAW_PIPELINE'] = raw
+            client.get('/api/v1/events', headers=headers).close()  # warm up
+            results[name] = measure(client, args.repeat, headers)
+    finally:
+        mongo.client.drop_database(args.database)
+
+    baseline = results['documents'][0]
+    print(f"{args.events} events, {args.rsvps} RSVPs each (best of {args.repeat})")
+    print(f"{'path':>13} {'ms':>9} {'speedup':>8} {'peak MiB':>9}")
+    for name, (ms, peak, _) in results.items():
+        print(f'{name:>13} {ms:>9.1f} {baseline / ms:>7.1f}x {peak:>9.1f}')
+    same = results['documents'][2] == results['raw pipeline'][2]
+    print(f"identical bodies: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializing a large GET /events response.
+
+Builds --events event documents as they come out of MongoDB (ObjectIds,
+datetimes, RSVP and arrival id lists) and compares:
+
+- manual: converting every field in Python, then Flask's default provider
+  (what handlers did before utils/json_provider.py)
+- stdlib: BSONJSONProvider encoding the raw documents with the json module
+- orjson: BSONJSONProvider encoding the raw documents with orjson
+
+Usage: python scripts/bench_json.py [--events 5000] [--rsvps 20] [--repeat 5]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import utils.json_provider as json_provider
+from utils.json_provider import BSONJSONProvider
+
+
+def make_events(count, rsvps):
+    start = datetime(2026, 1, 1, 10, 0)
+    organizers = [ObjectId() for _ in range(50)]
+    return [{
+        '_id': ObjectId(),
+        'title': f'Event {i}',
+        'description': 'A gathering of people who like benchmarks. ' * 4,
+        'date': start + timedelta(hours=i),
+        'category': 'Tech',
+        'location_address': 'Nairobi, Kenya',
+        'location': {'type': 'Point', 'coordinates': [36.817223, -1.286389]},
+        'organizer_id': organizers[i % len(organizers)],
+        'geofence_radius': 200,
+        'rsvps': [ObjectId() for _ in range(rsvps)],
+        'arrivals': [ObjectId() for _ in range(rsvps // 2)],
+        'photo_gallery': [f'https://cdn.example.com/events/{i}/{n}.jpg' for n in range(3)]
+    } for i in range(count)]
+
+
+def manual(app, events):
+    converted = []
+    for event in events:
+        event['event_id'] = str(event.pop('_id'))
+        event['organizer_id'] = str(event['organizer_id'])
+        event['date'] = event['date'].isoformat()
+        event['rsvps'] = [str(oid) for oid in event.get('rsvps', [])]
+        event['arrivals'] = [str(oid) for oid in event.get('arrivals', [])]
+        converted.append(event)
+    return DefaultJSONProvider(app).response({'events': converted}).get_data()
+
+
+def provider(app, events):
+    for event in events:
+        event['event_id'] = event.pop('_id')
+    return BSONJSONProvider(app).response({'events': events}).get_data()
+
+
+def timed(fn, app, events, repeat):
+    best = None
+    body = None
+    for _ in range(repeat):
+        docs = copy.deepcopy(events)
+        started = time.perf_counter()
+        body = fn(app, docs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rsvps', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    events = make_events(args.events, args.rsvps)
+    results = [('manual', *timed(manual, app, events, args.repeat))]
+
+    orjson = json_provider.orjson
+    json_provider.orjson = None
+    results.append(('stdlib', *timed(provider, app, events, args.repeat)))
+    json_provider.orjson = orjson
+    if orjson is not None:
+        results.append(('orjson', *timed(provider, app, events, args.repeat)))
+
+    baseline = results[0][1]
+    print(f"{args.events} events, {args.rsvps} RSVPs each (best of {args.repeat})")
+    print(f"{'path':>8} {'ms':>9} {'speedup':>8} {'bytes':>10}")
+    for name, ms, size in results:
+        print(f'{name:>8} {ms:>9.1f} {baseline / ms:>7.1f}x {size:>10}')
+
+
+if __name__ == '__main__':
+    main()
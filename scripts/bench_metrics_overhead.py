@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of request metrics on the hot path.
+
+Serves a trivial JSON route (no database) through the Flask test client with
+METRICS_ENABLED on and off, each in a fresh interpreter, and reports the
+per-request difference. Also times a single Histogram.observe() and a full
+render of /api/v1/metrics after the requests have been recorded.
+
+Usage: python scripts/bench_metrics_overhead.py [--requests 20000] [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time, timeit
+from flask import jsonify
+from app import create_app
+from utils.metrics import Histogram
+from utils.prometheus import render_metrics
+
+app = create_app()
+app.add_url_rule('/bench', 'bench', lambda: jsonify({'ok': True}))
+client = app.test_client()
+requests = int(sys.argv[1])
+for _ in range(500):
+    client.get('/bench')
+started = time.perf_counter()
+for _ in range(requests):
+    client.get('/bench')
+elapsed = time.perf_counter() - started
+
+histogram = Histogram()
+observe_ns = min(timeit.repeat(lambda: histogram.observe(12.5), number=100000, repeat=3)) / 100000 * 1e9
+render_ms = min(timeit.repeat(render_metrics, number=20, repeat=3)) / 20 * 1000
+print(json.dumps({'request_us': elapsed / requests * 1e6, 'observe_ns': observe_ns, 'render_ms': render_ms}))
+"""
+
+
+def run_once(enabled, requests):
+    env = dict(os.environ, METRICS_ENABLED='true' if enabled else 'false', INDEX_BOOTSTRAP='off',
+               QUERY_PROFILER_ENABLED='false', MONGO_URI='mongodb://127.0.0.1:1/event_management')
+    result = subprocess.run([sys.executable, '-c', PROBE, str(requests)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=600)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    off = [run_once(False, args.requests)['request_us'] for _ in range(args.runs)]
+    on_runs = [run_once(True, args.requests) for _ in range(args.runs)]
+    on = [run['request_us'] for run in on_runs]
+
+    off_us, on_us = statistics.median(off), statistics.median(on)
+    print(f"metrics off: {off_us:8.1f} us/request")
+    print(f"metrics on:  {on_us:8.1f} us/request  (+{on_us - off_us:.1f} us, {(on_us / off_us - 1) * 100:+.1f}%)")
+    print(f"Histogram.observe: {statistics.median(r['observe_ns'] for r in on_runs):.0f} ns")
+    print(f"render /api/v1/metrics: {statistics.median(r['render_ms'] for r in on_runs):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
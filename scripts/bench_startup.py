@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold boot: importing the app, creating it and serving the first request.
+
+Each run is a fresh interpreter, so module imports and client creation are
+measured as a newly forked worker would pay them. MongoDB is unreachable by
+default (--mongo-uri) to show that startup no longer waits on the database;
+pass a real URI to include connection set-up in the first request instead.
+
+Usage: python scripts/bench_startup.py [--runs 5] [--mongo-uri mongodb://127.0.0.1:1/event_management]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.get_app()
+created = time.perf_counter()
+response = application.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'total_ms': (served - started) * 1000,
+    'status': response.status_code
+}))
+"""
+
+
+def run_once(mongo_uri):
+    env = dict(os.environ, MONGO_URI=mongo_uri, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--mongo-uri', default='mongodb://127.0.0.1:1/event_management')
+    args = parser.parse_args()
+
+    runs = [run_once(args.mongo_uri) for _ in range(args.runs)]
+    print(f"{'phase':>17} {'median ms':>10} {'max ms':>9}")
+    for phase in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms'):
+        values = [run[phase] for run in runs]
+        print(f'{phase[:-3]:>17} {statistics.median(values):>10.1f} {max(values):>9.1f}')
+    print(f"first request status: {runs[-1]['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Flag collection scans and inefficient queries, and suggest indexes for them.
+
+Two sources of queries, usable together:
+
+- --profile FILE: the JSON written by the app's query profiler
+  (QUERY_PROFILER_ENABLED=true, QUERY_PROFILE_PATH=FILE), grouped by endpoint
+- --uri URI: a MongoDB server's own profiler (system.profile). Pass
+  --enable-profiling to switch it on first (level 2 records every operation;
+  meant for a local mongod while exercising the API or the test suite)
+
+Suggestions follow the equality, sort, range rule and are checked against
+the registry in utils/indexes.py and, with --uri, the live indexes.
+
+Usage:
+  python scripts/index_advisor.py --profile /tmp/query_profile.json
+  python scripts/index_advisor.py --uri mongodb://localhost:27017 --db event_management [--enable-profiling]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.indexes import INDEXES  # noqa: E402
+from utils.query_profiler import _FILTER_FIELDS, command_shape, suggest_index  # noqa: E402
+
+
+def registry_indexes():
+    return {
+        collection: [list(model.document['key'].items()) for model in models]
+        for collection, models in INDEXES.items()
+    }
+
+
+def live_indexes(db):
+    return {
+        name: [list(index['key'].items()) for index in db[name].list_indexes()]
+        for name in db.list_collection_names() if not name.startswith('system.')
+    }
+
+
+def covering_index(keys, indexes):
+    """Return an existing index whose leading fields are ``keys``, if any"""
+    for index in indexes:
+        if [(f, str(d)) for f, d in index[:len(keys)]] == [(f, str(d)) for f, d in keys]:
+            return index
+    return None
+
+
+def format_keys(keys):
+    return '{' + ', '.join(f'{field}: {direction}' for field, direction in keys) + '}'
+
+
+def from_profile(path):
+    with open(path) as handle:
+        rows = json.load(handle)
+    for row in rows:
+        explain = row.get('explain') or {}
+        yield {
+            'source': row['endpoint'],
+            'collection': row['collection'],
+            'command': row['command'],
+            'shape': row['shape'],
+            'sort': row['sort'],
+            'count': row['count'],
+            'avg_ms': row['avg_ms'],
+            'collscan': explain.get('collscan'),
+            'plan': '+'.join(explain.get('stages', [])) or 'n/a',
+            'docs_examined': explain.get('docs_examined'),
+            'returned': explain.get('returned')
+        }
+
+
+def from_system_profile(db, limit):
+    grouped = {}
+    for entry in db['system.profile'].find({}).sort('ts', -1).limit(limit):
+        command = entry.get('command') or {}
+        name = next((k for k in command if k in _FILTER_FIELDS), None)
+        if name is None:
+            continue
+        if name == 'update' and 'q' in command:
+            command = {'update': command['update'], 'updates': [command]}
+        collection, shape, sort = command_shape(name, command)
+        key = (name, collection, json.dumps(shape, sort_keys=True), json.dumps(sort))
+        row = grouped.setdefault(key, {
+            'source': 'system.profile', 'collection': collection, 'command': name,
+            'shape': shape, 'sort': sort, 'count': 0, 'avg_ms': 0.0,
+            'collscan': False, 'plan': entry.get('planSummary', 'n/a'),
+            'docs_examined': 0, 'returned': 0
+        })
+        row['count'] += 1
+        row['avg_ms'] += (entry.get('millis', 0) - row['avg_ms']) / row['count']
+        row['collscan'] = row['collscan'] or 'COLLSCAN' in entry.get('planSummary', '')
+        row['docs_examined'] += entry.get('docsExamined', 0)
+        row['returned'] += entry.get('nreturned', 0)
+    return grouped.values()
+
+
+def analyse(rows, indexes, ratio_threshold):
+    findings = []
+    for row in rows:
+        examined, returned = row['docs_examined'], row['returned']
+        ratio = examined / max(returned, 1) if examined is not None and returned is not None else None
+        inefficient = bool(row['collscan']) or (ratio is not None and ratio > ratio_threshold)
+        suggestions = []
+        for keys in suggest_index(row['shape'], row['sort']):
+            existing = covering_index(keys, indexes.get(row['collection'], []))
+            suggestions.append((keys, existing))
+        findings.append({**row, 'ratio': ratio, 'inefficient': inefficient, 'suggestions': suggestions})
+    return sorted(findings, key=lambda f: (not f['inefficient'], -f['count'] * f['avg_ms']))
+
+
+def print_findings(findings, show_all):
+    for finding in findings:
+        if not finding['inefficient'] and not show_all:
+            continue
+        flag = 'COLLSCAN' if finding['collscan'] else ('SLOW-PLAN' if finding['inefficient'] else 'ok')
+        ratio = f"{finding['ratio']:.1f}" if finding['ratio'] is not None else 'n/a'
+        print(f"[{flag}] {finding['command']} {finding['collection']} ({finding['source']})")
+        print(f"    shape: {json.dumps(finding['shape'])} sort: {json.dumps(finding['sort'])}")
+        print(f"    calls: {finding['count']}  avg: {finding['avg_ms']:.2f} ms  plan: {finding['plan']}  "
+              f"examined/returned: {ratio}")
+        for keys, existing in finding['suggestions']:
+            status = f'covered by {format_keys(existing)}' if existing else 'add to utils/indexes.py'
+            print(f'    index {format_keys(keys)}: {status}')
+        if not finding['suggestions']:
+            print('    no index would help (unfiltered query)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--profile', help="JSON written by the app's query profiler")
+    parser.add_argument('--uri', help='MongoDB URI to read system.profile from')
+    parser.add_argument('--db', default=os.environ.get('MONGO_DBNAME', 'event_management'))
+    parser.add_argument('--enable-profiling', action='store_true', help='set the profiling level to 2 and exit')
+    parser.add_argument('--limit', type=int, default=10000, help='system.profile entries to read')
+    parser.add_argument('--ratio', type=float, default=10.0, help='flag docs examined / returned above this')
+    parser.add_argument('--all', action='store_true', help='also list queries that look fine')
+    args = parser.parse_args()
+    if not args.profile and not args.uri:
+        parser.error('pass --profile and/or --uri')
+
+    indexes = registry_indexes()
+    rows = []
+    if args.uri:
+        import pymongo
+        db = pymongo.MongoClient(args.uri, serverSelectionTimeoutMS=5000)[args.db]
+        if args.enable_profiling:
+            db.command('profile', 2)
+            print(f'Profiling enabled on {args.db}; exercise the API, then run again without --enable-profiling')
+            return
+        for collection, keys in live_indexes(db).items():
+            indexes[collection] = indexes.get(collection, []) + keys
+        rows.extend(from_system_profile(db, args.limit))
+    if args.profile:
+        rows.extend(from_profile(args.profile))
+
+    print_findings(analyse(rows, indexes, args.ratio), args.all)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compare concurrency modes under load: concurrent Socket.IO connections and HTTP throughput.
+
+For every mode in --modes the server is started with `gunicorn -c gunicorn.conf.py
+wsgi:application` and ASYNC_MODE set (modes whose packages are not installed are
+skipped), then:
+
+- Socket.IO clients are connected in steps of --step until a connection fails
+  or --max-clients is reached; the number held open at once is reported.
+- --http-threads threads issue GET / for --duration seconds while those sockets
+  stay connected; requests per second and p95 latency are reported.
+
+Pass --url to measure an already running server instead (one mode, no spawn).
+
+Usage: python scripts/load_test.py [--modes threading,eventlet,gevent] [--max-clients 2000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import concurrency  # noqa: E402
+
+
+def start_server(mode, port, workers, startup_timeout):
+    env = dict(os.environ, ASYNC_MODE=mode, PORT=str(port), BIND_HOST='127.0.0.1',
+               WEB_CONCURRENCY=str(workers), GUNICORN_LOG_LEVEL='warning')
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application'],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with code {proc.returncode}')
+        try:
+            requests.get(url + '/', timeout=1)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f'server did not start within {startup_timeout}s')
+
+
+def ramp_sockets(url, max_clients, step, transport):
+    clients = []
+    try:
+        while len(clients) < max_clients:
+            for _ in range(min(step, max_clients - len(clients))):
+                client = socketio.Client(reconnection=False)
+                client.connect(url, transports=[transport], wait_timeout=5)
+                clients.append(client)
+    except Exception as exc:
+        print(f'  connection {len(clients) + 1} failed: {exc}')
+    return clients
+
+
+def http_load(url, threads, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                session.get(url + '/', timeout=10).raise_for_status()
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except requests.RequestException:
+                with lock:
+                    errors[0] += 1
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(threads):
+            pool.submit(worker)
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else 0.0
+    return len(latencies) / duration, p95, errors[0]
+
+
+def measure(url, args):
+    clients = ramp_sockets(url, args.max_clients, args.step, args.transport)
+    try:
+        rps, p95, errors = http_load(url, args.http_threads, args.duration)
+    finally:
+        for client in clients:
+            client.disconnect()
+    return len(clients), rps, p95, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--modes', default=','.join(concurrency.ASYNC_MODES))
+    parser.add_argument('--url', help='measure a running server instead of spawning one per mode')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-clients', type=int, default=2000)
+    parser.add_argument('--step', type=int, default=100)
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default='websocket')
+    parser.add_argument('--http-threads', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--startup-timeout', type=float, default=90.0)
+    args = parser.parse_args()
+
+    results = []
+    if args.url:
+        results.append(('running', *measure(args.url.rstrip('/'), args)))
+    else:
+        for mode in args.modes.split(','):
+            try:
+                concurrency.validate(mode)
+            except RuntimeError as exc:
+                print(f'{mode}: skipped ({exc})')
+                continue
+            print(f'{mode}: starting server')
+            proc, url = start_server(mode, args.port, args.workers, args.startup_timeout)
+            try:
+                results.append((mode, *measure(url, args)))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    print(f"\n{'mode':>10} {'sockets':>8} {'http rps':>9} {'p95 ms':>8} {'errors':>7}")
+    for mode, sockets, rps, p95, errors in results:
+        print(f'{mode:>10} {sockets:>8} {rps:>9.1f} {p95:>8.1f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Move event photo_gallery arrays into the event_photos collection.
+
+Each gallery entry (a bare URL, or {url, width, height, variants}) becomes an
+event_photos document; the migrated entries are then pulled from the event
+and the emptied array removed. Documents are upserted by (event_id, url), so
+the script can be stopped and re-run at any time, e.g. once more after the
+deploy to pick up photos added by servers still running the old code.
+Gallery order is kept: entries get uploaded_at values a millisecond apart
+from the event's created_at or, when the event already has photos (a later
+run), from just after its newest one. Their uploader is not known.
+
+Usage: python scripts/migrate_event_photos.py [--dry-run] [--batch-size 200]
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['INDEX_BOOTSTRAP'] = 'off'
+
+from pymongo import UpdateOne  # noqa: E402
+from app import get_app  # noqa: E402
+from extensions import mongo  # noqa: E402
+from utils.indexes import ensure_indexes  # noqa: E402
+
+
+def photo_documents(event, start=None):
+    start = start or event.get('created_at') or event['_id'].generation_time.replace(tzinfo=None)
+    for position, entry in enumerate(event.get('photo_gallery') or []):
+        if not isinstance(entry, dict):
+            entry = {'url': entry}
+        yield {
+            'event_id': event['_id'],
+            'upload_id': None,
+            'uploaded_by': None,
+            'uploaded_at': start + timedelta(milliseconds=position),
+            'url': entry['url'],
+            'width': entry.get('width'),
+            'height': entry.get('height'),
+            'variants': entry.get('variants', [])
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--dry-run', action='store_true', help='count what would move, change nothing')
+    parser.add_argument('--batch-size', type=int, default=200, help='events read per batch')
+    args = parser.parse_args()
+
+    events_seen = photos_moved = 0
+    with get_app().app_context():
+        db = mongo.db
+        if not args.dry_run:
+            ensure_indexes(db)
+        cursor = db.events.find(
+            {'photo_gallery.0': {'$exists': True}},
+            {'photo_gallery': 1, 'created_at': 1}
+        ).batch_size(args.batch_size)
+        for event in cursor:
+            # Entries pushed since an earlier run are newer than what it moved
+            newest = db.event_photos.find_one({'event_id': event['_id']}, {'uploaded_at': 1},
+                                              sort=[('uploaded_at', -1)])
+            start = newest['uploaded_at'] + timedelta(milliseconds=1) if newest else None
+            photos = list(photo_documents(event, start))
+            events_seen += 1
+            photos_moved += len(photos)
+            if args.dry_run:
+                continue
+            db.event_photos.bulk_write([
+                UpdateOne({'event_id': photo['event_id'], 'url': photo['url']}, {'$setOnInsert': photo}, upsert=True)
+                for photo in photos
+            ], ordered=False)
+            # Only what was copied: entries pushed meanwhile stay for the next run
+            db.events.update_one({'_id': event['_id']}, {'$pullAll': {'photo_gallery': event['photo_gallery']}})
+
+        if not args.dry_run:
+            db.events.update_many({'photo_gallery': {'$size': 0}}, {'$unset': {'photo_gallery': ''}})
+
+    action = 'would move' if args.dry_run else 'moved'
+    print(f'{action} {photos_moved} photos of {events_seen} events to event_photos')
+
+
+if __name__ == '__main__':
+    main()
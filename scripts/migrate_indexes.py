@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Create the MongoDB indexes declared in utils/indexes.py and report index health.
+
+Run on deploy (with INDEX_BOOTSTRAP=off on the web servers) or at any time to
+see which registered indexes are missing, which existing ones are not
+registered and which have not been used since the server started.
+
+Usage: python scripts/migrate_indexes.py [--report-only] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The app must not start its own background build while we migrate
+os.environ['INDEX_BOOTSTRAP'] = 'off'
+
+from app import get_app  # noqa: E402
+from extensions import mongo  # noqa: E402
+from utils.indexes import ensure_indexes, index_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--report-only', action='store_true', help='do not create missing indexes')
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    with get_app().app_context():
+        results = None if args.report_only else ensure_indexes(mongo.db)
+        report = index_report(mongo.db)
+
+    if args.json:
+        print(json.dumps({'results': results, 'report': report}, indent=2))
+    else:
+        for collection, entry in report.items():
+            created = results[collection]['created'] if results else []
+            errors = results[collection]['errors'] if results else {}
+            unused = 'n/a' if entry['unused'] is None else ', '.join(entry['unused']) or '-'
+            print(f'{collection}:')
+            print(f"  created:    {', '.join(created) or '-'}")
+            print(f"  missing:    {', '.join(entry['missing']) or '-'}")
+            print(f"  undeclared: {', '.join(entry['undeclared']) or '-'}")
+            print(f"  mismatched: {', '.join(entry['mismatched']) or '-'}")
+            print(f'  unused:     {unused}')
+            for name, mismatch in (results[collection]['mismatched'] if results else {}).items():
+                for option, values in mismatch.items():
+                    print(f"  differs:    {name}: {option} is {values['existing']}, registry says {values['declared']}")
+            for name, error in errors.items():
+                print(f'  error:      {name}: {error}')
+
+    failed = results and any(r['errors'] for r in results.values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,11 @@
 import os
 import pytest
+from flask import Flask
 
 from app import create_app
 from extensions import mongo
+from utils.file_upload import photo_storage
+from utils.upload_queue import UploadQueue
 
 
 @pytest.fixture(scope='module')
@@ -20,3 +23,53 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+class _Records:
+    """In-memory stand-in for the uploads collection"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def insert_one(self, doc):
+        self.docs[doc['_id']] = dict(doc)
+
+    def update_one(self, query, update):
+        self.docs[query['_id']].update(update['$set'])
+
+    def find_one_and_update(self, query, update, return_document=None):
+        doc = self.docs.get(query['_id'])
+        if doc is None or doc['status'] != query['status']:
+            return None
+        doc.update(update['$set'])
+        return dict(doc)
+
+
+class _Queue(UploadQueue):
+    def __init__(self):
+        super().__init__()
+        self.records = _Records()
+
+    def _collection(self):
+        return self.records
+
+
+@pytest.fixture()
+def upload_app(tmp_path, monkeypatch):
+    """
+    Factory for a bare app storing photos under ``tmp_path`` plus an upload
+    queue recording to memory: ``app, queue = upload_app(**config)``. The
+    global photo_storage backend is restored afterwards.
+    """
+    monkeypatch.setattr(photo_storage, 'backend', photo_storage.backend)
+
+    def make(**config):
+        app = Flask(__name__)
+        app.config.update(UPLOAD_STORAGE='local', UPLOAD_FOLDER=str(tmp_path / 'objects'),
+                          UPLOAD_SPOOL_DIR=str(tmp_path), **config)
+        photo_storage.init_app(app)
+        queue = _Queue()
+        queue.init_app(app)
+        return app, queue
+
+    return make
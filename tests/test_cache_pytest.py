@@ -0,0 +1,38 @@
+import time
+
+from utils.cache import TTLCache
+
+
+def test_ttl_cache_get_set_and_expiry():
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    # Touch 'a' so that 'b' becomes the LRU entry
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_ttl_cache_delete_and_stats():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set('a', 1)
+    cache.delete('a')
+    assert cache.get('a') is None
+
+    stats = cache.stats()
+    assert stats['size'] == 0
+    assert stats['misses'] == 1
@@ -0,0 +1,201 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+import utils.chat_history
+from extensions import mongo
+from utils.chat_history import ChatHistory
+from utils.message_buffer import MessageWriteBuffer
+
+START = datetime(2026, 5, 1, 12, 0)
+
+
+def _message(event_id, n, text=None):
+    return {'_id': ObjectId(), 'event_id': event_id, 'username': 'ann',
+            'text': text or f'm{n}', 'timestamp': START + timedelta(seconds=n)}
+
+
+class _Messages:
+    """messages collection stand-in; ``gate`` holds find() until it is set"""
+
+    def __init__(self, docs=(), gate=None, error=None):
+        self.docs = list(docs)
+        self.gate = gate
+        self.error = error
+        self.finds = 0
+        self.entered = threading.Event()
+
+    def find(self, query, projection):
+        self.finds += 1
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        docs = sorted((d for d in self.docs if d['event_id'] == query['event_id']),
+                      key=lambda d: (d['timestamp'], d['_id']), reverse=True)
+        return SimpleNamespace(sort=lambda spec: SimpleNamespace(limit=lambda n: docs[:n]))
+
+
+def _history(monkeypatch, messages, pending=(), size=50, max_rooms=1000, ttl=300):
+    monkeypatch.setattr(utils.chat_history, 'mongo', SimpleNamespace(db=SimpleNamespace(messages=messages)))
+    monkeypatch.setattr(utils.chat_history, 'message_buffer',
+                        SimpleNamespace(pending_for=lambda event_id: [m for m in pending if m['event_id'] == event_id]))
+    history = ChatHistory()
+    history.size, history.max_rooms, history.ttl = size, max_rooms, ttl
+    return history
+
+
+def _texts(messages):
+    return [m['text'] for m in messages]
+
+
+def test_one_joiner_hydrates_while_the_others_wait(monkeypatch):
+    event_id = ObjectId()
+    gate = threading.Event()
+    messages = _Messages([_message(event_id, n) for n in range(3)], gate=gate)
+    history = _history(monkeypatch, messages)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(history.recent(event_id))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    messages.entered.wait(5)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert messages.finds == 1
+    assert [_texts(r) for r in results] == [['m0', 'm1', 'm2']] * 4
+
+
+def test_messages_sent_during_hydration_are_kept_once(monkeypatch):
+    event_id = ObjectId()
+    gate = threading.Event()
+    flushed = _message(event_id, 1)
+    buffered = _message(event_id, 2)
+    messages = _Messages([_message(event_id, 0), flushed], gate=gate)
+    # Still in the buffer as well as already in the database
+    history = _history(monkeypatch, messages, pending=[flushed, buffered])
+
+    owner = threading.Thread(target=history.recent, args=(event_id,))
+    owner.start()
+    messages.entered.wait(5)
+    # Broadcast while the room loads: one copy is also in the buffer, and a
+    # different message has the same text and timestamp
+    history.append(event_id, buffered)
+    history.append(event_id, _message(event_id, 2))
+    history.append(event_id, _message(event_id, 3))
+    gate.set()
+    owner.join(5)
+
+    assert _texts(history.recent(event_id)) == ['m0', 'm1', 'm2', 'm2', 'm3']
+
+
+def test_history_keeps_the_last_messages_of_a_room(monkeypatch):
+    event_id = ObjectId()
+    history = _history(monkeypatch, _Messages([_message(event_id, n) for n in range(5)]), size=3)
+
+    assert _texts(history.recent(event_id)) == ['m2', 'm3', 'm4']
+    history.append(event_id, _message(event_id, 5))
+    assert _texts(history.recent(event_id)) == ['m3', 'm4', 'm5']
+
+
+def test_least_recently_joined_rooms_are_evicted(monkeypatch):
+    rooms = [ObjectId() for _ in range(3)]
+    messages = _Messages()
+    history = _history(monkeypatch, messages, max_rooms=2)
+
+    history.recent(rooms[0])
+    history.recent(rooms[1])
+    history.recent(rooms[0])
+    history.recent(rooms[2])
+
+    assert history.stats()['rooms'] == 2
+    assert messages.finds == 3
+    history.recent(rooms[0])
+    assert messages.finds == 3
+    history.recent(rooms[1])
+    assert messages.finds == 4
+
+
+def test_rooms_are_reloaded_after_their_ttl(monkeypatch):
+    event_id = ObjectId()
+    messages = _Messages([_message(event_id, 0)])
+    history = _history(monkeypatch, messages, ttl=0)
+
+    history.recent(event_id)
+    # Written by another worker
+    messages.docs.append(_message(event_id, 1))
+
+    assert _texts(history.recent(event_id)) == ['m0', 'm1']
+    assert messages.finds == 2
+
+
+def test_joiners_waiting_on_a_failed_load_get_an_error(monkeypatch):
+    event_id = ObjectId()
+    gate = threading.Event()
+    messages = _Messages(gate=gate, error=RuntimeError('connection reset'))
+    history = _history(monkeypatch, messages)
+    errors = []
+
+    def join():
+        try:
+            history.recent(event_id)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    owner = threading.Thread(target=join)
+    owner.start()
+    messages.entered.wait(5)
+    waiter = threading.Thread(target=join)
+    waiter.start()
+    # Let the waiter reach the room before the load fails
+    time.sleep(0.1)
+    gate.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert sorted(errors) == ['Chat history of event %s is unavailable' % event_id, 'connection reset']
+    # The failed room is not kept: the next joiner loads it again
+    messages.error = None
+    assert history.recent(event_id) == []
+    assert messages.finds == 2
+
+
+class _BlockedInsert:
+    def __init__(self):
+        self.docs = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def insert_many(self, docs, ordered=True):
+        self.entered.set()
+        self.release.wait(5)
+        self.docs.extend(docs)
+
+
+def test_rooms_loaded_during_a_flush_include_the_batch_being_written(monkeypatch):
+    event_id = ObjectId()
+    written = _BlockedInsert()
+    monkeypatch.setattr(mongo, 'db', {'messages': written})
+    buffer = MessageWriteBuffer()
+    monkeypatch.setattr(buffer, '_ensure_started', lambda: None)
+    history = _history(monkeypatch, _Messages([_message(event_id, 0)]))
+    monkeypatch.setattr(utils.chat_history, 'message_buffer', buffer)
+    buffer.add(_message(event_id, 1))
+
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    written.entered.wait(5)
+    # Out of the queue, not in the collection yet
+    recent = history.recent(event_id)
+    written.release.set()
+    flusher.join(5)
+
+    assert _texts(recent) == ['m0', 'm1']
+    assert buffer.pending_for(event_id) == []
@@ -0,0 +1,50 @@
+import time
+
+import utils.coalescer as coalescer
+from utils.coalescer import CounterBroadcaster
+
+
+def make_broadcaster(monkeypatch, interval):
+    emitted = []
+    monkeypatch.setattr(coalescer.socketio, 'emit',
+                        lambda event, payload, to=None: emitted.append((event, payload, to)))
+    broadcaster = CounterBroadcaster('rsvp_update')
+    broadcaster.interval = interval
+    return broadcaster, emitted
+
+
+def test_first_update_is_emitted_immediately(monkeypatch):
+    broadcaster, emitted = make_broadcaster(monkeypatch, interval=0.1)
+    broadcaster.update('e1', 1, 'organizer_1', extra={'event_id': 'e1'})
+
+    assert emitted == [('rsvp_update', {'event_id': 'e1', 'count': 1}, 'organizer_1')]
+
+
+def test_burst_is_coalesced_to_latest_count(monkeypatch):
+    broadcaster, emitted = make_broadcaster(monkeypatch, interval=0.1)
+    for count in range(1, 101):
+        broadcaster.update('e1', count, 'organizer_1', extra={'event_id': 'e1'})
+
+    assert len(emitted) == 1
+    time.sleep(0.2)
+    assert len(emitted) == 2
+    assert emitted[-1][1] == {'event_id': 'e1', 'count': 100}
+    assert broadcaster.stats() == {'pending': 0, 'received_total': 100, 'emitted_total': 2}
+
+
+def test_stale_lower_count_does_not_replace_pending_one(monkeypatch):
+    broadcaster, emitted = make_broadcaster(monkeypatch, interval=0.1)
+    broadcaster.update('e1', 1, 'organizer_1')
+    broadcaster.update('e1', 5, 'organizer_1')
+    broadcaster.update('e1', 4, 'organizer_1')
+
+    time.sleep(0.2)
+    assert [payload['count'] for _, payload, _ in emitted] == [1, 5]
+
+
+def test_events_are_coalesced_independently(monkeypatch):
+    broadcaster, emitted = make_broadcaster(monkeypatch, interval=0.1)
+    broadcaster.update('e1', 1, 'organizer_1')
+    broadcaster.update('e2', 1, 'organizer_2')
+
+    assert [to for _, _, to in emitted] == ['organizer_1', 'organizer_2']
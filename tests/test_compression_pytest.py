@@ -0,0 +1,67 @@
+import gzip
+import json
+
+from flask import Flask, jsonify
+
+from utils.compression import CODECS, ResponseCompressor
+from utils.json_stream import stream_response
+
+
+def _app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    compressor = ResponseCompressor()
+    compressor.init_app(app)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'message': 'ok'})
+
+    @app.route('/large')
+    def large():
+        return jsonify({'events': [{'title': f'Event {n}', 'category': 'Tech'} for n in range(200)]})
+
+    @app.route('/stream')
+    def stream():
+        return stream_response('events', iter([[{'n': n} for n in range(100)], [{'n': 100}]]))
+
+    return app, compressor
+
+
+def test_small_bodies_and_unsupported_encodings_are_sent_as_is():
+    app, compressor = _app()
+    client = app.test_client()
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    response = client.get('/large', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert compressor.stats() == {}
+
+
+def test_best_accepted_encoding_is_chosen_in_server_order():
+    app, compressor = _app(COMPRESS_ALGORITHMS='zstd,br,gzip')
+    client = app.test_client()
+
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == client.get('/large').get_data()
+
+    preferred = next(name for name in ('zstd', 'br', 'gzip') if name in CODECS)
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate, br, zstd'})
+    assert response.headers['Content-Encoding'] == preferred
+
+    # The client's quality values win over the server order
+    assert client.get('/large', headers={'Accept-Encoding': 'br;q=0.5, gzip'}).headers['Content-Encoding'] == 'gzip'
+    assert compressor.stats()['gzip']['responses'] == 2
+
+
+def test_streamed_responses_are_compressed_without_buffering():
+    app, compressor = _app()
+    response = app.test_client().get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.is_streamed
+    assert 'Content-Length' not in response.headers
+    assert len(json.loads(gzip.decompress(response.get_data()))['events']) == 101
+    stats = compressor.stats()['gzip']
+    assert stats['bytes_in'] > stats['bytes_out'] > 0
@@ -0,0 +1,22 @@
+import pytest
+
+import concurrency
+
+
+def test_default_mode_is_threading(monkeypatch):
+    monkeypatch.delenv('ASYNC_MODE', raising=False)
+    assert concurrency.get_async_mode() == 'threading'
+    assert concurrency.gunicorn_worker_class('threading') == 'gthread'
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv('ASYNC_MODE', 'asyncio')
+    with pytest.raises(ValueError):
+        concurrency.get_async_mode()
+
+
+def test_missing_package_is_rejected(monkeypatch):
+    monkeypatch.setattr(concurrency, '_installed', lambda module: False)
+    with pytest.raises(RuntimeError):
+        concurrency.validate('gevent')
+    concurrency.validate('threading')
@@ -0,0 +1,269 @@
+import importlib
+import io
+import random
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+import api.events
+import utils.event_photos
+from utils.event_photos import decode_cursor, delete_event_photos, encode_cursor, photo_page, serialize
+from utils.file_upload import photo_storage
+from utils.response_cache import response_cache
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not doc[field] < condition['$lt']:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class _Photos:
+    """In-memory stand-in for the event_photos collection"""
+
+    def __init__(self, photos=()):
+        self.photos = list(photos)
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return _Cursor([dict(photo) for photo in self.photos if _matches(photo, query)])
+
+    def delete_many(self, query):
+        self.photos = [photo for photo in self.photos if not _matches(photo, query)]
+
+
+def _photos(event_id, count, at=datetime(2026, 5, 1, 12, 0)):
+    # Three photos a millisecond, stored in no particular order
+    photos = [
+        {'_id': ObjectId(), 'event_id': event_id, 'uploaded_at': at + timedelta(milliseconds=n // 3),
+         'url': f'/api/v1/uploads/files/events/e1/{n}.jpg'}
+        for n in range(count)
+    ]
+    random.Random(count).shuffle(photos)
+    return photos
+
+
+@pytest.fixture()
+def photos(monkeypatch):
+    collection = _Photos()
+    monkeypatch.setattr(utils.event_photos, 'mongo', SimpleNamespace(db=SimpleNamespace(event_photos=collection)))
+    return collection
+
+
+def test_cursor_names_the_last_photo_of_a_page():
+    photo = {'_id': ObjectId(), 'uploaded_at': datetime(2026, 5, 1, 12, 30, 15, 123000)}
+
+    cursor = encode_cursor(photo)
+
+    assert decode_cursor(cursor) == (photo['uploaded_at'], photo['_id'])
+    for bad in ('', 'abc', '123_not-an-id', f"-5_{photo['_id']}"):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_photos_are_listed_with_their_uploader_and_variants():
+    uploader = ObjectId()
+    photo = {
+        '_id': ObjectId(),
+        'event_id': ObjectId(),
+        'uploaded_by': uploader,
+        'uploaded_at': datetime(2026, 5, 1, 12, 30),
+        'url': 'https://cdn.example.com/e1/a.jpg',
+        'width': 1200,
+        'height': 800,
+        'variants': [{'url': 'https://cdn.example.com/e1/a.w320.webp', 'width': 320}]
+    }
+
+    body = serialize(photo)
+
+    assert body['photo_id'] == str(photo['_id'])
+    assert body['uploaded_by'] == str(uploader)
+    assert body['uploaded_at'] == '2026-05-01T12:30:00'
+    assert (body['width'], body['height']) == (1200, 800)
+    # Photos migrated from photo_gallery arrays have no known uploader
+    assert serialize(dict(photo, uploaded_by=None))['uploaded_by'] is None
+
+
+def test_pages_follow_uploaded_at_then_id_across_equal_timestamps(photos):
+    event_id = ObjectId()
+    photos.photos = _photos(event_id, 7) + _photos(ObjectId(), 3)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = photo_page(str(event_id), 2, cursor)
+        seen += page
+        pages += 1
+        if cursor is None:
+            break
+
+    expected = sorted((p for p in photos.photos if p['event_id'] == event_id),
+                      key=lambda p: (p['uploaded_at'], p['_id']), reverse=True)
+    assert [p['_id'] for p in seen] == [p['_id'] for p in expected]
+    assert pages == 4
+    # Later pages continue after the last photo, on time then on _id
+    uploaded_at, photo_id = decode_cursor(encode_cursor(seen[1]))
+    assert photos.queries[1]['$or'] == [
+        {'uploaded_at': {'$lt': uploaded_at}},
+        {'uploaded_at': uploaded_at, '_id': {'$lt': photo_id}}
+    ]
+
+
+def test_a_full_last_page_has_no_next_cursor(photos):
+    event_id = ObjectId()
+    photos.photos = _photos(event_id, 4)
+
+    first, cursor = photo_page(str(event_id), 2)
+    last, end = photo_page(str(event_id), 2, cursor)
+
+    assert cursor is not None and end is None
+    assert len(first) == len(last) == 2
+
+
+def test_photo_listing_clamps_the_limit_and_rejects_bad_cursors(app, client, monkeypatch, photos):
+    event_id = ObjectId()
+    photos.photos = _photos(event_id, 8)
+    events = SimpleNamespace(find_one=lambda query, projection=None: {'_id': query['_id']})
+    monkeypatch.setattr(api.events, 'mongo', SimpleNamespace(db=SimpleNamespace(events=events)))
+    monkeypatch.setattr(response_cache, 'enabled', False)
+    monkeypatch.setitem(app.config, 'EVENT_PHOTOS_MAX_PAGE_SIZE', 5)
+
+    def listed(query):
+        response = client.get(f'/api/v1/events/{event_id}/photos{query}')
+        return response.status_code, response.get_json()
+
+    status, body = listed('?limit=500')
+    assert status == 200 and len(body['gallery']) == 5 and body['next_cursor']
+    assert len(listed('?limit=0')[1]['gallery']) == 1
+    assert len(listed('?limit=-3')[1]['gallery']) == 1
+    assert listed('?cursor=not-a-cursor')[0] == 400
+
+
+def test_deleting_an_event_deletes_its_stored_originals_and_variants(tmp_path, upload_app, photos):
+    app, queue = upload_app()
+    event_id = ObjectId()
+    storage = photo_storage.backend
+    keys = ['events/e1/a.jpg', 'events/e1/a.w320.webp', 'events/e1/old.jpg']
+    for key in keys:
+        storage.upload(io.BytesIO(b'photo'), key, 'image/jpeg')
+    photos.photos = [
+        {'_id': ObjectId(), 'event_id': event_id, 'url': storage.url(keys[0]),
+         'variants': [{'url': storage.url(keys[1])}]},
+        {'_id': ObjectId(), 'event_id': ObjectId(), 'url': storage.url('events/e2/b.jpg')}
+    ]
+    # Not migrated yet, and one photo from elsewhere
+    event = {'_id': event_id, 'photo_gallery': [storage.url(keys[2]), 'https://elsewhere.example.com/c.jpg']}
+
+    with app.app_context():
+        assert delete_event_photos(event) == 3
+
+    assert [p['url'] for p in photos.photos] == [storage.url('events/e2/b.jpg')]
+    assert not any((tmp_path / 'objects' / key).exists() for key in keys)
+
+
+@pytest.fixture()
+def migration(monkeypatch):
+    # The script turns index bootstrapping off at import; keep that to this test
+    monkeypatch.setenv('INDEX_BOOTSTRAP', 'off')
+    monkeypatch.delitem(sys.modules, 'scripts.migrate_event_photos', raising=False)
+    return importlib.import_module('scripts.migrate_event_photos')
+
+
+def test_migrated_photos_keep_the_gallery_order(migration):
+    created_at = datetime(2026, 4, 1, 9, 0)
+    event = {'_id': ObjectId(), 'created_at': created_at, 'photo_gallery': [
+        'https://cdn.example.com/1.jpg',
+        {'url': 'https://cdn.example.com/2.jpg', 'width': 800, 'height': 600, 'variants': [{'width': 320}]}
+    ]}
+
+    documents = list(migration.photo_documents(event))
+
+    assert [d['url'] for d in documents] == ['https://cdn.example.com/1.jpg', 'https://cdn.example.com/2.jpg']
+    assert [d['uploaded_at'] - created_at for d in documents] == [timedelta(0), timedelta(milliseconds=1)]
+    assert documents[0]['variants'] == [] and documents[1]['width'] == 800
+    # Newest first on the page means the later gallery entry comes first
+    assert sorted(documents, key=lambda d: d['uploaded_at'], reverse=True)[0]['url'].endswith('2.jpg')
+
+
+class _Events:
+    def __init__(self, events):
+        self.events = {event['_id']: event for event in events}
+
+    def find(self, query, projection):
+        events = [dict(event, photo_gallery=list(event['photo_gallery']))
+                  for event in self.events.values() if event.get('photo_gallery')]
+        return SimpleNamespace(batch_size=lambda size: iter(events))
+
+    def update_one(self, query, update):
+        event = self.events[query['_id']]
+        pulled = update['$pullAll']['photo_gallery']
+        event['photo_gallery'] = [entry for entry in event['photo_gallery'] if entry not in pulled]
+
+    def update_many(self, query, update):
+        for event in self.events.values():
+            if event.get('photo_gallery') == []:
+                del event['photo_gallery']
+
+
+class _MigratedPhotos:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query, projection, sort):
+        photos = [doc for doc in self.docs.values() if doc['event_id'] == query['event_id']]
+        return max(photos, key=lambda doc: doc['uploaded_at'], default=None)
+
+    def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            key = (operation._filter['event_id'], operation._filter['url'])
+            self.docs.setdefault(key, operation._doc['$setOnInsert'])
+
+
+def test_migration_moves_what_it_read_and_can_be_run_again(migration, monkeypatch, capsys):
+    event = {'_id': ObjectId(), 'created_at': datetime(2026, 4, 1), 'photo_gallery': ['a.jpg', 'b.jpg']}
+    events, event_photos = _Events([event]), _MigratedPhotos()
+    monkeypatch.setattr(migration, 'mongo', SimpleNamespace(db=SimpleNamespace(events=events, event_photos=event_photos)))
+    monkeypatch.setattr(migration, 'get_app', lambda: Flask(__name__))
+    monkeypatch.setattr(migration, 'ensure_indexes', lambda db: None)
+    monkeypatch.setattr(sys, 'argv', ['migrate_event_photos.py'])
+
+    migration.main()
+    assert 'photo_gallery' not in event
+    assert sorted(url for _, url in event_photos.docs) == ['a.jpg', 'b.jpg']
+
+    # Photos added by an old server after the first run are picked up as the
+    # newest; nothing is copied twice
+    event['photo_gallery'] = ['c.jpg', 'd.jpg']
+    migration.main()
+    assert 'photo_gallery' not in event
+    newest_first = sorted(event_photos.docs.values(), key=lambda doc: doc['uploaded_at'], reverse=True)
+    assert [doc['url'] for doc in newest_first] == ['d.jpg', 'c.jpg', 'b.jpg', 'a.jpg']
+    assert capsys.readouterr().out.splitlines()[-1] == 'moved 2 photos of 1 events to event_photos'
@@ -0,0 +1,123 @@
+import os
+from types import SimpleNamespace
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+import api.health
+import auth_routes
+import utils.db_probe
+from utils.db_probe import DatabaseProbe
+
+
+class FakeAdmin:
+    def __init__(self):
+        self.pings = 0
+        self.fail = False
+
+    def command(self, name):
+        self.pings += 1
+        if self.fail:
+            raise ConnectionError('no primary')
+        return {'ok': 1}
+
+
+def _probe(monkeypatch, admin, interval=10):
+    monkeypatch.setattr(utils.db_probe, 'mongo', SimpleNamespace(client=SimpleNamespace(admin=admin)))
+    probe = DatabaseProbe()
+    probe.interval = interval
+    probe._pid = os.getpid()  # no background thread; probes are driven by the test
+    return probe
+
+
+def test_status_is_served_from_the_last_probe(monkeypatch):
+    admin = FakeAdmin()
+    probe = _probe(monkeypatch, admin)
+    assert probe.status()['status'] == 'unknown'
+
+    probe.probe()
+    for _ in range(5):
+        assert probe.status()['status'] == 'ok'
+    assert admin.pings == 1
+
+    admin.fail = True
+    probe.probe()
+    status = probe.status()
+    assert status['status'] == 'unavailable'
+    assert status['consecutive_failures'] == 1
+    assert 'no primary' in status['error']
+
+
+def test_old_result_is_stale(monkeypatch):
+    probe = _probe(monkeypatch, FakeAdmin(), interval=1)
+    probe.probe()
+    probe.checked_at -= 5
+
+    status = probe.status()
+    assert status['stale'] is True
+    assert status['status'] == 'unavailable'
+
+
+def test_live_does_no_io(client, monkeypatch):
+    monkeypatch.setattr(api.health.db_probe, 'status', lambda **kwargs: 1 / 0)
+    response = client.get('/api/v1/health/live')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alive'
+
+
+def test_ready_reports_database_and_pool_saturation(client, monkeypatch):
+    monkeypatch.setattr(api.health.db_probe, 'status', lambda **kwargs: {'status': 'ok'})
+    pool = {'checked_out': 10, 'max_pool_size': 50, 'checkout_failures': {}}
+    monkeypatch.setattr(api.health.mongo, 'pool_stats', lambda: pool)
+
+    response = client.get('/api/v1/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()['checks']['pool']['saturation'] == 0.2
+
+    pool['checked_out'] = 50
+    monkeypatch.setattr(api.health.db_probe, 'status', lambda **kwargs: {'status': 'unavailable'})
+    response = client.get('/api/v1/health/ready')
+    body = response.get_json()
+    assert response.status_code == 503
+    assert body['status'] == 'not_ready'
+    assert body['reasons'] == ['database unavailable', 'connection pool 100% in use']
+
+
+def test_database_is_unavailable_once_a_probe_fails(monkeypatch):
+    admin = FakeAdmin()
+    probe = _probe(monkeypatch, admin)
+    utils.db_probe.mongo.db = SimpleNamespace()
+    # Not known yet: requests go ahead
+    assert probe.available()
+
+    admin.fail = True
+    probe.probe()
+    assert not probe.available()
+    utils.db_probe.mongo.db = None
+    admin.fail = False
+    probe.probe()
+    assert not probe.available()
+
+
+def test_requests_answer_503_while_the_database_is_down(client, monkeypatch):
+    monkeypatch.setattr(utils.db_probe.db_probe, 'available', lambda: False)
+
+    for path in ('/api/v1/auth/register', '/api/v1/auth/login'):
+        response = client.post(path, json={'username': 'ann', 'email': 'ann@example.com', 'password': 'pw'})
+        assert response.status_code == 503
+        assert response.get_json()['message'] == 'Database connection not available'
+    # The listing falls back to sample events
+    response = client.get('/api/v1/events?search=outage')
+    assert response.status_code == 200
+    assert [e['event_id'] for e in response.get_json()['events']] == ['sample1', 'sample2']
+
+
+def test_a_database_lost_since_the_last_probe_also_answers_503(client, monkeypatch):
+    def find_one(*args, **kwargs):
+        raise ServerSelectionTimeoutError('no servers')
+
+    monkeypatch.setattr(utils.db_probe.db_probe, 'available', lambda: True)
+    monkeypatch.setattr(auth_routes, 'mongo', SimpleNamespace(db=SimpleNamespace(users=SimpleNamespace(find_one=find_one))))
+
+    for path in ('/api/v1/auth/register', '/api/v1/auth/login'):
+        response = client.post(path, json={'username': 'ann', 'email': 'ann@example.com', 'password': 'pw'})
+        assert response.status_code == 503
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+from bson import ObjectId
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from utils.image_variants import ImageProcessor
+
+
+def _jpeg(size=(1200, 800), orientation=None):
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    if orientation:
+        exif[0x0112] = orientation
+    out = io.BytesIO()
+    image.save(out, 'JPEG', exif=exif.tobytes())
+    return out.getvalue()
+
+
+@pytest.fixture()
+def setup(upload_app):
+    app, queue = upload_app(IMAGE_VARIANT_FORMATS='webp', IMAGE_VARIANT_WIDTHS='320,640,1280', IMAGE_THUMBNAIL_SIZE=100)
+    processor = ImageProcessor()
+    processor.init_app(app)
+    return app, queue, processor
+
+
+def test_variants_are_made_per_width_below_the_original(tmp_path, setup):
+    app, queue, processor = setup
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(_jpeg())
+
+    derived = processor.process({'_id': ObjectId(), 'key': 'events/e1/photo.jpg'}, str(path))
+
+    assert (derived['width'], derived['height']) == (1200, 800)
+    sizes = [(v['width'], v['height'], v['thumbnail']) for v in derived['variants']]
+    # No upscaled 1280 copy of a 1200px photo
+    assert sizes == [(100, 100, True), (320, 213, False), (640, 427, False)]
+    assert derived['variants'][1]['url'] == '/api/v1/uploads/files/events/e1/photo.w320.webp'
+    with Image.open(tmp_path / 'objects' / 'events' / 'e1' / 'photo.w320.webp') as stored:
+        assert stored.format == 'WEBP'
+        assert not stored.getexif()
+
+
+def test_exif_orientation_is_applied_before_resizing(tmp_path, setup):
+    app, queue, processor = setup
+    path = tmp_path / 'photo.jpg'
+    # Stored landscape, shown portrait
+    path.write_bytes(_jpeg(orientation=6))
+
+    original, variants = processor.render(str(path))
+
+    assert original == (800, 1200)
+    assert [(width, height) for name, fmt, data, width, height in variants] == [(100, 100), (320, 480), (640, 960)]
+
+
+def test_undecodable_photos_keep_only_their_original(setup):
+    app, queue, processor = setup
+    photo = FileStorage(io.BytesIO(b'not an image'), filename='photo.jpg', content_type='image/jpeg')
+
+    with app.app_context():
+        upload = queue.submit(photo, 'events/e1', 'event_photo', str(ObjectId()), process=processor.process)
+        queue.wait(upload['_id'], timeout=5)
+
+    record = queue.records.docs[upload['_id']]
+    assert record['status'] == 'done'
+    assert record['variants'] == []
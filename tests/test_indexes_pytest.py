@@ -0,0 +1,86 @@
+from flask import Flask
+from pymongo import IndexModel
+
+import utils.indexes
+from extensions import mongo
+from utils.indexes import INDEXES, bootstrap_indexes, ensure_indexes, index_report
+
+
+class FakeCollection:
+    def __init__(self, ops=None):
+        self.indexes = [{'name': '_id_', 'key': {'_id': 1}}]
+        self.ops = ops or {}
+
+    def list_indexes(self):
+        return list(self.indexes)
+
+    def create_indexes(self, models):
+        for model in models:
+            self.indexes.append(dict(model.document, key=dict(model.document['key'])))
+
+    def aggregate(self, pipeline):
+        return [{'name': index['name'], 'accesses': {'ops': self.ops.get(index['name'], 0)}}
+                for index in self.indexes]
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def test_ensure_indexes_creates_only_missing():
+    db = FakeDB()
+    db['users'].create_indexes([IndexModel([('email', 1)], unique=True)])
+
+    results = ensure_indexes(db)
+
+    assert 'email_1' not in results['users']['created']
+    assert 'username_1' in results['users']['created']
+    assert all(not r['errors'] for r in results.values())
+    assert ensure_indexes(db)['users']['created'] == []
+    assert len(db['messages'].indexes) == 1 + len(INDEXES['messages'])
+
+
+def test_report_lists_missing_undeclared_and_unused():
+    db = FakeDB()
+    db['events'] = FakeCollection(ops={'location_2dsphere': 12})
+    db['events'].create_indexes([IndexModel([('location', '2dsphere')]), IndexModel([('title', 1)])])
+
+    report = index_report(db)['events']
+
+    assert report['missing'] == ['date_1', 'organizer_id_1_date_1']
+    assert report['undeclared'] == ['title_1']
+    assert report['unused'] == ['title_1']
+
+
+def test_indexes_with_other_options_are_reported_not_rebuilt():
+    db = FakeDB()
+    # Created before the registry made it unique, and with a longer TTL
+    db['users'].create_indexes([IndexModel([('email', 1)])])
+    db['uploads'].create_indexes([IndexModel([('created_at', 1)], expireAfterSeconds=30 * 24 * 3600)])
+
+    results = ensure_indexes(db)
+
+    assert results['users']['mismatched'] == {'email_1': {'unique': {'existing': False, 'declared': True}}}
+    assert results['uploads']['mismatched']['created_at_1'] == {
+        'expireAfterSeconds': {'existing': 30 * 24 * 3600, 'declared': 7 * 24 * 3600}
+    }
+    assert 'email_1' not in results['users']['created']
+    assert results['events']['mismatched'] == {}
+    assert index_report(db)['users']['mismatched'] == ['email_1']
+    assert index_report(db)['events']['mismatched'] == []
+
+
+def test_bootstrap_runs_once_per_process(monkeypatch):
+    monkeypatch.setattr(utils.indexes, '_bootstrap_pid', None)
+    db = FakeDB()
+    monkeypatch.setitem(mongo.__dict__, 'db', db)
+    app = Flask(__name__)
+    app.config.update(INDEX_BOOTSTRAP='background', INDEX_BOOTSTRAP_RETRY_SECONDS=0)
+
+    thread = bootstrap_indexes(app)
+    assert bootstrap_indexes(Flask(__name__)) is thread
+    thread.join(5)
+
+    assert len(db['messages'].indexes) == 1 + len(INDEXES['messages'])
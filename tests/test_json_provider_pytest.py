@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Flask, jsonify
+
+import utils.json_provider as json_provider
+from utils.json_provider import BSONJSONProvider
+
+OID = ObjectId('64f0c2a1e4b0a1b2c3d4e5f6')
+DOC = {'_id': OID, 'date': datetime(2026, 1, 1, 10, 0, 0, 5), 'rsvps': [OID], 'tags': {'a'}}
+EXPECTED = ('{"_id":"64f0c2a1e4b0a1b2c3d4e5f6","date":"2026-01-01T10:00:00.000005",'
+            '"rsvps":["64f0c2a1e4b0a1b2c3d4e5f6"],"tags":["a"]}\n')
+
+
+def _app():
+    app = Flask(__name__)
+    app.json = BSONJSONProvider(app)
+
+    @app.route('/doc')
+    def doc():
+        return jsonify(DOC)
+
+    return app
+
+
+def test_mongo_documents_are_encoded_as_is():
+    assert _app().test_client().get('/doc').get_data(as_text=True) == EXPECTED
+
+
+def test_standard_library_fallback_produces_the_same_json(monkeypatch):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert _app().test_client().get('/doc').get_data(as_text=True) == EXPECTED
+
+
+def test_values_orjson_rejects_fall_back_and_loads_round_trips():
+    app = _app()
+    with app.app_context():
+        assert app.json.dumps({'n': 2 ** 70}) == '{"n": 1180591620717411303424}'
+        assert app.json.loads(b'{"a": [1, "x"]}') == {'a': [1, 'x']}
@@ -0,0 +1,83 @@
+import pytest
+from flask import Flask, jsonify
+
+from utils.json_provider import BSONJSONProvider
+from utils.json_stream import json_array_response, json_shape
+
+
+def _app():
+    app = Flask(__name__)
+    app.json = BSONJSONProvider(app)
+    return app
+
+
+def test_streamed_body_matches_jsonify():
+    app = _app()
+    batches = [[{'b': 1, 'a': 'x'}], [], [{'a': 'y'}, {'a': 'z'}]]
+    with app.app_context():
+        expected = jsonify({'events': [doc for batch in batches for doc in batch]}).get_data()
+        streamed = json_array_response('events', iter(batches))
+        assert streamed.is_streamed
+        assert streamed.get_data() == expected
+        assert json_array_response('events', iter([])).get_data() == b'{"events":[]}\n'
+
+
+def test_query_errors_surface_before_the_response_starts():
+    def batches():
+        raise RuntimeError('server selection timeout')
+        yield []
+
+    with _app().app_context(), pytest.raises(RuntimeError):
+        json_array_response('events', batches())
+
+
+def test_json_shape_renames_id_and_converts_fields_on_the_server():
+    stages = json_shape(id_field='event_id', strings=('organizer_id',), string_lists=('rsvps',), dates=('date',))
+    fields = stages[0]['$addFields']
+    assert fields['event_id']['$cond'][2] == {'$toString': '$_id'}
+    assert fields['organizer_id']['$cond'][2] == {'$toString': '$organizer_id'}
+    assert fields['rsvps']['$cond'][2]['$map'] == {'input': '$rsvps', 'in': {'$toString': '$$this'}}
+    assert fields['date']['$cond'][1] == '$date'
+    assert stages[1] == {'$project': {'_id': 0}}
+
+
+def test_json_shape_leaves_missing_fields_out_like_the_document_path():
+    fields = json_shape(strings=('organizer_id',), string_lists=('rsvps',))[0]['$addFields']
+
+    # An event without organizer_id or rsvps gets no key rather than null;
+    # an explicit null still converts (to null)
+    for field in ('organizer_id', 'rsvps'):
+        condition, missing, present = fields[field]['$cond']
+        assert condition == {'$eq': [{'$type': f'${field}'}, 'missing']}
+        assert missing == '$$REMOVE'
+        assert present != '$$REMOVE'
+
+
+def test_ndjson_is_negotiated_from_accept():
+    from utils.json_stream import stream_response
+
+    app = _app()
+
+    @app.route('/events')
+    def events():
+        return stream_response('events', iter([[{'a': 1}, {'a': 2}], [{'a': 3}]]))
+
+    client = app.test_client()
+    response = client.get('/events', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.get_data() == b'{"a":1}\n{"a":2}\n{"a":3}\n'
+    assert client.get('/events', headers={'Accept': 'application/json'}).get_json() == {'events': [{'a': 1}, {'a': 2}, {'a': 3}]}
+
+
+def test_document_batches_rename_ids_and_set_the_cursor_batch_size():
+    from utils.json_stream import document_batches
+
+    class Cursor(list):
+        def batch_size(self, size):
+            self.size = size
+            return self
+
+    cursor = Cursor({'_id': n} for n in range(5))
+    batches = list(document_batches(cursor, 2, id_field='event_id'))
+    assert cursor.size == 2
+    assert batches == [[{'event_id': 0}, {'event_id': 1}], [{'event_id': 2}, {'event_id': 3}], [{'event_id': 4}]]
@@ -0,0 +1,70 @@
+from bson import ObjectId
+
+from extensions import mongo
+from utils.message_buffer import MessageWriteBuffer
+
+
+class FlakyCollection:
+    """Collection double whose first ``failures`` insert_many calls raise"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.docs = []
+        self.calls = 0
+
+    def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('database unreachable')
+        self.docs.extend(docs)
+
+
+def make_buffer(monkeypatch, collection):
+    monkeypatch.setattr(mongo, 'db', {'messages': collection})
+    buf = MessageWriteBuffer()
+    # Keep the flush under test control instead of the background thread
+    monkeypatch.setattr(buf, '_ensure_started', lambda: None)
+    return buf
+
+
+def test_messages_are_written_in_one_batch(monkeypatch):
+    collection = FlakyCollection()
+    buf = make_buffer(monkeypatch, collection)
+    event_id = ObjectId()
+    for i in range(5):
+        buf.add({'event_id': event_id, 'text': str(i)})
+
+    assert buf.depth == 5
+    assert buf.flush() == 5
+    assert collection.calls == 1
+    assert [d['text'] for d in collection.docs] == ['0', '1', '2', '3', '4']
+    assert buf.stats()['depth'] == 0
+
+
+def test_failed_flush_keeps_messages_in_order(monkeypatch):
+    collection = FlakyCollection(failures=1)
+    buf = make_buffer(monkeypatch, collection)
+    event_id = ObjectId()
+    buf.add({'event_id': event_id, 'text': 'a'})
+    buf.add({'event_id': event_id, 'text': 'b'})
+
+    assert buf.flush() == 0
+    buf.add({'event_id': event_id, 'text': 'c'})
+    assert [m['text'] for m in buf.pending_for(event_id)] == ['a', 'b', 'c']
+
+    assert buf.flush() == 3
+    assert [d['text'] for d in collection.docs] == ['a', 'b', 'c']
+    assert buf.stats()['failed_flushes'] == 1
+
+
+def test_discarded_event_messages_are_not_written(monkeypatch):
+    collection = FlakyCollection()
+    buf = make_buffer(monkeypatch, collection)
+    keep, drop = ObjectId(), ObjectId()
+    buf.add({'event_id': keep, 'text': 'keep'})
+    buf.add({'event_id': drop, 'text': 'drop'})
+
+    buf.discard_event(drop)
+    buf.flush()
+    assert [d['text'] for d in collection.docs] == ['keep']
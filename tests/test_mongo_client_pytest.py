@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pymongo
+from pymongo.read_preferences import PrimaryPreferred
+
+from config import Config
+from utils.mongo_client import PoolMetrics, available_compressors, mongo_client_options, write_concern_for
+
+
+def config(**overrides):
+    values = {k: getattr(Config, k) for k in dir(Config) if k.startswith('MONGO_')}
+    values.update(overrides)
+    return values
+
+
+def test_client_options_follow_config():
+    options = mongo_client_options(config(MONGO_MAX_POOL_SIZE=7, MONGO_MIN_POOL_SIZE=2,
+                                          MONGO_READ_PREFERENCE='primaryPreferred',
+                                          MONGO_COMPRESSORS='lz4,zlib'))
+    assert options['maxPoolSize'] == 7
+    assert options['minPoolSize'] == 2
+    assert options['compressors'] == 'zlib'
+    assert isinstance(options['read_preference'], PrimaryPreferred)
+
+    client = pymongo.MongoClient('mongodb://localhost:27017', connect=False, **options)
+    assert client.options.pool_options.max_pool_size == 7
+    client.close()
+
+
+def test_unavailable_compressors_are_skipped(monkeypatch):
+    monkeypatch.setattr('importlib.util.find_spec', lambda name: None)
+    assert available_compressors('zstd,snappy,zlib') == ['zlib']
+
+
+def test_write_concern_per_class():
+    cfg = config()
+    assert write_concern_for(cfg, 'critical').document == {'w': 'majority', 'j': True, 'wtimeout': 5000}
+    assert write_concern_for(cfg, 'bulk').document == {'w': 1, 'j': False}
+
+
+def test_pool_metrics_track_checkouts_and_wait():
+    metrics = PoolMetrics()
+    event = SimpleNamespace(address=('db', 27017), connection_id=1, duration=0.004)
+    metrics.connection_created(event)
+    metrics.connection_checked_out(event)
+    assert metrics.stats()['checked_out'] == 1
+    metrics.connection_checked_in(event)
+
+    stats = metrics.stats()
+    assert stats['checked_out'] == 0
+    assert stats['max_checked_out'] == 1
+    assert stats['checkouts_total'] == 1
+    assert stats['max_wait_ms'] == 4.0
+
+
+def test_client_is_created_lazily_once_per_process():
+    from flask import Flask
+    from extensions import _MongoWrapper
+
+    app = Flask(__name__)
+    app.config.update(config(MONGO_URI='mongodb://127.0.0.1:1', MONGO_DBNAME='lazy_test'))
+    wrapper = _MongoWrapper()
+    wrapper.init_app(app)
+    assert 'client' not in wrapper.__dict__
+
+    db = wrapper.db
+    assert db.name == 'lazy_test'
+    assert wrapper.db is db
+    assert wrapper.db_for('critical').write_concern.document['w'] == 'majority'
+
+    wrapper._after_fork()
+    assert 'client' not in wrapper.__dict__
+    assert wrapper.db is not db
+    wrapper.reset()
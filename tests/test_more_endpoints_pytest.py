@@ -84,19 +84,21 @@ def test_location_share_update_delete_and_photos(client, monkeypatch):
     assert r_photos.status_code == 200
     before_photos = r_photos.get_json().get('photos', [])
 
-    # Monkeypatch cloud upload to return a dummy URL
-    def fake_upload(file_obj, ev_id):
-        return 'http://example.com/fake.jpg'
-
-    monkeypatch.setattr('api.events.upload_photo_to_cloud', fake_upload)
-
-    # Upload a photo as attendee (must be attendee or organizer)
+    # Upload a photo as attendee (must be attendee or organizer); the testing
+    # config stores it with the local storage stand-in
     data = {'photo': (io.BytesIO(b'testdata'), 'test.jpg')}
     r_upload = client.post(f'/api/v1/events/{event_id}/photos', data=data, headers=headers_att, content_type='multipart/form-data')
-    assert r_upload.status_code == 201
+    assert r_upload.status_code == 202
     body = r_upload.get_json()
     assert 'photo_url' in body
 
+    # The upload finishes in the background
+    from utils.upload_queue import upload_queue
+    upload_queue.wait(body['upload_id'], timeout=10)
+    r_status = client.get(f"/api/v1/uploads/{body['upload_id']}", headers=headers_att)
+    assert r_status.status_code == 200
+    assert r_status.get_json()['status'] == 'done'
+
     # Verify photo appears in GET
     r_photos2 = client.get(f'/api/v1/events/{event_id}/photos')
     assert r_photos2.status_code == 200
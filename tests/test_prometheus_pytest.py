@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from utils.metrics import HistogramFamily
+from utils.prometheus import _Writer, socket_room_stats
+
+
+def test_histogram_buckets_are_cumulative_and_scaled_to_seconds():
+    family = HistogramFamily(buckets=(10, 100))
+    for value in (5, 50, 50, 500):
+        family.labels('events', 'events.get_events').observe(value)
+
+    out = _Writer()
+    out.histogram('http_request_duration_seconds', 'Latency.', family, ('blueprint', 'route'), 0.001)
+
+    labels = 'blueprint="events",route="events.get_events"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.01"}} 1' in out.lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 3' in out.lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in out.lines
+    assert f'http_request_duration_seconds_sum{{{labels}}} 0.605000' in out.lines
+    assert f'http_request_duration_seconds_count{{{labels}}} 4' in out.lines
+
+
+def test_label_values_are_escaped():
+    out = _Writer()
+    out.sample('socketio_emits_total', 1, ('event',), ('say "hi"\\\n',))
+    assert out.lines == ['socketio_emits_total{event="say \\"hi\\"\\\\\\n"} 1']
+
+
+def test_socket_rooms_grouped_by_kind_without_private_sid_rooms():
+    rooms = {'/': {
+        None: {'sid1': 'eio1', 'sid2': 'eio2', 'sid3': 'eio3'},
+        'sid1': {'sid1': 'eio1'}, 'sid2': {'sid2': 'eio2'}, 'sid3': {'sid3': 'eio3'},
+        'user_42': {'sid1': 'eio1'},
+        'organizer_7': {'sid2': 'eio2'},
+        'geo_u4pru': {'sid1': 'eio1', 'sid3': 'eio3'},
+        '64f0c2a1e4b0a1b2c3d4e5f6': {'sid1': 'eio1', 'sid2': 'eio2', 'sid3': 'eio3'}
+    }}
+    server = SimpleNamespace(manager=SimpleNamespace(rooms=rooms))
+
+    connected, kinds = socket_room_stats(server)
+
+    assert connected == 3
+    assert kinds == {'user': (1, 1, 1), 'organizer': (1, 1, 1), 'geo': (1, 2, 2), 'event': (1, 3, 3)}
+
+
+def test_metrics_endpoint_serves_text_exposition(client):
+    client.get('/api/v1/metrics/routes')
+    response = client.get('/api/v1/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{blueprint="metrics",route="metrics.route_metrics",method="GET",status="200"}' in body
+    assert 'socketio_connected_clients ' in body
+    assert 'message_buffer_depth ' in body
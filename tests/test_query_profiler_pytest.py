@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from flask import Flask
+
+from utils.query_profiler import QueryProfiler, command_shape, suggest_index, summarize_explain
+
+
+def test_shape_and_suggestion_follow_equality_sort_range():
+    command = {
+        'find': 'events',
+        'filter': {'organizer_id': 'abc', 'date': {'$gte': '2025-01-01'}},
+        'sort': {'title': 1},
+        '$db': 'event_management'
+    }
+    collection, shape, sort = command_shape('find', command)
+
+    assert collection == 'events'
+    assert shape == {'organizer_id': 'eq', 'date': 'range'}
+    assert suggest_index(shape, sort) == [[('organizer_id', 1), ('title', 1), ('date', 1)]]
+
+
+def test_or_branches_get_one_suggestion():
+    shape = {'$or': [{'sender_id': 'eq', 'receiver_id': 'eq'}, {'sender_id': 'eq', 'receiver_id': 'eq'}]}
+    assert suggest_index(shape, {'timestamp': 1}) == [[('sender_id', 1), ('receiver_id', 1), ('timestamp', 1)]]
+
+
+def test_explain_summary_detects_collection_scan():
+    explain = {
+        'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}},
+        'executionStats': {'nReturned': 2, 'totalDocsExamined': 500, 'totalKeysExamined': 0}
+    }
+    summary = summarize_explain(explain)
+    assert summary['collscan'] is True
+    assert summary['docs_examined'] == 500
+
+
+def test_profiler_records_per_endpoint(monkeypatch):
+    profiler = QueryProfiler()
+    monkeypatch.setattr(profiler, '_queue_explain', lambda *args: None)
+    app = Flask(__name__)
+    app.add_url_rule('/events', endpoint='events.get_events', view_func=lambda: '')
+
+    with app.test_request_context('/events'):
+        for request_id in (1, 2):
+            profiler.started(SimpleNamespace(
+                command_name='find', request_id=request_id, database_name='db',
+                command={'find': 'events', 'filter': {'organizer_id': 'x'}, 'sort': {'date': 1}}))
+            profiler.succeeded(SimpleNamespace(
+                command_name='find', request_id=request_id, duration_micros=2500,
+                reply={'cursor': {'firstBatch': [{}, {}, {}]}}))
+
+    [row] = profiler.report()
+    assert row['endpoint'] == 'events.get_events'
+    assert row['count'] == 2
+    assert row['avg_ms'] == 2.5
+    assert row['avg_returned'] == 3
@@ -0,0 +1,78 @@
+import time
+from types import SimpleNamespace
+
+from flask import Flask, Response, stream_with_context
+
+from utils.metrics import Histogram
+from utils.request_metrics import RequestMetrics
+
+
+def test_histogram_percentiles_within_bucket_resolution():
+    histogram = Histogram(buckets=(10, 20, 50, 100))
+    for value in range(1, 101):
+        histogram.observe(value)
+
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert 45 <= summary['p50'] <= 55
+    assert 90 <= summary['p95'] <= 100
+    assert summary['max'] == 100
+
+
+def test_db_round_trips_are_reported_per_request():
+    metrics = RequestMetrics()
+    app = Flask(__name__)
+    app.before_request(metrics._before_request)
+    app.after_request(metrics._after_request)
+
+    @app.route('/feedbacks')
+    def feedbacks():
+        for _ in range(3):
+            metrics.succeeded(SimpleNamespace(duration_micros=2000, reply={'ok': 1}))
+        return 'ok'
+
+    response = app.test_client().get('/feedbacks')
+
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=6.00;desc="3 queries"')
+    assert 'total;dur=' in timing
+    report = metrics.report()['feedbacks']
+    assert report['db_calls']['count'] == 1
+    assert report['db_calls']['max'] == 3
+    assert report['db_ms']['max'] == 6.0
+
+
+def test_streamed_bodies_are_timed_until_sent():
+    metrics = RequestMetrics()
+    app = Flask(__name__)
+    app.before_request(metrics._before_request)
+    app.after_request(metrics._after_request)
+
+    @app.route('/export')
+    def export():
+        def rows():
+            for row in range(3):
+                metrics.succeeded(SimpleNamespace(duration_micros=1000, reply={'ok': 1}))
+                time.sleep(0.02)
+                yield f'{row}\n'
+        return Response(stream_with_context(rows()))
+
+    response = app.test_client().get('/export', buffered=False)
+
+    # Nothing has run yet: the header only covers the handler
+    assert response.headers['Server-Timing'].startswith('db;dur=0.00;desc="0 queries"')
+    assert metrics.report() == {}
+
+    assert response.get_data(as_text=True) == '0\n1\n2\n'
+    response.close()
+
+    report = metrics.report()['export']
+    assert report['db_calls']['max'] == 3
+    assert report['db_ms']['max'] == 3.0
+    assert report['latency_ms']['max'] >= 60
+
+
+def test_commands_outside_requests_are_ignored():
+    metrics = RequestMetrics()
+    metrics.succeeded(SimpleNamespace(duration_micros=1000, reply={'ok': 1}))
+    assert metrics.report() == {}
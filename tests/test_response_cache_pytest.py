@@ -0,0 +1,154 @@
+import json
+import threading
+
+from flask import Flask, jsonify
+
+from utils.response_cache import ResponseCache
+
+
+def _app():
+    cache = ResponseCache()
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/events/<event_id>/photos')
+    @cache.cached('event:{event_id}')
+    def photos(event_id):
+        calls.append(event_id)
+        if event_id == 'missing':
+            return jsonify({'message': 'Event not found'}), 404
+        return jsonify({'photos': [f'{event_id}-{len(calls)}.jpg']})
+
+    return app, cache, calls
+
+
+def test_responses_are_cached_per_url_and_normalized_query():
+    app, cache, calls = _app()
+    client = app.test_client()
+
+    first = client.get('/events/a/photos?b=2&a=1')
+    second = client.get('/events/a/photos?a=1&b=2')
+    other = client.get('/events/b/photos')
+
+    assert calls == ['a', 'b']
+    assert first.get_json() == second.get_json()
+    assert first.headers['ETag'] == second.headers['ETag'] != other.headers['ETag']
+    assert cache.stats()['hits'] == 1
+
+
+def test_if_none_match_gets_304_including_compressed_validators():
+    app, cache, _ = _app()
+    client = app.test_client()
+    etag = client.get('/events/a/photos').headers['ETag']
+
+    response = client.get('/events/a/photos', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    gzip_etag = etag[:-1] + ':gzip"'
+    response = client.get('/events/a/photos', headers={'If-None-Match': gzip_etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == gzip_etag
+
+    assert client.get('/events/a/photos', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_invalidate_only_affects_tagged_entries():
+    app, cache, calls = _app()
+    client = app.test_client()
+    etag = client.get('/events/a/photos').headers['ETag']
+    client.get('/events/b/photos')
+
+    cache.invalidate('event:a')
+
+    response = client.get('/events/a/photos', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json() == {'photos': ['a-3.jpg']}
+    client.get('/events/b/photos')
+    assert calls == ['a', 'b', 'a']
+
+
+def test_errors_are_not_cached():
+    app, _, calls = _app()
+    client = app.test_client()
+    assert client.get('/events/missing/photos').status_code == 404
+    assert client.get('/events/missing/photos').status_code == 404
+    assert calls == ['missing', 'missing']
+
+
+def test_streamed_responses_are_stored_once_sent_per_format():
+    from utils.json_stream import stream_response
+
+    cache = ResponseCache()
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/events')
+    @cache.cached('events')
+    def events():
+        calls.append(1)
+        return stream_response('events', iter([[{'n': 1}], [{'n': 2}]]))
+
+    client = app.test_client()
+    first = client.get('/events')
+    assert 'ETag' not in first.headers
+    assert first.get_json() == {'events': [{'n': 1}, {'n': 2}]}
+
+    second = client.get('/events')
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag']
+    assert 'Accept' in second.headers['Vary']
+
+    ndjson = client.get('/events', headers={'Accept': 'application/x-ndjson'})
+    assert ndjson.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in ndjson.get_data().splitlines()] == [{'n': 1}, {'n': 2}]
+    assert len(calls) == 2
+
+
+def test_cached_bodies_are_compressed_once_per_encoding(monkeypatch):
+    from utils.compression import response_compressor
+
+    cache = ResponseCache()
+    app = Flask(__name__)
+    response_compressor.init_app(app)
+    calls = []
+    compress = response_compressor.compress
+    monkeypatch.setattr(response_compressor, 'compress',
+                        lambda data, encoding, cached=False: calls.append(cached) or compress(data, encoding, cached))
+
+    @app.route('/events')
+    @cache.cached('events')
+    def events():
+        return jsonify({'events': [{'title': f'Event {n}'} for n in range(200)]})
+
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+    first = client.get('/events', headers=headers)
+    second = client.get('/events', headers=headers)
+
+    assert calls == [True]
+    assert first.headers['Content-Encoding'] == second.headers['Content-Encoding'] == 'gzip'
+    assert first.get_data() == second.get_data()
+    assert second.headers['ETag'].endswith(':gzip"')
+    assert client.get('/events', headers={**headers, 'If-None-Match': second.headers['ETag']}).status_code == 304
+    assert client.get('/events').get_json()['events'][0] == {'title': 'Event 0'}
+
+
+def test_counters_are_exact_under_concurrent_requests():
+    app, cache, calls = _app()
+    cache.ttl = 60
+    client = app.test_client()
+    client.get('/events/a/photos')
+
+    def hammer():
+        local = app.test_client()
+        for _ in range(50):
+            local.get('/events/a/photos')
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats() == {'hits': 400, 'misses': 1, 'not_modified': 0}
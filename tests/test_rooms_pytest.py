@@ -0,0 +1,78 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+import api.events
+from extensions import socketio
+from utils.rooms import MAX_REGION_CELLS, geo_room, geo_rooms_around
+from utils.token_blocklist import token_blocklist
+
+
+def test_points_map_to_the_cell_that_contains_them():
+    assert geo_room(36.8, -1.3, cell_degrees=0.5) == 'geo_-3_73'
+    assert geo_room(36.99, -1.01, cell_degrees=0.5) == 'geo_-3_73'
+    assert geo_room(37.0, -1.0, cell_degrees=0.5) == 'geo_-2_74'
+
+
+def test_nearest_cells_come_first_and_are_capped():
+    rooms = geo_rooms_around(36.8, -1.3, 500, cell_degrees=0.5)
+
+    assert rooms[0] == geo_room(36.8, -1.3, cell_degrees=0.5)
+    assert set(rooms[1:5]) == {'geo_-4_73', 'geo_-2_73', 'geo_-3_72', 'geo_-3_74'}
+    assert len(rooms) == MAX_REGION_CELLS == len(set(rooms))
+    assert geo_rooms_around(36.8, -1.3, 1, cell_degrees=0.5) == ['geo_-3_73']
+
+
+def test_cells_wrap_around_the_antimeridian():
+    assert geo_room(180.0, 10.0, cell_degrees=0.5) == geo_room(-180.0, 10.0, cell_degrees=0.5)
+
+    rooms = geo_rooms_around(179.9, 10.0, 60, cell_degrees=0.5)
+
+    # An event just across the line is announced to this subscriber
+    assert geo_room(-179.9, 10.0, cell_degrees=0.5) in rooms
+    assert all(-360 <= int(room.split('_')[2]) < 360 for room in rooms)
+
+
+def test_cells_stop_at_the_poles():
+    rooms = geo_rooms_around(0.0, 89.9, 300, cell_degrees=0.5)
+
+    assert rooms[0] == geo_room(0.0, 89.9, cell_degrees=0.5)
+    assert len(rooms) == MAX_REGION_CELLS == len(set(rooms))
+    assert all(int(room.split('_')[1]) <= 180 for room in rooms)
+
+
+def test_region_subscriptions_replace_each_other(app):
+    client = socketio.test_client(app)
+
+    client.emit('subscribe_region', {'lat': -1.3, 'lon': 36.8, 'radius_km': 1})
+    client.emit('subscribe_region', {'lat': 40.7, 'lon': -74.2, 'radius_km': 1})
+    assert [event['args'][0] for event in client.get_received()] == [{'cells': 1}, {'cells': 1}]
+
+    socketio.emit('event_created', {'title': 'Nairobi'}, to=geo_room(36.8, -1.3))
+    socketio.emit('event_created', {'title': 'New York'}, to=geo_room(-74.2, 40.7))
+    assert [event['args'][0]['title'] for event in client.get_received()] == ['New York']
+
+    client.emit('unsubscribe_region')
+    socketio.emit('event_created', {'title': 'New York'}, to=geo_room(-74.2, 40.7))
+    assert client.get_received() == []
+
+    for payload in ({}, {'lat': 'north', 'lon': 1}):
+        client.emit('subscribe_region', payload)
+        assert client.get_received()[0]['args'][0] == {'message': 'lat and lon required'}
+    client.disconnect()
+
+
+@pytest.mark.parametrize('coordinates', [['36.8', '-1.3'], [36.8], [200, 0], [0, float('nan')], None])
+def test_events_with_bad_coordinates_are_refused_before_saving(app, monkeypatch, coordinates):
+    monkeypatch.setattr(token_blocklist, 'is_revoked', lambda jti: False)
+    saved = []
+    monkeypatch.setattr(api.events.Event, 'save', lambda self: saved.append(self))
+    with app.app_context():
+        token = create_access_token(identity='6ad5a9c3d7589cc0c915004a', additional_claims={'role': 'organizer'})
+
+    response = app.test_client().post('/api/v1/events', headers={'Authorization': f'Bearer {token}'}, json={
+        'title': 'T', 'description': 'D', 'date': '2026-12-31T12:00:00Z', 'location_address': 'X',
+        'location': {'type': 'Point', 'coordinates': coordinates}
+    })
+
+    assert response.status_code == 400
+    assert saved == []
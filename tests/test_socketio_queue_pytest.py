@@ -0,0 +1,138 @@
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+import socketio as socketio_client
+from flask import Flask
+from bson import ObjectId
+from flask_socketio import SocketIO, join_room
+from werkzeug.serving import make_server
+
+import utils.chat_history
+from utils.chat_history import ChatHistory
+from utils.socketio_queue import LocalPubSubManager, socketio_queue_options
+
+
+class Worker:
+    """An app + Socket.IO server listening on its own port, as a separate worker would"""
+
+    def __init__(self, channel):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test'
+        self.sio = SocketIO(self.app, async_mode='threading',
+                            client_manager=LocalPubSubManager(channel=channel))
+        self.history = ChatHistory()
+        self.history.follow(self.sio.server.manager)
+
+        @self.sio.on('join')
+        def on_join(data):
+            join_room(data['room'])
+            return True
+
+        @self.sio.on('join_chat')
+        def on_join_chat(data):
+            join_room(data['room'])
+            return self.history.recent(data['room'])
+
+        self.http = make_server('127.0.0.1', 0, self.app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.http.server_port}'
+        self.thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.http.shutdown()
+        self.sio.server.manager.close()
+
+
+@pytest.fixture()
+def workers():
+    channel = f'test-{uuid4().hex}'
+    started = [Worker(channel), Worker(channel)]
+    yield started
+    for worker in started:
+        worker.stop()
+
+
+def connect(worker, room, received):
+    client = socketio_client.Client()
+
+    @client.on('*')
+    def on_any(event, data):
+        received.append((event, data))
+
+    client.connect(worker.url, transports=['polling'], wait_timeout=5)
+    assert client.call('join', {'room': room}, timeout=5) is True
+    return client
+
+
+def wait_for(received, count, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and len(received) < count:
+        time.sleep(0.02)
+    return received
+
+
+def test_room_broadcast_reaches_clients_of_every_worker(workers):
+    worker_a, worker_b = workers
+    received_a, received_b, bystander = [], [], []
+    clients = [
+        connect(worker_a, 'organizer_1', received_a),
+        connect(worker_b, 'organizer_1', received_b),
+        connect(worker_a, 'organizer_2', bystander),
+    ]
+    try:
+        # Emitted by worker B outside of any socket handler, like an API endpoint
+        with worker_b.app.app_context():
+            worker_b.sio.emit('rsvp_update', {'event_id': 'e1', 'count': 3}, to='organizer_1')
+
+        expected = [('rsvp_update', {'event_id': 'e1', 'count': 3})]
+        assert wait_for(received_a, 1) == expected
+        assert wait_for(received_b, 1) == expected
+        time.sleep(0.2)
+        assert bystander == []
+    finally:
+        for client in clients:
+            client.disconnect()
+
+
+def test_chat_history_of_every_worker_gets_messages_sent_through_another(workers, monkeypatch):
+    worker_a, worker_b = workers
+    no_messages = SimpleNamespace(sort=lambda spec: SimpleNamespace(limit=lambda n: []))
+    messages = SimpleNamespace(find=lambda query, projection: no_messages)
+    monkeypatch.setattr(utils.chat_history, 'mongo', SimpleNamespace(db=SimpleNamespace(messages=messages)))
+    monkeypatch.setattr(utils.chat_history, 'message_buffer', SimpleNamespace(pending_for=lambda event_id: []))
+    room = str(ObjectId())
+    clients = [connect(worker_a, 'lobby', []), connect(worker_b, 'lobby', [])]
+    try:
+        for client in clients:
+            assert client.call('join_chat', {'room': room}, timeout=5) == []
+        # Broadcast on worker A as send_message does; it is not in the database yet
+        sent = {'message_id': str(ObjectId()), 'username': 'ann', 'text': 'hello',
+                'timestamp': datetime(2026, 5, 1, 12, 0).isoformat()}
+        with worker_a.app.app_context():
+            worker_a.sio.emit('new_message', sent, to=room)
+
+        deadline = time.time() + 5
+        while time.time() < deadline and not worker_b.history.recent(room):
+            time.sleep(0.02)
+        expected = [{'username': 'ann', 'text': 'hello', 'timestamp': sent['timestamp']}]
+        assert clients[1].call('join_chat', {'room': room}, timeout=5) == expected
+        # The sender appends its own messages (send_message does); the queue does not add them again
+        assert worker_a.history.recent(room) == []
+    finally:
+        for client in clients:
+            client.disconnect()
+
+
+def test_queue_options_select_backend():
+    assert socketio_queue_options({}) == {}
+    manager = socketio_queue_options({'SOCKETIO_MESSAGE_QUEUE': 'memory://'})['client_manager']
+    assert isinstance(manager, LocalPubSubManager)
+    manager.close()
+    assert socketio_queue_options({
+        'SOCKETIO_MESSAGE_QUEUE': 'redis://localhost:6379/0',
+        'SOCKETIO_CHANNEL': 'events'
+    }) == {'message_queue': 'redis://localhost:6379/0', 'channel': 'events'}
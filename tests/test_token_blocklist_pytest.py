@@ -0,0 +1,85 @@
+import threading
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from utils.token_blocklist import BloomFilter, TokenBlocklist
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [str(uuid4()) for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    # Keys that collide with earlier ones are not counted twice
+    assert 950 <= bloom.count <= 1000
+
+
+def test_bloom_filter_false_positive_rate_is_bounded():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for _ in range(1000):
+        bloom.add(str(uuid4()))
+
+    probes = 10000
+    false_positives = sum(1 for _ in range(probes) if str(uuid4()) in bloom)
+    assert false_positives / probes < 0.03
+
+
+def test_unrevoked_token_is_answered_without_database(monkeypatch):
+    blocklist = TokenBlocklist()
+    # Pretend a sync just happened so no database access is attempted
+    monkeypatch.setattr(blocklist, '_ensure_started', lambda: None)
+    blocklist._synced_since = datetime.utcnow()
+
+    def fail():
+        raise AssertionError('database should not be queried')
+
+    monkeypatch.setattr(TokenBlocklist, 'collection', property(lambda self: fail()))
+    assert blocklist.is_revoked(str(uuid4())) is False
+
+
+class _FailingCollection:
+    def find_one(self, *args):
+        raise RuntimeError('connection reset')
+
+
+@pytest.mark.parametrize('fail_open', [False, True])
+def test_filter_hits_fail_closed_unless_configured(monkeypatch, fail_open):
+    blocklist = TokenBlocklist()
+    blocklist.fail_open = fail_open
+    monkeypatch.setattr(blocklist, '_ensure_started', lambda: None)
+    monkeypatch.setattr(TokenBlocklist, 'collection', property(lambda self: _FailingCollection()))
+    blocklist._synced_since = datetime.utcnow()
+    blocklist._bloom.add('revoked-jti')
+
+    assert blocklist.is_revoked('revoked-jti') is (not fail_open)
+    # A filter miss never needs the database
+    assert blocklist.is_revoked(str(uuid4())) is False
+
+
+def test_tokens_are_looked_up_until_the_first_sync(monkeypatch):
+    blocklist = TokenBlocklist()
+    monkeypatch.setattr(blocklist, '_ensure_started', lambda: None)
+    monkeypatch.setattr(TokenBlocklist, 'collection', property(lambda self: _FailingCollection()))
+
+    # Nothing is known yet, so an unreachable database refuses the token
+    assert blocklist.is_revoked(str(uuid4())) is True
+
+
+def test_sync_runs_on_a_background_thread(monkeypatch):
+    blocklist = TokenBlocklist()
+    blocklist.sync_interval = 0.01
+    synced = []
+    monkeypatch.setattr(blocklist, '_sync', lambda: synced.append(threading.current_thread().name))
+
+    blocklist._ensure_started()
+    deadline = time.monotonic() + 2
+    while len(synced) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    blocklist.stop()
+
+    assert synced[:2] == ['token-blocklist-sync'] * 2
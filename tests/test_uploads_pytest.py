@@ -0,0 +1,175 @@
+import base64
+import io
+import json
+import threading
+
+import pytest
+from bson import ObjectId
+from werkzeug.datastructures import FileStorage
+
+from utils.file_upload import LocalStorage, S3Storage, photo_storage
+from utils.upload_queue import InvalidUpload, UploadQueueFull
+
+
+def _photo(data=b'jpeg bytes'):
+    return FileStorage(io.BytesIO(data), filename='party photo.jpg', content_type='image/jpeg')
+
+
+def test_local_storage_writes_objects_under_the_upload_folder(tmp_path):
+    storage = LocalStorage({'UPLOAD_FOLDER': str(tmp_path)})
+    url = storage.upload(io.BytesIO(b'data'), 'events/e1/a.jpg', 'image/jpeg')
+
+    assert url == '/api/v1/uploads/files/events/e1/a.jpg'
+    assert (tmp_path / 'events' / 'e1' / 'a.jpg').read_bytes() == b'data'
+    with pytest.raises(ValueError):
+        storage.upload(io.BytesIO(b'data'), '../outside.jpg', 'image/jpeg')
+
+
+def test_s3_client_is_built_once_with_a_sized_pool_and_multipart_settings():
+    storage = S3Storage({
+        'CLOUD_STORAGE_BUCKET': 'photos',
+        'AWS_REGION': 'us-east-1',
+        'S3_ENDPOINT_URL': 'http://localhost:9000',
+        'UPLOAD_WORKERS': 3,
+        'UPLOAD_MULTIPART_CONCURRENCY': 4,
+        'UPLOAD_MULTIPART_THRESHOLD_MB': 16,
+        'UPLOAD_MULTIPART_CHUNK_MB': 8
+    })
+
+    assert storage.client is storage.client
+    assert storage.client.meta.endpoint_url == 'http://localhost:9000'
+    assert storage.client.meta.config.max_pool_connections == 12
+    assert storage.transfer_config.multipart_threshold == 16 * 1024 * 1024
+    assert storage.transfer_config.multipart_chunksize == 8 * 1024 * 1024
+    assert storage.url('events/a.jpg') == 'https://photos.s3.amazonaws.com/events/a.jpg'
+
+
+def test_uploads_run_in_the_background_and_record_their_status(tmp_path, upload_app):
+    app, queue = upload_app()
+    completed = []
+
+    with app.app_context():
+        upload = queue.submit(_photo(), 'events/e1', 'event_photo', str(ObjectId()),
+                              on_complete=completed.append, event_id='e1')
+        queue.wait(upload['_id'], timeout=5)
+
+    record = queue.records.docs[upload['_id']]
+    assert record['status'] == 'done'
+    assert record['event_id'] == 'e1' and record['size'] == len(b'jpeg bytes')
+    assert completed == [upload]
+    assert (tmp_path / 'objects' / upload['key']).read_bytes() == b'jpeg bytes'
+    assert upload['url'].endswith('party_photo.jpg')
+    # The spool file is gone once the object is stored
+    assert [p.name for p in tmp_path.iterdir()] == ['objects']
+
+
+def test_a_full_queue_refuses_uploads_and_failures_are_recorded(upload_app):
+    app, queue = upload_app(UPLOAD_QUEUE_SIZE=1)
+    release = threading.Event()
+
+    def blocked(upload):
+        release.wait(5)
+        raise RuntimeError('gallery update failed')
+
+    with app.app_context():
+        first = queue.submit(_photo(), 'events/e1', 'event_photo', str(ObjectId()), on_complete=blocked)
+        with pytest.raises(UploadQueueFull):
+            queue.submit(_photo(), 'events/e1', 'event_photo', str(ObjectId()))
+        release.set()
+        queue.wait(first['_id'], timeout=5)
+
+    record = queue.records.docs[first['_id']]
+    assert record['status'] == 'failed'
+    assert record['error'] == 'gallery update failed'
+    assert queue.stats()['rejected_total'] == 1
+    assert queue.stats()['pending'] == 0
+
+
+def test_s3_presigned_form_pins_the_key_type_and_size():
+    storage = S3Storage({
+        'CLOUD_STORAGE_BUCKET': 'photos',
+        'AWS_ACCESS_KEY_ID': 'key',
+        'AWS_SECRET_ACCESS_KEY': 'secret',
+        'AWS_REGION': 'us-east-1'
+    })
+
+    form = storage.presign('events/e1/a.jpg', 'image/jpeg', 1024, 900)
+
+    assert form['url'] == 'https://photos.s3.amazonaws.com/'
+    assert form['fields']['key'] == 'events/e1/a.jpg'
+    assert form['fields']['Content-Type'] == 'image/jpeg'
+    policy = json.loads(base64.b64decode(form['fields']['policy']))
+    assert ['content-length-range', 1, 1024] in policy['conditions']
+
+
+def test_direct_uploads_are_confirmed_once_the_client_has_stored_the_file(tmp_path, upload_app):
+    app, queue = upload_app(SECRET_KEY='test', UPLOAD_MAX_BYTES=100)
+    storage = photo_storage.backend
+    processed = []
+
+    with app.app_context():
+        upload, form = queue.reserve('party photo.jpg', 'events/e1', 'event_photo', str(ObjectId()), event_id='e1')
+        assert queue.records.docs[upload['_id']]['status'] == 'awaiting_upload'
+        with pytest.raises(InvalidUpload):
+            queue.confirm(upload)
+
+        fields = form['fields']
+        with pytest.raises(ValueError):
+            storage.receive(dict(fields, key='events/e1/other.jpg'), io.BytesIO(b'jpeg bytes'), 10)
+        with pytest.raises(ValueError):
+            storage.receive(fields, io.BytesIO(b'x' * 101), 101)
+        storage.receive(fields, io.BytesIO(b'jpeg bytes'), 10)
+
+        confirmed = queue.confirm(upload, process=lambda upload, path: processed.append(open(path, 'rb').read()) or {})
+        queue.wait(confirmed['_id'], timeout=5)
+        with pytest.raises(InvalidUpload):
+            queue.confirm(upload)
+
+    record = queue.records.docs[upload['_id']]
+    assert record['status'] == 'done' and record['size'] == 10
+    assert record['content_type'] == 'image/jpeg'
+    # Variants are made from a copy fetched back from storage
+    assert processed == [b'jpeg bytes']
+    assert [p.name for p in tmp_path.iterdir()] == ['objects']
+
+
+def test_confirmed_direct_uploads_cannot_be_replaced_with_their_form(tmp_path, upload_app):
+    app, queue = upload_app(SECRET_KEY='test')
+    storage = photo_storage.backend
+
+    with app.app_context():
+        upload, form = queue.reserve('party photo.jpg', 'events/e1', 'event_photo', str(ObjectId()), event_id='e1')
+        # The form is signed for an incoming key, never for the photo's own
+        assert form['fields']['key'] == f"incoming/{upload['key']}"
+        storage.receive(form['fields'], io.BytesIO(b'jpeg bytes'), 10)
+
+        confirmed = queue.confirm(upload)
+        queue.wait(confirmed['_id'], timeout=5)
+        # Still within the form's lifetime
+        storage.receive(form['fields'], io.BytesIO(b'something else'), 14)
+
+    assert queue.records.docs[upload['_id']]['status'] == 'done'
+    assert (tmp_path / 'objects' / upload['key']).read_bytes() == b'jpeg bytes'
+    assert upload['url'] == storage.url(upload['key'])
+
+
+def test_counters_are_exact_under_concurrent_uploads(upload_app):
+    app, queue = upload_app(UPLOAD_QUEUE_SIZE=200, UPLOAD_WORKERS=8)
+    uploads = []
+
+    def submit():
+        with app.app_context():
+            for _ in range(20):
+                uploads.append(queue.submit(_photo(), 'events/e1', 'event_photo', str(ObjectId())))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for upload in uploads:
+        queue.wait(upload['_id'], timeout=5)
+
+    stats = queue.stats()
+    assert stats['submitted_total'] == stats['completed_total'] == 160
+    assert stats['failed_total'] == stats['rejected_total'] == 0
@@ -0,0 +1,75 @@
+import time
+from types import SimpleNamespace
+
+from bson import ObjectId
+from flask import Flask
+
+import utils.user_cache
+from utils.cache import TTLCache
+from utils.user_cache import get_user, invalidate_user
+
+
+class _Users:
+    def __init__(self, *docs):
+        self.docs = {doc['_id']: doc for doc in docs}
+        self.finds = 0
+
+    def find_one(self, query, projection=None):
+        self.finds += 1
+        doc = self.docs.get(query['_id'])
+        return dict(doc) if doc else None
+
+
+def _setup(monkeypatch, users, ttl=60):
+    monkeypatch.setattr(utils.user_cache, 'mongo', SimpleNamespace(db=SimpleNamespace(users=users)))
+    monkeypatch.setattr(utils.user_cache, 'user_cache', TTLCache(max_size=10, ttl=ttl))
+    invalidated = []
+    monkeypatch.setattr(utils.user_cache.response_cache, 'invalidate', lambda *tags: invalidated.extend(tags))
+    return Flask(__name__), invalidated
+
+
+def test_users_are_read_once_per_request_and_once_per_worker_ttl(monkeypatch):
+    user_id = ObjectId()
+    users = _Users({'_id': user_id, 'username': 'ann'})
+    app, _ = _setup(monkeypatch, users, ttl=0.05)
+
+    with app.test_request_context():
+        assert get_user(user_id)['username'] == 'ann'
+        assert get_user(str(user_id)) is get_user(user_id)
+    with app.test_request_context():
+        assert get_user(user_id)['username'] == 'ann'
+    assert users.finds == 1
+
+    time.sleep(0.06)
+    with app.test_request_context():
+        get_user(user_id)
+    assert users.finds == 2
+
+
+def test_missing_users_are_not_cached_across_requests(monkeypatch):
+    users = _Users()
+    app, _ = _setup(monkeypatch, users)
+
+    with app.test_request_context():
+        assert get_user(ObjectId()) is None
+    with app.test_request_context():
+        assert get_user(ObjectId()) is None
+    assert users.finds == 2
+
+
+def test_invalidation_drops_both_caches_and_the_public_profile(monkeypatch):
+    user_id = ObjectId()
+    users = _Users({'_id': user_id, 'username': 'ann', 'photo_url': None})
+    app, invalidated = _setup(monkeypatch, users)
+
+    with app.test_request_context():
+        assert get_user(user_id)['photo_url'] is None
+        # As the avatar callback does after its write
+        users.docs[user_id]['photo_url'] = 'a.jpg'
+        invalidate_user(str(user_id))
+        assert get_user(user_id)['photo_url'] == 'a.jpg'
+    with app.test_request_context():
+        assert get_user(user_id)['photo_url'] == 'a.jpg'
+
+    assert users.finds == 2
+    assert invalidated == [f'user:{user_id}']
@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+from flask_jwt_extended import create_access_token, decode_token
+
+import websocket_handlers
+from extensions import socketio
+from utils.rooms import user_room
+
+
+@pytest.fixture()
+def users(monkeypatch):
+    known = {}
+    monkeypatch.setattr(websocket_handlers, 'get_user', lambda user_id: known.get(str(user_id)))
+    return known
+
+
+@pytest.fixture()
+def revoked(monkeypatch):
+    jtis = set()
+    monkeypatch.setattr(websocket_handlers.token_blocklist, 'is_revoked', lambda jti: jti in jtis)
+    return jtis
+
+
+@pytest.fixture()
+def sent(monkeypatch):
+    messages = []
+    monkeypatch.setattr(websocket_handlers.message_buffer, 'add', messages.append)
+    monkeypatch.setattr(websocket_handlers.chat_history, 'append', lambda event_id, message: None)
+    return messages
+
+
+def _token(app, users, **kwargs):
+    user_id = str(ObjectId())
+    users[user_id] = {'_id': ObjectId(user_id), 'username': f'user-{user_id[-4:]}'}
+    with app.app_context():
+        token = create_access_token(identity=user_id, **kwargs)
+        jti = decode_token(token, allow_expired=True)['jti']
+    return user_id, token, jti
+
+
+def _errors(client):
+    return [event['args'][0]['message'] for event in client.get_received() if event['name'] == 'error']
+
+
+def test_valid_token_authenticates_the_connection_and_joins_the_user_room(app, users, revoked, sent):
+    user_id, token, _ = _token(app, users)
+    client = socketio.test_client(app, auth={'token': f'Bearer {token}'})
+    assert client.is_connected()
+
+    socketio.emit('direct', {'text': 'hi'}, to=user_room(user_id))
+    assert [event['name'] for event in client.get_received()] == ['direct']
+
+    # Later events need no token
+    client.emit('send_message', {'event_id': str(ObjectId()), 'text': 'hello'})
+    assert _errors(client) == []
+    assert sent[0]['user_id'] == ObjectId(user_id)
+    client.disconnect()
+
+
+@pytest.mark.parametrize('case', ['garbage', 'expired', 'revoked', 'unknown user'])
+def test_bad_tokens_are_refused_at_connect(app, users, revoked, case):
+    user_id, token, jti = _token(app, users, expires_delta=timedelta(seconds=-1) if case == 'expired' else None)
+    if case == 'garbage':
+        token = 'not-a-jwt'
+    elif case == 'revoked':
+        revoked.add(jti)
+    elif case == 'unknown user':
+        users.pop(user_id)
+
+    client = socketio.test_client(app, auth={'token': token})
+    assert not client.is_connected()
+
+
+def test_missing_token_connects_anonymously(app, users, revoked, sent):
+    client = socketio.test_client(app)
+    assert client.is_connected()
+
+    client.emit('send_message', {'event_id': str(ObjectId()), 'text': 'hello'})
+    assert _errors(client) == ['Invalid token']
+    assert sent == []
+    client.disconnect()
+
+
+def test_token_revoked_after_connect_stops_working_on_the_open_socket(app, users, revoked, sent):
+    user_id, token, jti = _token(app, users)
+    client = socketio.test_client(app, auth={'token': token})
+    client.emit('send_message', {'event_id': str(ObjectId()), 'text': 'before logout'})
+    assert _errors(client) == []
+
+    revoked.add(jti)
+    client.emit('send_message', {'event_id': str(ObjectId()), 'text': 'after logout'})
+    assert _errors(client) == ['Invalid token']
+    assert [message['text'] for message in sent] == ['before logout']
+
+    # The personal room is left as well
+    socketio.emit('direct', {'text': 'hi'}, to=user_room(user_id))
+    assert client.get_received() == []
+    client.disconnect()
+
+
+def test_token_expiring_after_connect_stops_working(app, users, revoked, sent):
+    user_id, token, _ = _token(app, users, expires_delta=timedelta(seconds=1))
+    client = socketio.test_client(app, auth={'token': token})
+    assert client.is_connected()
+
+    time.sleep(1.1)
+    client.emit('send_message', {'event_id': str(ObjectId()), 'text': 'late'})
+    assert _errors(client) == ['Invalid token']
+    assert sent == []
+    client.disconnect()
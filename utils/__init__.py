@@ -8,6 +8,8 @@ from utils.validators import validate_email, validate_password, validate_coordin
 from utils.geolocation import calculate_distance, find_nearby_events, is_within_geofence
 from utils.file_upload import upload_photo_to_cloud, allowed_file
 from utils.email_service import send_password_reset_email, send_event_reminder
+from utils.cache import TTLCache
+from utils.user_cache import get_user, get_current_user, invalidate_user
 
 __all__ = [
     'organizer_required',
@@ -20,5 +22,9 @@ __all__ = [
     'upload_photo_to_cloud',
     'allowed_file',
     'send_password_reset_email',
-    'send_event_reminder'
+    'send_event_reminder',
+    'TTLCache',
+    'get_user',
+    'get_current_user',
+    'invalidate_user'
 ]
\ No newline at end of file
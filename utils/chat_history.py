@@ -0,0 +1,151 @@
+# utils/chat_history.py - In-memory recent message history per chat room
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from bson import ObjectId
+from extensions import mongo
+from utils.message_buffer import message_buffer
+from utils.socketio_queue import on_remote_emit
+
+
+class _Room:
+    __slots__ = ('messages', 'ready', 'failed', 'loaded_at')
+
+    def __init__(self, size):
+        self.messages = deque(maxlen=size)
+        self.ready = threading.Event()
+        self.failed = False
+        self.loaded_at = time.monotonic()
+
+
+def _serialize(message):
+    return {
+        'username': message['username'],
+        'text': message['text'],
+        'timestamp': message['timestamp'].isoformat()
+    }
+
+
+class ChatHistory:
+    """
+    Ring buffer of the last ``CHAT_HISTORY_SIZE`` messages of each chat room.
+
+    A room is hydrated from MongoDB (plus messages still waiting in the
+    write-behind buffer) the first time someone joins it; afterwards messages
+    sent through this process are appended as they are broadcast, so joins are
+    served from memory. With a Socket.IO message queue, ``follow`` appends the
+    messages other workers broadcast too. At most ``CHAT_HISTORY_MAX_ROOMS``
+    rooms are kept (least recently joined are evicted), and a room is
+    re-hydrated after ``CHAT_HISTORY_TTL_SECONDS`` to pick up anything missed.
+    """
+
+    def __init__(self):
+        self.size = 50
+        self.max_rooms = 1000
+        self.ttl = 300
+        self._rooms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read history settings from the app config"""
+        self.size = app.config.get('CHAT_HISTORY_SIZE', self.size)
+        self.max_rooms = app.config.get('CHAT_HISTORY_MAX_ROOMS', self.max_rooms)
+        self.ttl = app.config.get('CHAT_HISTORY_TTL_SECONDS', self.ttl)
+        with self._lock:
+            self._rooms.clear()
+
+    def recent(self, event_id):
+        """Return the room's recent messages, oldest first, ready to emit"""
+        key = str(event_id)
+        event_oid = ObjectId(key)
+        with self._lock:
+            room = self._rooms.get(key)
+            if room is not None and time.monotonic() - room.loaded_at > self.ttl and room.ready.is_set():
+                del self._rooms[key]
+                room = None
+            owner = room is None
+            if owner:
+                # Register the room before reading MongoDB so messages sent
+                # meanwhile are appended to it rather than lost
+                room = _Room(self.size)
+                self._rooms[key] = room
+                pending = message_buffer.pending_for(event_oid)
+                while len(self._rooms) > self.max_rooms:
+                    self._rooms.popitem(last=False)
+            else:
+                self._rooms.move_to_end(key)
+
+        if owner:
+            try:
+                self._hydrate(event_oid, room, pending)
+            except Exception:
+                room.failed = True
+                with self._lock:
+                    if self._rooms.get(key) is room:
+                        del self._rooms[key]
+                raise
+            finally:
+                room.ready.set()
+        elif not room.ready.wait(timeout=10) or room.failed:
+            # The joiner that loads the room failed (or is stuck): an empty
+            # history would look like a room without messages
+            raise RuntimeError(f"Chat history of event {key} is unavailable")
+
+        with self._lock:
+            return [_serialize(m) for m in room.messages]
+
+    def append(self, event_id, message):
+        """Record a message just sent to a room that is held in memory"""
+        with self._lock:
+            room = self._rooms.get(str(event_id))
+            if room is not None:
+                room.messages.append(message)
+
+    def follow(self, manager):
+        """Append the ``new_message`` broadcasts other workers publish through ``manager``"""
+        on_remote_emit(manager, self._remote_emit)
+
+    def _remote_emit(self, event, data, room):
+        if event != 'new_message' or not isinstance(data, dict) or 'message_id' not in data:
+            return
+        self.append(room, {
+            '_id': ObjectId(data['message_id']),
+            'username': data['username'],
+            'text': data['text'],
+            'timestamp': datetime.fromisoformat(data['timestamp'])
+        })
+
+    def discard(self, event_id):
+        """Forget a room, e.g. after its event was deleted"""
+        with self._lock:
+            self._rooms.pop(str(event_id), None)
+
+    def stats(self):
+        """Return the number of rooms held in memory"""
+        with self._lock:
+            return {'rooms': len(self._rooms), 'max_rooms': self.max_rooms}
+
+    def _hydrate(self, event_oid, room, pending):
+        stored = list(mongo.db.messages.find(
+            {'event_id': event_oid},
+            {'username': 1, 'text': 1, 'timestamp': 1}
+        ).sort([('timestamp', -1), ('_id', -1)]).limit(self.size))
+        stored.reverse()
+
+        with self._lock:
+            # Messages can appear in more than one source while they are
+            # being flushed; each has its _id from the moment it is sent
+            merged, seen = [], set()
+            for message in stored + pending + list(room.messages):
+                if message['_id'] in seen:
+                    continue
+                seen.add(message['_id'])
+                merged.append(message)
+            merged.sort(key=lambda m: m['timestamp'])
+            room.messages.clear()
+            room.messages.extend(merged[-self.size:])
+            room.loaded_at = time.monotonic()
+
+
+chat_history = ChatHistory()
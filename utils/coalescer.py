@@ -0,0 +1,90 @@
+# utils/coalescer.py - Debounced broadcasting of per-event counters
+import threading
+import time
+from extensions import socketio
+
+
+class CounterBroadcaster:
+    """
+    Coalesces frequent counter updates into at most one emit per key per window.
+
+    The first update for a key is emitted immediately; updates arriving within
+    ``RSVP_BROADCAST_INTERVAL_MS`` of the last emit are folded together and the
+    most recent count is emitted when the window closes. Counts never go
+    backwards within a window, so stale reads racing with newer ones cannot
+    make a dashboard flicker down.
+    """
+
+    def __init__(self, event_name, count_field='count'):
+        self.event_name = event_name
+        self.count_field = count_field
+        self.interval = 0.5
+        self._pending = {}
+        self._last_emit = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+        self.received_total = 0
+        self.emitted_total = 0
+
+    def init_app(self, app):
+        """Read the coalescing window from the app config"""
+        self.interval = app.config.get('RSVP_BROADCAST_INTERVAL_MS', 500) / 1000.0
+
+    def update(self, key, count, room, extra=None):
+        """Record the latest ``count`` for ``key`` and emit it to ``room`` when due"""
+        payload = dict(extra or {})
+        payload[self.count_field] = count
+        now = time.monotonic()
+        with self._lock:
+            self.received_total += 1
+            pending = self._pending.get(key)
+            if pending is not None and pending[1][self.count_field] > count:
+                payload[self.count_field] = pending[1][self.count_field]
+            self._pending[key] = (room, payload)
+
+            if key in self._timers:
+                return
+            wait = self._last_emit.get(key, 0) + self.interval - now
+            if wait > 0:
+                timer = threading.Timer(wait, self._flush, args=(key,))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+                return
+        self._flush(key)
+
+    def _flush(self, key):
+        with self._lock:
+            self._timers.pop(key, None)
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            self._last_emit[key] = time.monotonic()
+            # Forget keys that went quiet so the map does not grow unbounded
+            cutoff = self._last_emit[key] - max(self.interval * 10, 60)
+            for stale in [k for k, t in self._last_emit.items() if t < cutoff and k not in self._timers]:
+                del self._last_emit[stale]
+            self.emitted_total += 1
+        room, payload = entry
+        socketio.emit(self.event_name, payload, to=room)
+
+    @property
+    def depth(self):
+        """Number of keys waiting for their window to close"""
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        """Return counters for monitoring"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'received_total': self.received_total,
+                'emitted_total': self.emitted_total
+            }
+
+
+# Event document RSVPs (POST /events/<id>/rsvp) and the rsvps collection
+# (POST /rsvp/submit) report different counters
+rsvp_broadcaster = CounterBroadcaster('rsvp_update')
+rsvp_total_broadcaster = CounterBroadcaster('rsvp_update', count_field='total_rsvps')
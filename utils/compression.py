@@ -0,0 +1,172 @@
+# utils/compression.py - Response compression negotiated per request (zstd, br, gzip)
+import gzip
+import threading
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd is not offered without it
+    zstandard = None
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript'
+)
+
+
+def _stream_gzip(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        # Sync flush per chunk: clients can decode each batch as it arrives
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _stream_br(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in chunks:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def _stream_zstd(chunks, level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    yield compressor.flush()
+
+
+# encoding -> (compress(data, level), stream(chunks, level)), for the installed codecs
+CODECS = {'gzip': (lambda data, level: gzip.compress(data, level, mtime=0), _stream_gzip)}
+if brotli is not None:
+    CODECS['br'] = (lambda data, level: brotli.compress(data, quality=level), _stream_br)
+if zstandard is not None:
+    CODECS['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _stream_zstd)
+
+
+class ResponseCompressor:
+    """
+    Compresses responses with the best encoding the client accepts.
+
+    Encodings are offered in ``COMPRESS_ALGORITHMS`` order (zstd and br only
+    when their packages are installed). Bodies under ``COMPRESS_MIN_SIZE``
+    are sent as is: they fit in a packet or two and compressing them only
+    costs CPU. Responses rendered per request use fast levels; the response
+    cache compresses a body once at the higher ``COMPRESS_CACHED_*`` levels
+    and keeps the result next to the entry (see utils/response_cache.py).
+    Streamed responses are compressed chunk by chunk, never buffered.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.mimetypes = set(DEFAULT_MIMETYPES)
+        self.algorithms = [name for name in ('zstd', 'br', 'gzip') if name in CODECS]
+        self.levels = {'gzip': 4, 'br': 4, 'zstd': 3}
+        self.cached_levels = {'gzip': 9, 'br': 6, 'zstd': 12}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        """Read compression settings from the app config and register the hook"""
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES') or DEFAULT_MIMETYPES)
+        wanted = [name.strip() for name in (app.config.get('COMPRESS_ALGORITHMS') or 'zstd,br,gzip').split(',')]
+        self.algorithms = [name for name in wanted if name in CODECS]
+        missing = [name for name in wanted if name and name not in CODECS]
+        if missing:
+            app.logger.info(f"Response compression: {', '.join(missing)} not installed, offering "
+                            f"{', '.join(self.algorithms) or 'none'}")
+        for name in CODECS:
+            self.levels[name] = app.config.get(f'COMPRESS_{name.upper()}_LEVEL', self.levels[name])
+            self.cached_levels[name] = app.config.get(f'COMPRESS_CACHED_{name.upper()}_LEVEL',
+                                                      self.cached_levels[name])
+        app.after_request(self.after_request)
+
+    def negotiate(self, response):
+        """Return the encoding to send ``response`` with, or None to send it as is"""
+        if (not self.enabled or not self.algorithms
+                or not 200 <= response.status_code < 300
+                or response.mimetype not in self.mimetypes
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return None
+        if not response.is_streamed and (response.content_length or 0) < self.min_size:
+            return None
+        return request.accept_encodings.best_match(self.algorithms)
+
+    def compress(self, data, encoding, cached=False):
+        """Compress ``data``; ``cached`` bodies are compressed harder, once"""
+        level = (self.cached_levels if cached else self.levels)[encoding]
+        return CODECS[encoding][0](data, level)
+
+    def encode(self, response, encoding, data):
+        """Send ``response`` with ``data``, its body compressed with ``encoding``"""
+        self._count(encoding, response.content_length or 0, len(data))
+        response.set_data(data)
+        self._mark(response, encoding)
+
+    def after_request(self, response):
+        if response.mimetype in self.mimetypes:
+            response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(response)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = self._stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+            self._mark(response, encoding)
+        else:
+            self.encode(response, encoding, self.compress(response.get_data(), encoding))
+        return response
+
+    def stats(self):
+        """Return {encoding: {'responses', 'bytes_in', 'bytes_out'}}"""
+        with self._lock:
+            return {name: dict(zip(('responses', 'bytes_in', 'bytes_out'), counts))
+                    for name, counts in self._stats.items()}
+
+    def _stream(self, chunks, encoding):
+        size_in = size_out = 0
+
+        def measured():
+            nonlocal size_in
+            for chunk in chunks:
+                size_in += len(chunk)
+                yield chunk
+
+        for data in CODECS[encoding][1](measured(), self.levels[encoding]):
+            size_out += len(data)
+            if data:
+                yield data
+        self._count(encoding, size_in, size_out)
+
+    def _count(self, encoding, size_in, size_out):
+        with self._lock:
+            counts = self._stats.setdefault(encoding, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += size_in
+            counts[2] += size_out
+
+    @staticmethod
+    def _mark(response, encoding):
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag names one representation: "<etag>:<encoding>", as
+        # Flask-Compress did
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}:{encoding}', weak)
+
+
+response_compressor = ResponseCompressor()
@@ -0,0 +1,130 @@
+# utils/db_probe.py - Background MongoDB health prober for the health endpoints
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from extensions import mongo
+
+
+class DatabaseProbe:
+    """
+    Pings MongoDB from a background thread and caches the result.
+
+    Health endpoints read the cached status instead of pinging on every
+    probe, so orchestrator checks from every worker cost one ping per
+    ``HEALTH_PROBE_INTERVAL_SECONDS`` and a slow or unreachable database
+    never blocks them. The result is stale (and the database treated as
+    unavailable) when no probe completed within three intervals.
+    """
+
+    def __init__(self):
+        self.interval = 10.0
+        self.logger = None
+        self.checked_at = None
+        self.ok = None
+        self.latency_ms = None
+        self.error = None
+        self.consecutive_failures = 0
+        self.last_ok_at = None
+        self._lock = threading.Lock()
+        self._first_result = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Read the probe interval from the app config"""
+        self.interval = float(app.config.get('HEALTH_PROBE_INTERVAL_SECONDS', 10))
+        self.logger = app.logger
+
+    def probe(self):
+        """Ping the database once and record the result"""
+        started = time.perf_counter()
+        try:
+            mongo.client.admin.command('ping')
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        latency_ms = (time.perf_counter() - started) * 1000
+        now = time.time()
+        with self._lock:
+            if not ok and self.ok and self.logger:
+                self.logger.warning(f"MongoDB health probe failed: {error}")
+            self.ok = ok
+            self.error = error
+            self.latency_ms = latency_ms
+            self.checked_at = now
+            if ok:
+                self.last_ok_at = now
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+        self._first_result.set()
+        return ok
+
+    def status(self, wait=0):
+        """
+        Return the cached database status without doing any I/O.
+
+        ``wait`` seconds are spent waiting for the first probe of this
+        process when none has completed yet.
+        """
+        self._ensure_started()
+        if wait:
+            self._first_result.wait(wait)
+        with self._lock:
+            checked_at, ok = self.checked_at, self.ok
+            stale = checked_at is None or time.time() - checked_at > self.interval * 3
+            if ok is None:
+                state = 'unknown'
+            elif ok and not stale:
+                state = 'ok'
+            else:
+                state = 'unavailable'
+            return {
+                'status': state,
+                'stale': stale,
+                'checked_at': _iso(checked_at),
+                'last_ok_at': _iso(self.last_ok_at),
+                'latency_ms': round(self.latency_ms, 3) if self.latency_ms is not None else None,
+                'consecutive_failures': self.consecutive_failures,
+                'error': self.error
+            }
+
+    def available(self):
+        """
+        False when MongoDB is not configured or the last probe failed (or is
+        stale). Does no I/O, so request handlers can answer 503 at once
+        instead of waiting out the server selection timeout.
+        """
+        return mongo.db is not None and self.status()['status'] != 'unavailable'
+
+    def _ensure_started(self):
+        # Started lazily so each (forked) worker process owns its own prober
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='db-probe', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self.probe()
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stopped = True
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+db_probe = DatabaseProbe()
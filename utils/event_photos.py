@@ -0,0 +1,91 @@
+# utils/event_photos.py - Event photos, one document each, read newest first a page at a time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import current_app
+from extensions import mongo
+from utils.file_upload import photo_storage
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def add_photo(event_id, upload):
+    """Record a stored upload (with its variants) as a photo of ``event_id``"""
+    photo = {
+        'event_id': ObjectId(event_id),
+        'upload_id': upload['_id'],
+        'uploaded_by': upload['user_id'],
+        'uploaded_at': datetime.utcnow(),
+        'url': upload['url'],
+        'width': upload.get('width'),
+        'height': upload.get('height'),
+        'variants': upload.get('variants', [])
+    }
+    mongo.db.event_photos.insert_one(photo)
+    return photo
+
+
+def delete_event_photos(event):
+    """
+    Delete the photos of ``event`` (a document, with its ``photo_gallery``
+    if not yet migrated) and their stored originals and variants. Objects
+    that cannot be deleted are logged and left in the bucket.
+    """
+    query = {'event_id': event['_id']}
+    photos = list(mongo.db.event_photos.find(query, {'url': 1, 'variants.url': 1}))
+    photos += [entry if isinstance(entry, dict) else {'url': entry} for entry in event.get('photo_gallery') or []]
+    urls = [url for photo in photos for url in [photo['url']] + [v['url'] for v in photo.get('variants') or []]]
+    keys = [key for key in map(photo_storage.key_for, urls) if key]
+
+    mongo.db.event_photos.delete_many(query)
+    try:
+        photo_storage.delete_many(keys)
+    except Exception as e:
+        current_app.logger.warning(f"Could not delete stored photos of event {event['_id']}: {e}")
+    return len(keys)
+
+
+def photo_page(event_id, limit, cursor=None):
+    """
+    Return ``(photos, next_cursor)``: up to ``limit`` photos of ``event_id``
+    taken after ``cursor`` in (uploaded_at, _id) descending order, the order
+    of the ``(event_id, uploaded_at, _id)`` index. ``next_cursor`` is None on
+    the last page. Raises ValueError for a malformed cursor.
+    """
+    query = {'event_id': ObjectId(event_id)}
+    if cursor:
+        uploaded_at, photo_id = decode_cursor(cursor)
+        query['$or'] = [
+            {'uploaded_at': {'$lt': uploaded_at}},
+            {'uploaded_at': uploaded_at, '_id': {'$lt': photo_id}}
+        ]
+    # One extra document tells whether there is a next page
+    photos = list(mongo.db.event_photos.find(query).sort([('uploaded_at', -1), ('_id', -1)]).limit(limit + 1))
+    if len(photos) <= limit:
+        return photos, None
+    photos = photos[:limit]
+    return photos, encode_cursor(photos[-1])
+
+
+def encode_cursor(photo):
+    # MongoDB keeps milliseconds, so the cursor names the stored value exactly
+    millis = (photo['uploaded_at'] - EPOCH) // timedelta(milliseconds=1)
+    return f"{millis}_{photo['_id']}"
+
+
+def decode_cursor(cursor):
+    millis, _, photo_id = cursor.partition('_')
+    if not millis.isdigit() or not ObjectId.is_valid(photo_id):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(photo_id)
+
+
+def serialize(photo):
+    return {
+        'photo_id': str(photo['_id']),
+        'url': photo['url'],
+        'width': photo.get('width'),
+        'height': photo.get('height'),
+        'variants': photo.get('variants', []),
+        'uploaded_by': str(photo['uploaded_by']) if photo.get('uploaded_by') else None,
+        'uploaded_at': photo['uploaded_at'].isoformat()
+    }
@@ -1,50 +1,322 @@
-import boto3
+# utils/file_upload.py - Photo storage: S3 through one pooled client, or a local stand-in
+import mimetypes
 import os
+import shutil
+import threading
+import time
+import uuid
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from werkzeug.utils import secure_filename
 from flask import current_app
-import uuid
+
+MB = 1024 * 1024
+
 
 def allowed_file(filename):
     """Checks if a file's extension is allowed."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-def upload_photo_to_cloud(file, folder_name=""):
+
+def object_key(filename, folder_name=""):
+    """Return a unique storage key for ``filename``, under ``folder_name`` if given"""
+    unique_filename = f"{uuid.uuid4().hex}-{secure_filename(filename)}"
+    return f"{folder_name}/{unique_filename}" if folder_name else unique_filename
+
+
+def content_type_for(filename):
+    """The Content-Type a photo called ``filename`` is stored with"""
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+class S3Storage:
     """
-    Uploads a file to a cloud storage bucket (e.g., AWS S3).
-    Returns the public URL of the uploaded file.
+    S3 (or any S3-compatible endpoint) through one client per process.
+
+    boto3 clients are thread-safe and keep a connection pool, so request
+    threads and upload workers share one instead of paying for a client,
+    credential lookup and TLS handshake per upload. Files larger than
+    ``UPLOAD_MULTIPART_THRESHOLD_MB`` are sent as multipart uploads, read
+    from the file part by part, so they are never held in memory whole.
     """
-    s3_bucket = current_app.config.get('CLOUD_STORAGE_BUCKET')
-    if not s3_bucket:
-        raise ValueError("CLOUD_STORAGE_BUCKET is not configured.")
-
-    # Secure the filename and add a unique prefix
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4().hex}-{filename}"
-    
-    # Prepend folder name if provided
-    s3_key = os.path.join(folder_name, unique_filename) if folder_name else unique_filename
-
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=current_app.config.get('AWS_ACCESS_KEY_ID'),
-        aws_secret_access_key=current_app.config.get('AWS_SECRET_ACCESS_KEY'),
-        region_name=current_app.config.get('AWS_REGION')
-    )
 
-    try:
-        s3.upload_fileobj(
-            file,
-            s3_bucket,
-            s3_key,
+    def __init__(self, config):
+        self.bucket = config.get('CLOUD_STORAGE_BUCKET')
+        self.public_url = config.get('CLOUD_STORAGE_PUBLIC_URL')
+        concurrency = config.get('UPLOAD_MULTIPART_CONCURRENCY', 4)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=config.get('UPLOAD_MULTIPART_THRESHOLD_MB', 8) * MB,
+            multipart_chunksize=config.get('UPLOAD_MULTIPART_CHUNK_MB', 8) * MB,
+            max_concurrency=concurrency,
+            use_threads=concurrency > 1
+        )
+        self._client_options = {
+            'aws_access_key_id': config.get('AWS_ACCESS_KEY_ID'),
+            'aws_secret_access_key': config.get('AWS_SECRET_ACCESS_KEY'),
+            'region_name': config.get('AWS_REGION'),
+            'endpoint_url': config.get('S3_ENDPOINT_URL'),
+            'config': BotoConfig(
+                # Every upload worker can run all of its multipart threads at once
+                max_pool_connections=config.get('UPLOAD_WORKERS', 4) * concurrency,
+                retries={'max_attempts': 3, 'mode': 'standard'}
+            )
+        }
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created on first use; a forked worker builds its own
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._client = boto3.session.Session().client('s3', **self._client_options)
+                    self._pid = pid
+        return self._client
+
+    def validate(self):
+        if not self.bucket:
+            raise ValueError("CLOUD_STORAGE_BUCKET is not configured.")
+
+    def upload(self, fileobj, key, content_type):
+        """Upload ``fileobj`` under ``key`` and return its public URL"""
+        self.validate()
+        self.client.upload_fileobj(
+            fileobj,
+            self.bucket,
+            key,
             ExtraArgs={
-                'ContentType': file.content_type,
+                'ContentType': content_type,
                 'ACL': 'public-read'
-            }
+            },
+            Config=self.transfer_config
+        )
+        return self.url(key)
+
+    def presign(self, key, content_type, max_bytes, expires):
+        """
+        Return a form (``url`` and ``fields``) for a client to POST the file
+        for ``key`` straight to the bucket. The signed policy pins the key,
+        the Content-Type and the size range, and expires after ``expires`` seconds.
+        """
+        self.validate()
+        post = self.client.generate_presigned_post(
+            self.bucket,
+            key,
+            Fields={'Content-Type': content_type, 'acl': 'public-read'},
+            Conditions=[
+                {'Content-Type': content_type},
+                {'acl': 'public-read'},
+                ['content-length-range', 1, max_bytes]
+            ],
+            ExpiresIn=expires
         )
+        return {'url': post['url'], 'fields': post['fields']}
+
+    def head(self, key):
+        """Return ``{'size', 'content_type'}`` of the object at ``key``, or None if there is none"""
+        try:
+            meta = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {'size': meta['ContentLength'], 'content_type': meta.get('ContentType')}
+
+    def download(self, key, fileobj):
+        self.client.download_fileobj(self.bucket, key, fileobj, Config=self.transfer_config)
+
+    def move(self, source, key, content_type):
+        """Copy the object at ``source`` to ``key`` inside the bucket, then delete ``source``"""
+        # Copies do not keep the ACL, so it is set again
+        self.client.copy(
+            {'Bucket': self.bucket, 'Key': source},
+            self.bucket,
+            key,
+            ExtraArgs={'ACL': 'public-read', 'ContentType': content_type, 'MetadataDirective': 'REPLACE'},
+            Config=self.transfer_config
+        )
+        self.delete(source)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        # DeleteObjects takes up to 1000 keys a call
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+
+    def url(self, key):
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{key}"
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+
+class LocalStorage:
+    """
+    Local stand-in for S3 (tests and development).
+
+    Objects are files under ``UPLOAD_FOLDER``, served by
+    ``GET /api/v1/uploads/files/<key>``. Presigned forms are posted to
+    ``POST /api/v1/uploads/files`` and checked like S3 checks its policies.
+    """
+
+    def __init__(self, config):
+        self.root = os.path.abspath(config.get('UPLOAD_FOLDER') or './uploads')
+        self.public_url = config.get('CLOUD_STORAGE_PUBLIC_URL') or '/api/v1/uploads/files'
+        self.serializer = URLSafeTimedSerializer(config.get('SECRET_KEY') or 'local-storage', salt='upload-policy')
+
+    def validate(self):
+        pass
+
+    def upload(self, fileobj, key, content_type):
+        """Copy ``fileobj`` to the file for ``key`` and return its URL"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so a reader never sees half a file
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(partial, 'wb') as out:
+                shutil.copyfileobj(fileobj, out, MB)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return self.url(key)
+
+    def presign(self, key, content_type, max_bytes, expires):
+        """Return a form for ``POST /api/v1/uploads/files``, signed with SECRET_KEY"""
+        policy = self.serializer.dumps({
+            'key': key,
+            'content_type': content_type,
+            'max_bytes': max_bytes,
+            'expires': expires
+        })
+        return {
+            'url': self.public_url.rstrip('/'),
+            'fields': {'key': key, 'Content-Type': content_type, 'policy': policy}
+        }
+
+    def receive(self, fields, fileobj, size):
+        """Store a file posted with a ``presign`` form; ValueError if the form does not hold"""
+        try:
+            policy, signed_at = self.serializer.loads(fields.get('policy', ''), return_timestamp=True)
+        except BadSignature:
+            raise ValueError("Invalid upload policy")
+        if time.time() - signed_at.timestamp() > policy['expires']:
+            raise ValueError("Upload policy expired")
+        if fields.get('key') != policy['key'] or fields.get('Content-Type') != policy['content_type']:
+            raise ValueError("Form does not match the upload policy")
+        if not 0 < size <= policy['max_bytes']:
+            raise ValueError("File size is outside the allowed range")
+        self.upload(fileobj, policy['key'], policy['content_type'])
+
+    def head(self, key):
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        return {'size': os.path.getsize(path), 'content_type': content_type_for(key)}
+
+    def download(self, key, fileobj):
+        with open(self.path(key), 'rb') as stored:
+            shutil.copyfileobj(stored, fileobj, MB)
+
+    def move(self, source, key, content_type):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.path(source), path)
+
+    def delete(self, key):
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def url(self, key):
+        return f"{self.public_url.rstrip('/')}/{key}"
+
+
+class PhotoStorage:
+    """Object storage for photos: S3 by default, ``UPLOAD_STORAGE=local`` for the stand-in"""
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        if app.config.get('UPLOAD_STORAGE') == 'local':
+            self.backend = LocalStorage(app.config)
+        else:
+            self.backend = S3Storage(app.config)
+
+    @property
+    def is_local(self):
+        return isinstance(self.backend, LocalStorage)
+
+    def validate(self):
+        self.backend.validate()
+
+    def upload(self, fileobj, key, content_type):
+        return self.backend.upload(fileobj, key, content_type)
+
+    def presign(self, key, content_type, max_bytes, expires):
+        return self.backend.presign(key, content_type, max_bytes, expires)
+
+    def head(self, key):
+        return self.backend.head(key)
+
+    def download(self, key, fileobj):
+        self.backend.download(key, fileobj)
+
+    def move(self, source, key, content_type):
+        self.backend.move(source, key, content_type)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def delete_many(self, keys):
+        self.backend.delete_many(keys)
+
+    def url(self, key):
+        return self.backend.url(key)
+
+    def key_for(self, url):
+        """The key of the object at ``url``, or None if it is not stored here"""
+        prefix = self.backend.url('')
+        if url and url.startswith(prefix) and len(url) > len(prefix):
+            return url[len(prefix):]
+        return None
+
+
+photo_storage = PhotoStorage()
+
+
+def upload_photo_to_cloud(file, folder_name=""):
+    """
+    Uploads a file to a cloud storage bucket (e.g., AWS S3).
+    Returns the public URL of the uploaded file.
+    """
+    photo_storage.validate()
+    key = object_key(file.filename, folder_name)
+    try:
+        return photo_storage.upload(file, key, file.content_type)
     except Exception as e:
         current_app.logger.error(f"Failed to upload to S3: {e}")
         return None
-
-    # Construct the public URL
-    return f"https://{s3_bucket}.s3.amazonaws.com/{s3_key}"
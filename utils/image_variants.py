@@ -0,0 +1,125 @@
+# utils/image_variants.py - Thumbnails and responsive WebP/AVIF variants of uploaded photos
+import io
+import math
+import posixpath
+from PIL import Image, ImageOps, features
+from utils.file_upload import photo_storage
+
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+ORIENTATION = 0x0112  # EXIF tag
+
+
+class ImageProcessor:
+    """
+    Builds smaller copies of an uploaded photo for clients to choose from.
+
+    For each format in ``IMAGE_VARIANT_FORMATS`` that this Pillow can encode
+    (avif needs Pillow 11.2+ built with libavif), it makes a square thumbnail
+    of ``IMAGE_THUMBNAIL_SIZE`` and one copy per ``IMAGE_VARIANT_WIDTHS`` width
+    below the original's. EXIF orientation is applied, then EXIF and XMP
+    (camera, GPS) are dropped; the ICC profile is kept so colours stay right.
+    Variants are stored next to the original (``<key>.w640.webp``) and
+    described as ``{'url', 'format', 'width', 'height', 'size', 'thumbnail'}``.
+    Runs in the upload pool (utils/upload_queue.py), never in a request.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.widths = (320, 640, 1280)
+        self.thumbnail_size = 160
+        self.formats = ('webp',)
+        self.quality = {'webp': 80, 'avif': 60}
+        self.max_pixels = 40_000_000
+        self.logger = None
+
+    def init_app(self, app):
+        """Read variant settings from the app config"""
+        self.enabled = app.config.get('IMAGE_VARIANTS_ENABLED', True)
+        widths = app.config.get('IMAGE_VARIANT_WIDTHS') or '320,640,1280'
+        self.widths = tuple(sorted(int(width) for width in widths.split(',') if width.strip()))
+        self.thumbnail_size = app.config.get('IMAGE_THUMBNAIL_SIZE', 160)
+        wanted = [name.strip().lower() for name in (app.config.get('IMAGE_VARIANT_FORMATS') or 'avif,webp').split(',')]
+        self.formats = tuple(name for name in wanted if name in CONTENT_TYPES and features.check_module(name))
+        missing = [name for name in wanted if name and name not in self.formats]
+        if missing:
+            app.logger.info(f"Image variants: {', '.join(missing)} not supported by this Pillow, "
+                            f"making {', '.join(self.formats) or 'none'}")
+        self.quality['webp'] = app.config.get('IMAGE_WEBP_QUALITY', 80)
+        self.quality['avif'] = app.config.get('IMAGE_AVIF_QUALITY', 60)
+        self.max_pixels = app.config.get('IMAGE_MAX_PIXELS', self.max_pixels)
+        self.logger = app.logger
+
+    def process(self, upload, path):
+        """
+        Upload pool step: store the variants of the photo at ``path``.
+
+        Returns the fields added to the upload record. A photo that cannot be
+        decoded keeps its original only.
+        """
+        if not self.enabled or not self.formats:
+            return {'variants': []}
+        try:
+            original, variants = self.render(path)
+        except Exception as e:
+            self.logger.warning(f"No variants for upload {upload['_id']}: {e}")
+            return {'variants': []}
+
+        stem = posixpath.splitext(upload['key'])[0]
+        stored = []
+        for name, fmt, image_bytes, width, height in variants:
+            key = f'{stem}.{name}.{fmt}'
+            url = photo_storage.upload(io.BytesIO(image_bytes), key, CONTENT_TYPES[fmt])
+            stored.append({
+                'url': url,
+                'format': fmt,
+                'width': width,
+                'height': height,
+                'size': len(image_bytes),
+                'thumbnail': name == 'thumb'
+            })
+        return {'width': original[0], 'height': original[1], 'variants': stored}
+
+    def render(self, path):
+        """Return ``((width, height), [(name, format, bytes, width, height), ...])`` for ``path``"""
+        with Image.open(path) as image:
+            width, height = image.size
+            if width * height > self.max_pixels:
+                raise ValueError(f"{width}x{height} exceeds IMAGE_MAX_PIXELS")
+            rotated = image.getexif().get(ORIENTATION) in (5, 6, 7, 8)
+            if rotated:
+                width, height = height, width
+            # JPEGs are decoded at a reduced scale when every variant is smaller
+            largest = max([w for w in self.widths if w < width] + [self.thumbnail_size])
+            box = (largest, math.ceil(largest * height / width))
+            image.draft('RGB', box[::-1] if rotated else box)
+            image = ImageOps.exif_transpose(image)
+            icc_profile = image.info.get('icc_profile')
+            image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+            # Nothing from the original's metadata is written to the variants
+            image.info = {}
+
+        sizes = [('thumb', ImageOps.fit(image, (self.thumbnail_size, self.thumbnail_size), Image.LANCZOS))]
+        for target in self.widths:
+            if target < width:
+                target_height = max(1, round(height * target / width))
+                sizes.append((f'w{target}', image.resize((target, target_height), Image.LANCZOS)))
+
+        variants = []
+        for name, resized in sizes:
+            for fmt in self.formats:
+                out = io.BytesIO()
+                options = {'quality': self.quality[fmt]}
+                if fmt == 'avif':
+                    options['speed'] = 8
+                if icc_profile:
+                    options['icc_profile'] = icc_profile
+                resized.save(out, fmt.upper(), **options)
+                variants.append((name, fmt, out.getvalue(), resized.width, resized.height))
+        return (width, height), variants
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+image_processor = ImageProcessor()
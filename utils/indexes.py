@@ -0,0 +1,225 @@
+# utils/indexes.py - Declarative MongoDB index registry, bootstrap and report
+import os
+import threading
+import time
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import OperationFailure
+
+# Every index the application relies on, by collection. Names are left to
+# MongoDB's defaults ("email_1", "event_id_1_timestamp_-1__id_-1", ...) so
+# indexes created by earlier versions are recognised. Add an entry here
+# instead of calling create_index in application code.
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('username', ASCENDING)], unique=True)
+    ],
+    'events': [
+        IndexModel([('location', GEOSPHERE)]),
+        # GET /events sorts everything by date
+        IndexModel([('date', ASCENDING)]),
+        # Organizer dashboards, feedback and RSVP stats: events of one organizer by date
+        IndexModel([('organizer_id', ASCENDING), ('date', ASCENDING)])
+    ],
+    'activities': [
+        # Feed: activities of followed users, newest first
+        IndexModel([('actor_id', ASCENDING), ('timestamp', DESCENDING)]),
+        # Event deletion removes its activities
+        IndexModel([('event_id', ASCENDING)])
+    ],
+    'messages': [
+        # Chat history of an event room, newest first (see utils/chat_history.py)
+        IndexModel([('event_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)])
+    ],
+    'chat_messages': [
+        # Conversation between two users in time order; each $or branch is an
+        # equality on both ids. Also serves distinct(receiver_id, {sender_id})
+        IndexModel([('sender_id', ASCENDING), ('receiver_id', ASCENDING), ('timestamp', DESCENDING)]),
+        # distinct(sender_id, {receiver_id}) for an organizer's chat list
+        IndexModel([('receiver_id', ASCENDING), ('sender_id', ASCENDING)])
+    ],
+    'event_photos': [
+        # Gallery pages of one event, newest first, _id breaking ties for the cursor
+        IndexModel([('event_id', ASCENDING), ('uploaded_at', DESCENDING), ('_id', DESCENDING)])
+    ],
+    'feedbacks': [
+        IndexModel([('event_id', ASCENDING)])
+    ],
+    'rsvps': [
+        # One RSVP per user and event (upserted); counted per event
+        IndexModel([('event_id', ASCENDING), ('user_id', ASCENDING)], unique=True),
+        # AI recommendations read every RSVP of one user
+        IndexModel([('user_id', ASCENDING)])
+    ],
+    'uploads': [
+        # Status records of background uploads are only polled shortly after
+        # the upload; drop them after a week
+        IndexModel([('created_at', ASCENDING)], expireAfterSeconds=7 * 24 * 3600)
+    ],
+    'revoked_tokens': [
+        IndexModel([('jti', ASCENDING)], unique=True),
+        IndexModel([('revoked_at', ASCENDING)]),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ]
+}
+
+
+# Index options that change behaviour; an existing index with the same key
+# but other values does not do what the registry says
+OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+_bootstrap_lock = threading.Lock()
+_bootstrap_pid = None
+_bootstrap_thread = None
+
+
+def _key(spec):
+    return tuple((field, direction) for field, direction in spec.items())
+
+
+def _options(index):
+    return {
+        option: bool(index.get(option)) if option in ('unique', 'sparse') else index.get(option)
+        for option in OPTIONS
+    }
+
+
+def _mismatch(existing, declared):
+    """Return ``{option: {'existing', 'declared'}}`` for options that differ"""
+    have, want = _options(existing), _options(declared)
+    return {option: {'existing': have[option], 'declared': want[option]}
+            for option in OPTIONS if have[option] != want[option]}
+
+
+def _declared(collection):
+    return {_key(model.document['key']): model.document['name'] for model in INDEXES[collection]}
+
+
+def ensure_indexes(db, logger=None):
+    """
+    Create every registered index that does not exist yet.
+
+    Index builds are idempotent, so this is safe to run on every deploy and
+    from several processes. A failing index (e.g. a unique index over
+    duplicate data) is reported and does not stop the others. An existing
+    index whose key matches but whose options (``OPTIONS``) differ is left
+    alone and reported as ``mismatched``: changing it means dropping and
+    rebuilding it (or ``collMod`` for a TTL), which is a deliberate step.
+    Returns ``{collection: {'created': [...], 'errors': {name: message},
+    'mismatched': {name: {option: {'existing', 'declared'}}}}}``.
+    """
+    results = {}
+    for collection, models in INDEXES.items():
+        existing = {_key(index['key']): index for index in db[collection].list_indexes()}
+        result = {'created': [], 'errors': {}, 'mismatched': {}}
+        for model in models:
+            name = model.document['name']
+            current = existing.get(_key(model.document['key']))
+            if current is not None:
+                mismatch = _mismatch(current, model.document)
+                if mismatch:
+                    result['mismatched'][name] = mismatch
+                    if logger:
+                        logger.warning(f"Index {collection}.{current['name']} differs from the registry: {mismatch}")
+                continue
+            try:
+                db[collection].create_indexes([model])
+                result['created'].append(name)
+            except OperationFailure as e:
+                result['errors'][name] = str(e)
+                if logger:
+                    logger.error(f"Index {collection}.{name} could not be created: {e}")
+        results[collection] = result
+    return results
+
+
+def _index_usage(db, collection):
+    try:
+        return {stat['name']: stat['accesses']['ops'] for stat in db[collection].aggregate([{'$indexStats': {}}])}
+    except Exception:
+        # $indexStats needs the clusterMonitor role or a real server
+        return None
+
+
+def index_report(db):
+    """
+    Compare the registry with the database.
+
+    For each registered collection reports indexes that are ``missing``,
+    ``undeclared`` (present but not in the registry), ``mismatched`` (same
+    key, different ``OPTIONS``) and ``unused`` (zero operations since the
+    server started, per ``$indexStats``; None when the statistics are not
+    available).
+    """
+    report = {}
+    for collection in INDEXES:
+        declared = _declared(collection)
+        models = {_key(model.document['key']): model.document for model in INDEXES[collection]}
+        indexes = {
+            _key(index['key']): index
+            for index in db[collection].list_indexes()
+            if index['name'] != '_id_'
+        }
+        existing = {key: index['name'] for key, index in indexes.items()}
+        usage = _index_usage(db, collection)
+        report[collection] = {
+            'missing': sorted(name for key, name in declared.items() if key not in existing),
+            'undeclared': sorted(name for key, name in existing.items() if key not in declared),
+            'mismatched': sorted(
+                index['name'] for key, index in indexes.items()
+                if key in models and _mismatch(index, models[key])
+            ),
+            'unused': None if usage is None else sorted(
+                name for name in existing.values() if usage.get(name, 0) == 0
+            )
+        }
+    return report
+
+
+def bootstrap_indexes(app):
+    """
+    Apply the registry according to ``INDEX_BOOTSTRAP``.
+
+    - ``background`` (default): build in a daemon thread at boot, retrying while
+      the database is unreachable; requests never wait for it
+    - ``off``: do nothing; run ``python scripts/migrate_indexes.py`` on deploy
+
+    The thread is started once per process, however many apps are created.
+    Each attempt resolves ``mongo.db`` anew, since a later ``init_app``
+    replaces (and closes) the client.
+    """
+    global _bootstrap_pid, _bootstrap_thread
+    mode = app.config.get('INDEX_BOOTSTRAP', 'background')
+    if mode == 'off':
+        return None
+    if mode != 'background':
+        raise ValueError(f"INDEX_BOOTSTRAP must be 'background' or 'off'; got '{mode}'")
+
+    with _bootstrap_lock:
+        if _bootstrap_pid == os.getpid():
+            return _bootstrap_thread
+        _bootstrap_pid = os.getpid()
+
+    from extensions import mongo
+    attempts = app.config.get('INDEX_BOOTSTRAP_ATTEMPTS', 5)
+    delay = app.config.get('INDEX_BOOTSTRAP_RETRY_SECONDS', 30)
+    logger = app.logger
+
+    def run():
+        for attempt in range(1, attempts + 1):
+            try:
+                db = mongo.db
+                if db is None:
+                    return
+                results = ensure_indexes(db, logger)
+                created = sum(len(r['created']) for r in results.values())
+                if created:
+                    logger.info(f"Created {created} MongoDB indexes")
+                return
+            except Exception as e:
+                logger.warning(f"Index bootstrap attempt {attempt}/{attempts} failed: {e}")
+                time.sleep(delay)
+
+    _bootstrap_thread = threading.Thread(target=run, name='index-bootstrap', daemon=True)
+    _bootstrap_thread.start()
+    return _bootstrap_thread
@@ -0,0 +1,72 @@
+# utils/json_provider.py - Flask JSON provider that understands BSON types
+import json
+from datetime import date, datetime
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library
+    orjson = None
+
+
+def bson_default(o):
+    """Encode the BSON / Python types that JSON has no type for"""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    return DefaultJSONProvider.default(o)
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for documents read straight from MongoDB.
+
+    ``ObjectId`` is encoded as its hex string and ``datetime`` as ISO 8601
+    (the format handlers produced by hand), so views can return documents
+    without converting every field. Serialization uses orjson when it is
+    installed, which encodes datetimes and containers natively in C; values
+    orjson rejects (integers beyond 64 bits) go through the standard library.
+    """
+
+    @staticmethod
+    def default(o):
+        return bson_default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return self._orjson_dumps(obj, indent=False).decode()
+            except TypeError:
+                pass
+        kwargs.setdefault('default', bson_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson is not None:
+            try:
+                body = self._orjson_dumps(obj, indent) + b'\n'
+                return self._app.response_class(body, mimetype=self.mimetype)
+            except TypeError:
+                pass
+        return super().response(obj)
+
+    def _orjson_dumps(self, obj, indent):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=bson_default, option=option)
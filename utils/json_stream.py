@@ -0,0 +1,161 @@
+# utils/json_stream.py - Large result sets streamed as a JSON array or NDJSON
+import itertools
+import bson
+from flask import current_app, request, has_request_context, stream_with_context
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _unless_missing(field, expression):
+    # $toString and $map turn a missing field into null; the document path
+    # leaves the key out, so do the same
+    return {'$cond': [{'$eq': [{'$type': f'${field}'}, 'missing']}, '$$REMOVE', expression]}
+
+
+def to_string(field):
+    """Aggregation expression: an ObjectId field as its hex string (missing fields stay missing)"""
+    return _unless_missing(field, {'$toString': f'${field}'})
+
+
+def to_string_list(field):
+    """Aggregation expression: an array of ObjectIds as hex strings (missing fields stay missing)"""
+    return _unless_missing(field, {'$map': {'input': f'${field}', 'in': {'$toString': '$$this'}}})
+
+
+def to_iso_date(field):
+    """
+    Aggregation expression: a date as ``datetime.isoformat()`` renders it.
+
+    Dates are stored with millisecond precision, which Python shows as six
+    digits and only when non-zero. Values that are not dates pass through and
+    missing fields stay missing.
+    """
+    value = f'${field}'
+    return {'$cond': [
+        {'$ne': [{'$type': value}, 'date']},
+        value,
+        {'$cond': [
+            {'$eq': [{'$millisecond': value}, 0]},
+            {'$dateToString': {'date': value, 'format': '%Y-%m-%dT%H:%M:%S'}},
+            {'$dateToString': {'date': value, 'format': '%Y-%m-%dT%H:%M:%S.%L000'}}
+        ]}
+    ]}
+
+
+def json_shape(id_field=None, strings=(), string_lists=(), dates=()):
+    """
+    Return the pipeline stages that make documents JSON-shaped on the server.
+
+    ``_id`` is renamed to ``id_field`` (or dropped), so the decoded documents
+    hold only strings, numbers, lists and dicts and need no conversion pass.
+    """
+    fields = {}
+    if id_field:
+        fields[id_field] = to_string('_id')
+    fields.update({field: to_string(field) for field in strings})
+    fields.update({field: to_string_list(field) for field in string_lists})
+    fields.update({field: to_iso_date(field) for field in dates})
+    return [{'$addFields': fields}, {'$project': {'_id': 0}}]
+
+
+def raw_batches(collection, pipeline, batch_size=None):
+    """
+    Run ``pipeline`` and yield each server batch as a list of documents.
+
+    Batches come back as raw BSON and are decoded in one C call each, instead
+    of building the documents one at a time through the cursor.
+    """
+    options = {'batchSize': batch_size} if batch_size else {}
+    for batch in collection.aggregate_raw_batches(pipeline, **options):
+        yield bson.decode_all(batch)
+
+
+def document_batches(cursor, batch_size, id_field=None):
+    """
+    Yield lists of up to ``batch_size`` documents from a cursor.
+
+    The cursor fetches the same number of documents per round trip, so only
+    one batch is held in memory at a time. ``_id`` is renamed to ``id_field``
+    when given.
+    """
+    cursor.batch_size(batch_size)
+    batch = []
+    for doc in cursor:
+        if id_field:
+            doc[id_field] = doc.pop('_id')
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def negotiated_mimetype():
+    """``application/x-ndjson`` when the client prefers it, else ``application/json``"""
+    best = request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE])
+    return NDJSON_MIMETYPE if best == NDJSON_MIMETYPE else JSON_MIMETYPE
+
+
+def stream_response(key, batches):
+    """
+    Stream batches of documents in the format the client asked for.
+
+    ``Accept: application/x-ndjson`` gets one document per line; anything else
+    gets ``{"<key>": [...]}``, the same body ``jsonify`` would build.
+    """
+    if negotiated_mimetype() == NDJSON_MIMETYPE:
+        return ndjson_response(batches)
+    return json_array_response(key, batches)
+
+
+def _started(batches):
+    # The first batch is fetched before returning, so query errors still reach
+    # the view's error handling instead of cutting off a response that has
+    # already started. Later batches are fetched inside the request context
+    # (stream_with_context), so getMores are profiled against the endpoint.
+    batches = iter(batches)
+    return itertools.chain([next(batches, [])], batches)
+
+
+def _in_context(chunks):
+    return stream_with_context(chunks) if has_request_context() else chunks
+
+
+def json_array_response(key, batches):
+    """
+    Stream ``{"<key>": [...]}`` built from batches of JSON-ready documents.
+
+    Each batch is encoded with the app's JSON provider in one call, and the
+    body is the same as ``jsonify({key: documents})``.
+    """
+    provider = current_app.json
+    prefix = provider.dumps({key: []})[:-2]  # '{"<key>":['
+    batches = _started(batches)
+
+    def generate():
+        yield prefix
+        first = True
+        for docs in batches:
+            if not docs:
+                continue
+            encoded = provider.dumps(docs)[1:-1]
+            yield encoded if first else ',' + encoded
+            first = False
+        yield ']}\n'
+
+    return current_app.response_class(_in_context(generate()), mimetype=provider.mimetype)
+
+
+def ndjson_response(batches):
+    """Stream batches of documents as newline-delimited JSON, one chunk per batch"""
+    provider = current_app.json
+    batches = _started(batches)
+
+    def generate():
+        for docs in batches:
+            if docs:
+                yield '\n'.join(provider.dumps(doc) for doc in docs) + '\n'
+
+    return current_app.response_class(_in_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,185 @@
+# utils/message_buffer.py - Write-behind persistence for chat messages
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+
+_DUPLICATE_KEY = 11000
+
+
+class MessageWriteBuffer:
+    """
+    Buffers chat messages in memory and persists them with ``insert_many``.
+
+    Handlers call ``add`` and broadcast immediately; a background thread
+    flushes every ``MESSAGE_FLUSH_INTERVAL_MS`` or as soon as
+    ``MESSAGE_FLUSH_BATCH_SIZE`` messages are waiting. Failed batches are
+    retried on the next flush (documents already carry their ``_id`` so a
+    retry cannot insert duplicates), and the buffer is drained at interpreter
+    exit. A hard crash can lose at most one flush interval of messages.
+    """
+
+    def __init__(self, collection_name='messages'):
+        self.collection_name = collection_name
+        self.flush_interval = 0.25
+        self.batch_size = 100
+        self.max_pending = 50000
+        self.logger = None
+        self._pending = deque()
+        self._inflight = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._pid = None
+        # Metrics
+        self.flushed_total = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.dropped_total = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+
+    def init_app(self, app):
+        """Read buffer settings from the app config"""
+        self.flush_interval = app.config.get('MESSAGE_FLUSH_INTERVAL_MS', 250) / 1000.0
+        self.batch_size = app.config.get('MESSAGE_FLUSH_BATCH_SIZE', self.batch_size)
+        self.max_pending = app.config.get('MESSAGE_BUFFER_MAX_PENDING', self.max_pending)
+        self.logger = app.logger
+
+    def add(self, message):
+        """Queue a message document for persistence; it gets its ``_id`` here if it has none"""
+        message.setdefault('_id', ObjectId())
+        self._ensure_started()
+        with self._lock:
+            self._pending.append(message)
+            depth = len(self._pending)
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def pending_for(self, event_id):
+        """Return queued (not yet persisted) messages for an event, oldest first"""
+        # The batch being written counts until insert_many returns, so a
+        # reader never misses messages that are in neither place yet
+        with self._lock:
+            return [m for m in self._inflight + list(self._pending) if m['event_id'] == event_id]
+
+    def discard_event(self, event_id):
+        """Drop queued messages of a deleted event so they are never written"""
+        with self._lock:
+            self._pending = deque(m for m in self._pending if m['event_id'] != event_id)
+
+    def flush(self):
+        """Persist every queued message; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            retry = []
+            rejected = []
+            try:
+                mongo.db_for('bulk')[self.collection_name].insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicates were written by an earlier attempt; any other
+                # per-document error would fail again, so it is not retried
+                rejected = [err for err in e.details.get('writeErrors', [])
+                            if err.get('code') != _DUPLICATE_KEY]
+                if rejected:
+                    self.dropped_total += len(rejected)
+                    self._log_error(f"Chat message flush rejected {len(rejected)} messages: {rejected[0].get('errmsg')}")
+            except Exception as e:
+                retry = batch
+                self._log_error(f"Chat message flush failed: {e}")
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._flush_ms_total += elapsed_ms
+            written = len(batch) - len(retry) - len(rejected)
+            self.flushed_total += written
+            if retry:
+                self.failed_flushes += 1
+                self._requeue(retry)
+            with self._lock:
+                self._inflight = []
+            return written
+
+    def _requeue(self, docs):
+        with self._lock:
+            self._pending.extendleft(reversed(docs))
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                # Bound memory while the database is unreachable
+                for _ in range(overflow):
+                    self._pending.popleft()
+                self.dropped_total += overflow
+                self._log_error(f"Chat message buffer full; dropped {overflow} oldest messages")
+
+    def close(self):
+        """Stop the flusher and drain the buffer"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval * 4 + 5)
+        if self.depth:
+            self.flush()
+
+    @property
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        """Return buffer depth and flush latency metrics"""
+        return {
+            'depth': self.depth,
+            'flushed_total': self.flushed_total,
+            'flush_count': self.flush_count,
+            'failed_flushes': self.failed_flushes,
+            'dropped_total': self.dropped_total,
+            'last_flush_ms': round(self.last_flush_ms, 3),
+            'max_flush_ms': round(self.max_flush_ms, 3),
+            'avg_flush_ms': round(self._flush_ms_total / self.flush_count, 3) if self.flush_count else 0.0
+        }
+
+    def _ensure_started(self):
+        # Started lazily so each (forked) worker process owns its own flusher
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='message-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self._log_error(f"Chat message flusher error: {e}")
+
+    def _log_error(self, message):
+        if self.logger is not None:
+            self.logger.error(message)
+
+
+message_buffer = MessageWriteBuffer()
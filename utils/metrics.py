@@ -0,0 +1,117 @@
+# utils/metrics.py - Lock-protected histograms and counters shared by the metrics subsystem
+import bisect
+import threading
+
+# Upper bounds (milliseconds) for request and database latency
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Upper bounds for small counts (database round trips per request, ...)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    Recording is one bisect and a few additions under a lock, so it is cheap
+    enough for every request. Percentiles are interpolated inside the bucket
+    that holds them, which is accurate to the bucket resolution.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self):
+        """Return ``(bucket_counts, sum, count, max)``; bucket counts are not cumulative"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count, self._max
+
+    @staticmethod
+    def _percentile(buckets, counts, count, maximum, q):
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = buckets[index - 1] if index > 0 else 0.0
+                upper = buckets[index] if index < len(buckets) else maximum
+                upper = min(upper, maximum)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return maximum
+
+    def percentile(self, q):
+        """Estimate the ``q`` quantile (0 < q <= 1)"""
+        counts, _, count, maximum = self.snapshot()
+        return self._percentile(self.buckets, counts, count, maximum, q)
+
+    def summary(self):
+        """Return count, average, p50/p95/p99 and max"""
+        counts, total, count, maximum = self.snapshot()
+        result = {'count': count, 'avg': round(total / count, 3) if count else 0.0, 'max': round(maximum, 3)}
+        for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            result[name] = round(self._percentile(self.buckets, counts, count, maximum, q), 3)
+        return result
+
+
+class HistogramFamily:
+    """Histograms of one metric keyed by label values (e.g. per route)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the histogram for ``values``, creating it on first use"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def items(self):
+        """Return ``[(label_values, histogram), ...]``"""
+        with self._lock:
+            return list(self._children.items())
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class CounterFamily:
+    """Monotonic counters of one metric keyed by label values"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount=1):
+        """Add ``amount`` to the counter for ``values``"""
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def items(self):
+        """Return ``[(label_values, value), ...]``"""
+        with self._lock:
+            return list(self._values.items())
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
@@ -0,0 +1,180 @@
+# utils/mongo_client.py - MongoClient options from config and connection pool metrics
+import importlib.util
+import threading
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
+from pymongo.write_concern import WriteConcern
+from utils.metrics import LATENCY_BUCKETS_MS, Histogram
+
+# Python package each wire compressor needs; zlib ships with Python
+_COMPRESSOR_PACKAGES = {'zstd': 'zstandard', 'snappy': 'snappy', 'zlib': None}
+
+_READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primarypreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondarypreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST
+}
+
+# Operation classes with their own write concern:
+# - default: ordinary user-facing writes
+# - bulk: high-volume, loss-tolerant writes (activity feed, chat flushes)
+# - critical: writes that must survive a primary failover (accounts, logout)
+WRITE_CLASSES = ('default', 'bulk', 'critical')
+
+
+def available_compressors(names):
+    """Return the compressors from ``names`` whose packages are installed, in order"""
+    available = []
+    for name in (n.strip().lower() for n in names.split(',')):
+        if name not in _COMPRESSOR_PACKAGES:
+            continue
+        package = _COMPRESSOR_PACKAGES[name]
+        if package is None or importlib.util.find_spec(package) is not None:
+            available.append(name)
+    return available
+
+
+def _parse_w(value):
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
+
+def write_concern_for(config, kind):
+    """Build the WriteConcern configured for a write class"""
+    if kind not in WRITE_CLASSES:
+        raise ValueError(f"Unknown write class '{kind}'")
+    prefix = f'MONGO_WRITE_CONCERN_{kind.upper()}'
+    w = _parse_w(config.get(prefix, 1))
+    journal = config.get(f'{prefix}_JOURNAL')
+    wtimeout = config.get('MONGO_WRITE_CONCERN_TIMEOUT_MS') if w != 1 and w != 0 else None
+    return WriteConcern(w=w, j=journal, wtimeout=wtimeout or None)
+
+
+def mongo_client_options(config):
+    """Return the ``MongoClient`` keyword arguments for the app config"""
+    options = {
+        'maxPoolSize': config.get('MONGO_MAX_POOL_SIZE', 50),
+        'minPoolSize': config.get('MONGO_MIN_POOL_SIZE', 10),
+        'maxIdleTimeMS': config.get('MONGO_MAX_IDLE_TIME_MS', 30000),
+        'maxConnecting': config.get('MONGO_MAX_CONNECTING', 2),
+        'waitQueueTimeoutMS': config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000),
+        'serverSelectionTimeoutMS': config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        'connectTimeoutMS': config.get('MONGO_CONNECT_TIMEOUT_MS', 5000),
+        'socketTimeoutMS': config.get('MONGO_SOCKET_TIMEOUT_MS', 5000),
+        'retryWrites': config.get('MONGO_RETRY_WRITES', True),
+        'retryReads': True
+    }
+
+    compressors = available_compressors(config.get('MONGO_COMPRESSORS') or '')
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+        if 'zlib' in compressors:
+            options['zlibCompressionLevel'] = config.get('MONGO_ZLIB_COMPRESSION_LEVEL', 6)
+
+    read_preference = (config.get('MONGO_READ_PREFERENCE') or 'primary').replace('_', '').lower()
+    if read_preference not in _READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_READ_PREFERENCE '{config.get('MONGO_READ_PREFERENCE')}'")
+    options['read_preference'] = _READ_PREFERENCES[read_preference]
+
+    default = write_concern_for(config, 'default')
+    options['w'] = default.document.get('w', 1)
+    if 'j' in default.document:
+        options['journal'] = default.document['j']
+    if 'wtimeout' in default.document:
+        options['wTimeoutMS'] = default.document['wtimeout']
+    return options
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """
+    Connection pool listener that keeps counters for monitoring.
+
+    Tracks open and checked-out connections, checkout failures and how long
+    requests waited for a connection (``duration`` of checkout events), i.e.
+    how close the pool is to saturation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter (used when a new client is created)"""
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts_total = 0
+            self.checkout_failures = {}
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self.wait_ms = Histogram(LATENCY_BUCKETS_MS)
+            self.pools_cleared = 0
+
+    def stats(self):
+        """Return a snapshot of the counters"""
+        with self._lock:
+            return {
+                'open': self.open,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'checkouts_total': self.checkouts_total,
+                'checkout_failures': dict(self.checkout_failures),
+                'avg_wait_ms': round(self.wait_ms_total / self.checkouts_total, 3) if self.checkouts_total else 0.0,
+                'max_wait_ms': round(self.wait_ms_max, 3),
+                'pools_cleared': self.pools_cleared
+            }
+
+    # ConnectionPoolListener interface
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        wait_ms = (getattr(event, 'duration', 0) or 0) * 1000
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_checked_out(self, event):
+        wait_ms = (getattr(event, 'duration', 0) or 0) * 1000
+        with self._lock:
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.checkouts_total += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self.wait_ms.observe(wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+
+pool_metrics = PoolMetrics()
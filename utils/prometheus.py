@@ -0,0 +1,193 @@
+# utils/prometheus.py - Prometheus text exposition of the application metrics
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_START_TIME = time.time()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def header(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, names=(), values=()):
+        self.lines.append(f'{name}{_labels(names, values)} {value}')
+
+    def metric(self, name, kind, help_text, value, names=(), values=()):
+        self.header(name, kind, help_text)
+        self.sample(name, value, names, values)
+
+    def histogram(self, name, help_text, family, names, scale=1.0):
+        """Write a HistogramFamily; ``scale`` converts bucket units (ms -> s)"""
+        self.header(name, 'histogram', help_text)
+        for values, histogram in family.items():
+            self._histogram_samples(name, histogram, names, values, scale)
+
+    def single_histogram(self, name, help_text, histogram, scale=1.0):
+        self.header(name, 'histogram', help_text)
+        self._histogram_samples(name, histogram, (), (), scale)
+
+    def _histogram_samples(self, name, histogram, names, values, scale):
+        counts, total, count, _ = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            le = 'le="%g"' % (bound * scale)
+            self.lines.append(f'{name}_bucket{_labels(names, values, le)} {cumulative}')
+        le = 'le="+Inf"'
+        self.lines.append(f'{name}_bucket{_labels(names, values, le)} {count}')
+        self.lines.append(f'{name}_sum{_labels(names, values)} {total * scale:.6f}')
+        self.lines.append(f'{name}_count{_labels(names, values)} {count}')
+
+
+def _room_kind(room):
+    for prefix in ('user_', 'organizer_', 'geo_'):
+        if room.startswith(prefix):
+            return prefix[:-1]
+    return 'event'
+
+
+def socket_room_stats(server):
+    """Return connected clients and ``{kind: (rooms, members, largest)}`` for the '/' namespace"""
+    rooms = getattr(getattr(server, 'manager', None), 'rooms', None) or {}
+    namespace = {}
+    for _ in range(3):
+        try:
+            # Copy first: clients join and leave rooms from other threads
+            namespace = dict(rooms.get('/', {}))
+            sids = set(namespace.pop(None, {}))
+            sizes = {room: len(members) for room, members in list(namespace.items())}
+            break
+        except RuntimeError:
+            continue
+    else:
+        sids, sizes = set(), {}
+    kinds = {}
+    for room, size in sizes.items():
+        if room in sids or not size:
+            # Every client also sits in a private room named after its sid
+            continue
+        kind = _room_kind(str(room))
+        count, members, largest = kinds.get(kind, (0, 0, 0))
+        kinds[kind] = (count + 1, members + size, max(largest, size))
+    return len(sids), kinds
+
+
+def render_metrics():
+    """Render every application metric in Prometheus text format"""
+    from extensions import mongo, socketio
+    from utils.request_metrics import request_metrics
+    from utils.message_buffer import message_buffer
+    from utils.chat_history import chat_history
+    from utils.coalescer import rsvp_broadcaster, rsvp_total_broadcaster
+    from utils.user_cache import user_cache
+    from utils.mongo_client import pool_metrics
+    from utils.response_cache import response_cache
+    from utils.compression import response_compressor
+    from utils.upload_queue import upload_queue
+
+    out = _Writer()
+    out.metric('process_start_time_seconds', 'gauge', 'Start time of the process since the epoch.', f'{_START_TIME:.3f}')
+
+    # HTTP
+    route = ('blueprint', 'route')
+    out.header('http_requests_total', 'counter', 'HTTP requests by route, method and status.')
+    for values, value in request_metrics.requests.items():
+        out.sample('http_requests_total', value, route + ('method', 'status'), values)
+    out.histogram('http_request_duration_seconds', 'HTTP request latency.', request_metrics.latency, route, 0.001)
+    out.histogram('http_request_db_seconds', 'Time spent in MongoDB per HTTP request.', request_metrics.db_time, route, 0.001)
+    out.histogram('http_request_db_round_trips', 'MongoDB round trips per HTTP request.', request_metrics.db_calls, route)
+
+    # Socket.IO (this process only)
+    server = getattr(socketio, 'server', None)
+    connected, kinds = socket_room_stats(server)
+    out.metric('socketio_connected_clients', 'gauge', 'Socket.IO clients connected to this process.', connected)
+    out.header('socketio_rooms', 'gauge', 'Socket.IO rooms with members in this process, by kind.')
+    for kind, (count, _, _) in sorted(kinds.items()):
+        out.sample('socketio_rooms', count, ('kind',), (kind,))
+    out.header('socketio_room_members', 'gauge', 'Members of Socket.IO rooms in this process, by kind.')
+    for kind, (_, members, _) in sorted(kinds.items()):
+        out.sample('socketio_room_members', members, ('kind',), (kind,))
+    out.header('socketio_room_max_members', 'gauge', 'Size of the largest Socket.IO room, by kind.')
+    for kind, (_, _, largest) in sorted(kinds.items()):
+        out.sample('socketio_room_max_members', largest, ('kind',), (kind,))
+    out.header('socketio_emits_total', 'counter', 'Socket.IO events emitted by this process.')
+    for event, value in sorted(getattr(socketio, 'emit_counts', {}).items()):
+        out.sample('socketio_emits_total', value, ('event',), (event,))
+
+    # MongoDB pool
+    pool = mongo.pool_stats()
+    out.metric('mongo_pool_connections_open', 'gauge', 'Open MongoDB connections.', pool['open'])
+    out.metric('mongo_pool_connections_checked_out', 'gauge', 'MongoDB connections in use.', pool['checked_out'])
+    out.metric('mongo_pool_max_size', 'gauge', 'Configured maxPoolSize.', pool['max_pool_size'] or 0)
+    out.metric('mongo_pool_checkouts_total', 'counter', 'Connections checked out of the pool.', pool['checkouts_total'])
+    out.header('mongo_pool_checkout_failures_total', 'counter', 'Failed connection checkouts by reason.')
+    for reason, value in sorted(pool['checkout_failures'].items()):
+        out.sample('mongo_pool_checkout_failures_total', value, ('reason',), (reason,))
+    out.metric('mongo_pool_cleared_total', 'counter', 'Times the pool was cleared after errors.', pool['pools_cleared'])
+    out.single_histogram('mongo_pool_checkout_wait_seconds', 'Time waited for a pooled connection.',
+                         pool_metrics.wait_ms, 0.001)
+
+    # Background queues and caches
+    buffer = message_buffer.stats()
+    out.metric('message_buffer_depth', 'gauge', 'Chat messages waiting to be written.', buffer['depth'])
+    out.metric('message_buffer_flushed_total', 'counter', 'Chat messages written to MongoDB.', buffer['flushed_total'])
+    out.metric('message_buffer_failed_flushes_total', 'counter', 'Chat message flushes that failed.', buffer['failed_flushes'])
+    out.metric('message_buffer_dropped_total', 'counter', 'Chat messages dropped.', buffer['dropped_total'])
+    out.metric('chat_history_rooms', 'gauge', 'Chat rooms with history held in memory.', chat_history.stats()['rooms'])
+    broadcasters = [(b, b.stats()) for b in (rsvp_broadcaster, rsvp_total_broadcaster)]
+    for name, key, kind, help_text in (
+            ('broadcast_pending', 'pending', 'gauge', 'Coalesced broadcasts waiting for their window.'),
+            ('broadcast_updates_total', 'received_total', 'counter', 'Updates received by coalescing broadcasters.'),
+            ('broadcast_emits_total', 'emitted_total', 'counter', 'Emits made by coalescing broadcasters.')):
+        out.header(name, kind, help_text)
+        for broadcaster, stats in broadcasters:
+            out.sample(name, stats[key], ('event', 'counter'), (broadcaster.event_name, broadcaster.count_field))
+    cache = user_cache.stats()
+    out.metric('user_cache_size', 'gauge', 'Users held in the process cache.', cache['size'])
+    out.metric('user_cache_hits_total', 'counter', 'User cache hits.', cache['hits'])
+    out.metric('user_cache_misses_total', 'counter', 'User cache misses.', cache['misses'])
+    responses = response_cache.stats()
+    out.metric('response_cache_hits_total', 'counter', 'GET responses served from the response cache.', responses['hits'])
+    out.metric('response_cache_misses_total', 'counter', 'GET responses rendered by their view.', responses['misses'])
+    out.metric('response_cache_not_modified_total', 'counter', '304 responses to If-None-Match.', responses['not_modified'])
+
+    # Background photo uploads
+    uploads = upload_queue.stats()
+    out.metric('photo_uploads_pending', 'gauge', 'Photo uploads queued or running in this worker.', uploads['pending'])
+    out.metric('photo_uploads_max_pending', 'gauge', 'UPLOAD_QUEUE_SIZE: pending uploads before new ones are refused.',
+               uploads['max_pending'])
+    out.metric('photo_uploads_reserved_total', 'counter', 'Direct photo uploads handed a presigned form.',
+               uploads['reserved_total'])
+    out.metric('photo_uploads_submitted_total', 'counter', 'Photo uploads accepted.', uploads['submitted_total'])
+    out.metric('photo_uploads_completed_total', 'counter', 'Photo uploads stored.', uploads['completed_total'])
+    out.metric('photo_uploads_failed_total', 'counter', 'Photo uploads that failed.', uploads['failed_total'])
+    out.metric('photo_uploads_rejected_total', 'counter', 'Photo uploads refused because the queue was full.',
+               uploads['rejected_total'])
+
+    # Response compression
+    compression = response_compressor.stats()
+    for name, key, help_text in (
+            ('http_compressed_responses_total', 'responses', 'Compressed HTTP responses by encoding.'),
+            ('http_compression_input_bytes_total', 'bytes_in', 'Body bytes before compression.'),
+            ('http_compression_output_bytes_total', 'bytes_out', 'Body bytes sent after compression.')):
+        out.header(name, 'counter', help_text)
+        for encoding, counts in sorted(compression.items()):
+            out.sample(name, counts[key], ('encoding',), (encoding,))
+
+    return '\n'.join(out.lines) + '\n'
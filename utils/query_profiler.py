@@ -0,0 +1,334 @@
+# utils/query_profiler.py - Per-endpoint MongoDB query shapes, timings and sampled explains
+import atexit
+import json
+import queue
+import random
+import threading
+from flask import has_request_context, request
+from pymongo.monitoring import CommandListener
+
+# Commands worth profiling, with the field holding their filter
+_FILTER_FIELDS = {
+    'find': 'filter',
+    'count': 'query',
+    'distinct': 'query',
+    'aggregate': None,
+    'update': None,
+    'delete': None,
+    'findAndModify': 'query'
+}
+# Keys that must not be passed to explain
+_DROP_KEYS = {'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'writeConcern', 'readConcern'}
+
+_GEO_OPS = {'$near', '$nearSphere', '$geoWithin', '$geoIntersects'}
+_RANGE_OPS = {'$gt', '$gte', '$lt', '$lte', '$ne', '$nin', '$exists', '$regex', '$not', '$type', '$size', '$all'}
+
+
+def _field_kind(value):
+    if not isinstance(value, dict) or not any(k.startswith('$') for k in value):
+        return 'eq'
+    ops = set(value)
+    if ops & _GEO_OPS:
+        return 'geo'
+    if ops <= {'$eq'}:
+        return 'eq'
+    if ops <= {'$in'}:
+        return 'in'
+    return 'range' if ops & _RANGE_OPS else 'other'
+
+
+def filter_shape(query):
+    """
+    Reduce a filter to its shape: ``{field: kind}`` where kind is eq, in, range,
+    geo or other, with ``$or`` branches kept as a list of shapes.
+    """
+    shape = {}
+    for key, value in (query or {}).items():
+        if key == '$and':
+            for part in value:
+                shape.update(filter_shape(part))
+        elif key in ('$or', '$nor'):
+            shape[key] = [filter_shape(branch) for branch in value]
+        elif key.startswith('$'):
+            shape[key] = 'other'
+        else:
+            shape[key] = _field_kind(value)
+    return shape
+
+
+def _first_match(pipeline):
+    for stage in pipeline or []:
+        if '$match' in stage:
+            return stage['$match']
+        if '$geoNear' in stage:
+            return {stage['$geoNear'].get('key', 'location'): {'$near': 1}}
+    return {}
+
+
+def command_shape(command_name, command):
+    """Return ``(collection, filter_shape, sort)`` of a profiled command"""
+    collection = command.get(command_name)
+    sort = {}
+    if command_name == 'aggregate':
+        query = _first_match(command.get('pipeline'))
+        for stage in command.get('pipeline') or []:
+            if '$sort' in stage:
+                sort = dict(stage['$sort'])
+                break
+    elif command_name == 'update':
+        query = (command.get('updates') or [{}])[0].get('q')
+    elif command_name == 'delete':
+        query = (command.get('deletes') or [{}])[0].get('q')
+    else:
+        query = command.get(_FILTER_FIELDS[command_name])
+        sort = dict(command.get('sort') or {})
+    return collection, filter_shape(query), sort
+
+
+def shape_key(command_name, collection, shape, sort):
+    """Stable text key of a query shape"""
+    key = f"{command_name} {collection} {json.dumps(shape, sort_keys=True)}"
+    return key + f" sort {json.dumps(sort)}" if sort else key
+
+
+def suggest_index(shape, sort):
+    """
+    Suggest indexes for a query shape following the equality, sort, range rule.
+
+    Returns a list of key lists (one per ``$or`` branch when the filter has one),
+    e.g. ``[[('organizer_id', 1), ('date', 1)]]``; an empty list when no
+    index would help.
+    """
+    if '$or' in shape:
+        common = {k: v for k, v in shape.items() if k != '$or'}
+        suggestions = []
+        for branch in shape['$or']:
+            for keys in suggest_index({**common, **branch}, sort):
+                if keys not in suggestions:
+                    suggestions.append(keys)
+        return suggestions
+
+    fields = {k: v for k, v in shape.items() if not k.startswith('$')}
+    geo = [f for f, kind in fields.items() if kind == 'geo']
+    if geo:
+        return [[(geo[0], '2dsphere')]]
+    keys = [(f, 1) for f, kind in fields.items() if kind in ('eq', 'in')]
+    keys += [(f, d) for f, d in sort.items() if f not in fields]
+    keys += [(f, 1) for f, kind in fields.items() if kind in ('range', 'other') and f not in sort]
+    return [keys] if keys else []
+
+
+def _find_key(document, key):
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        for value in document.values():
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    elif isinstance(document, list):
+        for value in document:
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _plan_stages(plan, stages=None):
+    stages = [] if stages is None else stages
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append((plan['stage'], plan.get('indexName')))
+        for key in ('inputStage', 'queryPlan'):
+            _plan_stages(plan.get(key), stages)
+        for child in plan.get('inputStages', []):
+            _plan_stages(child, stages)
+    return stages
+
+
+def summarize_explain(explain):
+    """Extract docs/keys examined, returned and the winning plan from explain output"""
+    stats = _find_key(explain, 'executionStats') or {}
+    stages = _plan_stages(_find_key(explain, 'winningPlan'))
+    return {
+        'docs_examined': stats.get('totalDocsExamined'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'returned': stats.get('nReturned'),
+        'stages': [stage for stage, _ in stages],
+        'indexes': sorted({index for _, index in stages if index}),
+        'collscan': any(stage == 'COLLSCAN' for stage, _ in stages)
+    }
+
+
+class _ShapeStats:
+    __slots__ = ('endpoint', 'command', 'collection', 'shape', 'sort', 'count', 'total_ms',
+                 'max_ms', 'slow', 'returned', 'explain', 'explains')
+
+    def __init__(self, endpoint, command, collection, shape, sort):
+        self.endpoint = endpoint
+        self.command = command
+        self.collection = collection
+        self.shape = shape
+        self.sort = sort
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.returned = 0
+        self.explain = None
+        self.explains = 0
+
+
+class QueryProfiler(CommandListener):
+    """
+    Command listener recording every query shape per endpoint.
+
+    For each (endpoint, shape) it keeps call count, total/max duration, slow
+    calls and documents returned. The first execution of a shape, then a
+    ``QUERY_EXPLAIN_SAMPLE_RATE`` fraction of them, is re-run with
+    ``explain`` (executionStats) on a background thread to record documents
+    examined and whether the plan is a collection scan. Disabled unless
+    ``QUERY_PROFILER_ENABLED`` is set; see ``scripts/index_advisor.py``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 100
+        self.sample_rate = 0.01
+        self.dump_path = None
+        self.logger = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._inflight = {}
+        self._explain_queue = queue.Queue(maxsize=1000)
+        self._explain_thread = None
+
+    def init_app(self, app):
+        """Register with the Mongo client when enabled in the app config"""
+        self.enabled = bool(app.config.get('QUERY_PROFILER_ENABLED'))
+        self.slow_ms = app.config.get('QUERY_SLOW_MS', 100)
+        self.sample_rate = app.config.get('QUERY_EXPLAIN_SAMPLE_RATE', 0.01)
+        self.dump_path = app.config.get('QUERY_PROFILE_PATH')
+        self.logger = app.logger
+        if not self.enabled:
+            return
+        from extensions import mongo
+        mongo.add_event_listener(self)
+        if self.dump_path:
+            atexit.register(self.dump, self.dump_path)
+
+    # CommandListener interface
+    def started(self, event):
+        # explain commands issued by this profiler are not in _FILTER_FIELDS
+        if event.command_name not in _FILTER_FIELDS:
+            return
+        try:
+            collection, shape, sort = command_shape(event.command_name, event.command)
+        except Exception:
+            return
+        self._inflight[event.request_id] = (_current_endpoint(), collection, shape, sort,
+                                            event.database_name, event.command)
+
+    def succeeded(self, event):
+        entry = self._inflight.pop(event.request_id, None)
+        if entry is not None:
+            self._record(event, entry, _returned(event.command_name, event.reply))
+
+    def failed(self, event):
+        entry = self._inflight.pop(event.request_id, None)
+        if entry is not None:
+            self._record(event, entry, 0)
+
+    def _record(self, event, entry, returned):
+        endpoint, collection, shape, sort, database, command = entry
+        key = (endpoint, shape_key(event.command_name, collection, shape, sort))
+        duration_ms = event.duration_micros / 1000.0
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _ShapeStats(endpoint, event.command_name, collection, shape, sort)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.returned += returned
+            if duration_ms >= self.slow_ms:
+                stats.slow += 1
+            explain = stats.explains == 0 or random.random() < self.sample_rate
+            if explain:
+                stats.explains += 1
+        if duration_ms >= self.slow_ms and self.logger:
+            self.logger.warning(f"Slow query ({duration_ms:.1f} ms) in {endpoint}: {key[1]}")
+        if explain:
+            self._queue_explain(key, database, command)
+
+    def _queue_explain(self, key, database, command):
+        cmd = {k: v for k, v in command.items() if not k.startswith('$') and k not in _DROP_KEYS}
+        try:
+            self._explain_queue.put_nowait((key, database, cmd))
+        except queue.Full:
+            return
+        if self._explain_thread is None or not self._explain_thread.is_alive():
+            self._explain_thread = threading.Thread(target=self._run_explains, name='query-explain', daemon=True)
+            self._explain_thread.start()
+
+    def _run_explains(self):
+        from extensions import mongo
+        while True:
+            key, database, cmd = self._explain_queue.get()
+            try:
+                result = mongo.client[database].command({'explain': cmd, 'verbosity': 'executionStats'})
+                summary = summarize_explain(result)
+            except Exception as e:
+                summary = {'error': str(e)}
+            with self._lock:
+                if key in self._stats:
+                    self._stats[key].explain = summary
+
+    def report(self):
+        """Return the recorded shapes, most expensive first"""
+        with self._lock:
+            rows = [{
+                'endpoint': s.endpoint,
+                'command': s.command,
+                'collection': s.collection,
+                'shape': s.shape,
+                'sort': s.sort,
+                'count': s.count,
+                'total_ms': round(s.total_ms, 3),
+                'avg_ms': round(s.total_ms / s.count, 3),
+                'max_ms': round(s.max_ms, 3),
+                'slow': s.slow,
+                'avg_returned': round(s.returned / s.count, 1),
+                'explain': s.explain
+            } for s in self._stats.values()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def dump(self, path):
+        """Write ``report()`` as JSON to ``path``"""
+        with open(path, 'w') as handle:
+            json.dump(self.report(), handle, indent=2, default=str)
+
+    def reset(self):
+        """Forget every recorded shape"""
+        with self._lock:
+            self._stats.clear()
+
+
+def _current_endpoint():
+    if not has_request_context():
+        return f"thread:{threading.current_thread().name}"
+    event = getattr(request, 'event', None)
+    if event:
+        return f"socket:{event.get('message')}"
+    return request.endpoint or request.path
+
+
+def _returned(command_name, reply):
+    if command_name in ('find', 'aggregate'):
+        return len((reply.get('cursor') or {}).get('firstBatch') or [])
+    if command_name == 'distinct':
+        return len(reply.get('values') or [])
+    return reply.get('n', 0) or 0
+
+
+query_profiler = QueryProfiler()
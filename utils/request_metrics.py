@@ -0,0 +1,133 @@
+# utils/request_metrics.py - Per-request database round trips, DB time and route latency
+import threading
+import time
+import bson
+from flask import g, has_request_context, request
+from pymongo.monitoring import CommandListener
+from utils.metrics import COUNT_BUCKETS, LATENCY_BUCKETS_MS, CounterFamily, HistogramFamily
+
+
+class RequestMetrics(CommandListener):
+    """
+    Request middleware plus a Mongo command listener.
+
+    Every command issued while handling a request is counted against it,
+    with its duration and (with ``METRICS_DB_BYTES``) the BSON size of the
+    command and reply. After the request the totals are returned in a
+    ``Server-Timing`` header (``db``, ``app`` and ``total``) and recorded in
+    per-route histograms of latency, DB time and round trips; for streamed
+    responses the histograms are recorded once the body has been sent. Requests with
+    more than ``METRICS_DB_CALLS_WARNING`` round trips are logged, which is
+    how N+1 query loops show up.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.count_bytes = False
+        self.calls_warning = 25
+        self.logger = None
+        self.latency = HistogramFamily(LATENCY_BUCKETS_MS)
+        self.db_time = HistogramFamily(LATENCY_BUCKETS_MS)
+        self.db_calls = HistogramFamily(COUNT_BUCKETS)
+        self.requests = CounterFamily()
+        self.db_bytes = {}
+        self._bytes_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Install the request hooks and the command listener"""
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.count_bytes = app.config.get('METRICS_DB_BYTES', False)
+        self.calls_warning = app.config.get('METRICS_DB_CALLS_WARNING', 25)
+        self.logger = app.logger
+        if not self.enabled:
+            return
+        from extensions import mongo
+        mongo.add_event_listener(self)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g._metrics = [time.perf_counter(), 0, 0, 0]  # started, db calls, db microseconds, db bytes
+
+    def _after_request(self, response):
+        stats = g.get('_metrics')
+        if stats is None:
+            return response
+        started, calls, db_micros, db_bytes = stats
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = db_micros / 1000.0
+        route = request.endpoint or 'unmatched'
+        labels = (request.blueprint or '', route, request.method, str(response.status_code))
+
+        # Headers go out before a streamed body, so they can only time the
+        # handler; the histograms wait until the body has been sent and also
+        # count the queries the generator makes (with stream_with_context)
+        timing = f'db;dur={db_ms:.2f};desc="{calls} queries", app;dur={max(total_ms - db_ms, 0):.2f}, total;dur={total_ms:.2f}'
+        if self.count_bytes:
+            timing += f', db-bytes;desc="{db_bytes}"'
+        response.headers.add('Server-Timing', timing)
+        if response.is_streamed:
+            response.call_on_close(lambda: self._observe(stats, labels))
+        else:
+            g.pop('_metrics')
+            self._observe(stats, labels)
+        return response
+
+    def _observe(self, stats, labels):
+        started, calls, db_micros, db_bytes = stats
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = db_micros / 1000.0
+        blueprint, route, method, status = labels
+
+        self.latency.labels(blueprint, route).observe(total_ms)
+        self.db_time.labels(blueprint, route).observe(db_ms)
+        self.db_calls.labels(blueprint, route).observe(calls)
+        self.requests.inc(blueprint, route, method, status)
+        if self.count_bytes:
+            with self._bytes_lock:
+                self.db_bytes[route] = self.db_bytes.get(route, 0) + db_bytes
+        if calls > self.calls_warning and self.logger:
+            self.logger.warning(f"{route} made {calls} database round trips ({db_ms:.1f} ms)")
+
+    # CommandListener interface
+    def started(self, event):
+        if self.count_bytes and has_request_context():
+            stats = g.get('_metrics')
+            if stats is not None:
+                stats[3] += len(bson.encode(event.command))
+
+    def succeeded(self, event):
+        self._record(event, event.reply)
+
+    def failed(self, event):
+        self._record(event, None)
+
+    def _record(self, event, reply):
+        if not has_request_context():
+            return
+        stats = g.get('_metrics')
+        if stats is None:
+            return
+        stats[1] += 1
+        stats[2] += event.duration_micros
+        if self.count_bytes and reply:
+            stats[3] += len(bson.encode(reply))
+
+    def report(self):
+        """Return per-route latency, DB time and round-trip summaries"""
+        db_time = dict(self.db_time.items())
+        db_calls = dict(self.db_calls.items())
+        routes = {}
+        for labels, histogram in self.latency.items():
+            entry = {
+                'latency_ms': histogram.summary(),
+                'db_ms': db_time[labels].summary() if labels in db_time else None,
+                'db_calls': db_calls[labels].summary() if labels in db_calls else None
+            }
+            if self.count_bytes:
+                entry['db_bytes_total'] = self.db_bytes.get(labels[1], 0)
+            routes[labels[1]] = entry
+        return routes
+
+
+request_metrics = RequestMetrics()
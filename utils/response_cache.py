@@ -0,0 +1,275 @@
+# utils/response_cache.py - Cached responses of public GET endpoints with ETags
+import hashlib
+import pickle
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request
+from utils.cache import TTLCache
+from utils.json_stream import negotiated_mimetype
+from utils.compression import response_compressor
+
+
+class MemoryBackend:
+    """Per-process backend: an LRU/TTL cache plus generation counters"""
+
+    def __init__(self, max_size=1000):
+        self._entries = TTLCache(max_size=max_size)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, value, ttl)
+
+    def generations(self, tags):
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._generations.clear()
+
+
+class RedisBackend:
+    """Backend shared by every worker, so a write invalidates all of them"""
+
+    def __init__(self, url, prefix='rc:'):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._redis.get(self._prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._redis.set(self._prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def generations(self, tags):
+        values = self._redis.mget([f'{self._prefix}gen:{tag}' for tag in tags]) if tags else []
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        pipe = self._redis.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f'{self._prefix}gen:{tag}')
+        pipe.execute()
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    """
+    Cache for the bodies of public GET endpoints.
+
+    Entries are keyed by endpoint, URL arguments and the sorted query string,
+    and carry a strong ETag so clients revalidating with ``If-None-Match``
+    get a 304 without a body. Compressed copies of an entry are made once
+    per encoding and stored with it. Each endpoint declares tags (``'events'``,
+    ``'event:{event_id}'``) and write endpoints call ``invalidate`` with the
+    tags they affect: that bumps a generation counter which is part of every
+    key, so stale entries are never read again and expire on their own.
+
+    With the in-process backend other workers keep serving their copy for at
+    most ``RESPONSE_CACHE_TTL_SECONDS``; set ``RESPONSE_CACHE_URL`` to a Redis
+    URL to share entries and invalidations. Backend errors bypass the cache.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 30
+        self.max_body_bytes = 1024 * 1024
+        self.backend = MemoryBackend()
+        self.logger = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Choose the backend and read cache settings from the app config"""
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL_SECONDS', 30)
+        self.max_body_bytes = app.config.get('RESPONSE_CACHE_MAX_BODY_BYTES', self.max_body_bytes)
+        self.logger = app.logger
+        url = app.config.get('RESPONSE_CACHE_URL')
+        if url:
+            self.backend = RedisBackend(url)
+        else:
+            self.backend = MemoryBackend(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+
+    def invalidate(self, *tags):
+        """Make every cached response carrying one of ``tags`` unreachable"""
+        if not self.enabled or not tags:
+            return
+        try:
+            self.backend.bump([str(tag) for tag in tags])
+        except Exception as e:
+            self._log_error(f"Response cache invalidation of {tags} failed: {e}")
+
+    def stats(self):
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'not_modified': self.not_modified}
+
+    def cached(self, *tags, ttl=None):
+        """
+        Decorator for a public GET view.
+
+        ``tags`` are formatted with the view arguments, e.g.
+        ``@response_cache.cached('user:{user_id}')``. Only 200 responses are
+        stored; ETags are added to every 200 response.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                entry_tags = [tag.format(**kwargs) for tag in tags]
+                key = self._key(entry_tags, kwargs)
+                entry = self._get(key) if key else None
+                if entry is not None:
+                    self._count('hits')
+                    return self._encode(key, entry, self._respond(*entry[:3]))
+
+                self._count('misses')
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry_ttl = self.ttl if ttl is None else ttl
+                if response.is_streamed:
+                    # Stored once fully sent; this response goes out without an ETag
+                    if key:
+                        response.response = self._tee(key, response.iter_encoded(), response.mimetype, entry_ttl)
+                    response.vary.add('Accept')
+                    return response
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                response.set_etag(etag)
+                response = self._conditional(response)
+                if key and len(body) <= self.max_body_bytes:
+                    entry = _entry(body, response.mimetype, etag, entry_ttl)
+                    return self._encode(key, entry, response, stored=False)
+                return response
+            return wrapper
+        return decorator
+
+    def _count(self, counter):
+        # Request threads update these concurrently; += is not atomic
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _key(self, tags, view_args):
+        try:
+            generations = self.backend.generations(tags)
+        except Exception as e:
+            self._log_error(f"Response cache unavailable: {e}")
+            return None
+        query = urlencode(sorted(request.args.items(multi=True)))
+        path = urlencode(sorted((k, str(v)) for k, v in view_args.items()))
+        versions = '.'.join(str(g) for g in generations)
+        # Streaming views answer JSON or NDJSON depending on Accept
+        return f'{request.endpoint}|{path}|{query}|{negotiated_mimetype()}|{versions}'
+
+    def _tee(self, key, chunks, mimetype, ttl):
+        # Pass a streamed body through, keeping a copy while it stays under
+        # max_body_bytes; a response cut off by the client is never stored
+        parts = []
+        size = 0
+        for chunk in chunks:
+            yield chunk
+            if parts is not None:
+                size += len(chunk)
+                if size <= self.max_body_bytes:
+                    parts.append(chunk)
+                else:
+                    parts = None
+        if parts is not None:
+            body = b''.join(parts)
+            self._set(key, _entry(body, mimetype, hashlib.sha1(body).hexdigest(), ttl), ttl)
+
+    def _encode(self, key, entry, response, stored=True):
+        # Each encoding of an entry is compressed once, at the higher cached
+        # level, and kept with the entry for the rest of its lifetime
+        body, _, _, expires_at, encoded = entry
+        encoding = response_compressor.negotiate(response) if response.status_code == 200 else None
+        if encoding is not None and encoding not in encoded:
+            encoded[encoding] = response_compressor.compress(body, encoding, cached=True)
+            stored = False
+        if not stored:
+            remaining = expires_at - time.time()
+            if remaining > 0:
+                self._set(key, entry, remaining)
+        if encoding is not None:
+            response_compressor.encode(response, encoding, encoded[encoding])
+        return response
+
+    def _get(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            self._log_error(f"Response cache read failed: {e}")
+            return None
+
+    def _set(self, key, value, ttl):
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            self._log_error(f"Response cache write failed: {e}")
+
+    def _respond(self, body, mimetype, etag):
+        response = current_app.response_class(body, status=200, mimetype=mimetype)
+        response.set_etag(etag)
+        return self._conditional(response)
+
+    def _conditional(self, response):
+        # Clients may reuse their copy only after revalidating it
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        response.vary.add('Accept')
+        etag = response.get_etag()[0]
+        matched = _matching_etag(etag, request.if_none_match)
+        if matched is None:
+            return response
+        # Compressed bodies carry "<etag>:<encoding>"; echo the validator the
+        # client holds
+        self._count('not_modified')
+        not_modified = current_app.response_class(status=304)
+        not_modified.set_etag(matched)
+        not_modified.headers['Cache-Control'] = response.headers['Cache-Control']
+        not_modified.headers['Vary'] = response.headers['Vary']
+        return not_modified
+
+    def _log_error(self, message):
+        if self.logger:
+            self.logger.warning(message)
+
+
+def _entry(body, mimetype, etag, ttl):
+    # (body, mimetype, etag, expires_at, {encoding: compressed body})
+    return (body, mimetype, etag, time.time() + ttl, {})
+
+
+def _matching_etag(etag, if_none_match):
+    """Return the validator from ``If-None-Match`` that matches ``etag``, or None"""
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return etag
+    for tag in if_none_match.as_set(include_weak=True):
+        if tag == etag or tag.startswith(etag + ':'):
+            return tag
+    return None
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,77 @@
+# utils/rooms.py - Socket.IO room names used to address real-time updates
+import math
+from config import Config
+
+# Cap on the number of geo cells one socket may subscribe to at once
+MAX_REGION_CELLS = 25
+
+
+def user_room(user_id):
+    """Room joined by every authenticated connection of a user"""
+    return f"user_{user_id}"
+
+
+def organizer_room(organizer_id):
+    """Room for an organizer's dashboards (RSVP counters, feedback)"""
+    return f"organizer_{organizer_id}"
+
+
+def event_room(event_id):
+    """Room of everyone following an event; also its chat room"""
+    return str(event_id)
+
+
+def _cell(value, size):
+    return int(math.floor(value / size))
+
+
+def _wrap(lon_cell, size):
+    # Longitude cells repeat every 360 degrees: the cells on both sides of
+    # the antimeridian are neighbours, and 180 is the same cell as -180
+    count = max(1, round(360 / size))
+    return (lon_cell + count // 2) % count - count // 2
+
+
+def geo_room(longitude, latitude, cell_degrees=None):
+    """Room of the grid cell containing a point, used to announce new events nearby"""
+    size = cell_degrees or Config.GEO_ROOM_CELL_DEGREES
+    return f"geo_{_cell(latitude, size)}_{_wrap(_cell(longitude, size), size)}"
+
+
+def geo_rooms_around(longitude, latitude, radius_km, cell_degrees=None):
+    """
+    Return the rooms of every grid cell overlapping a circle's bounding box.
+
+    Sockets subscribe to these to receive ``event_created`` for new events
+    within roughly ``radius_km``. The list is capped at ``MAX_REGION_CELLS``
+    cells, nearest to the centre first. Latitudes stop at the poles and
+    longitudes wrap around the antimeridian.
+    """
+    size = cell_degrees or Config.GEO_ROOM_CELL_DEGREES
+    radius_km = max(radius_km, 0)
+    lat_delta = radius_km / 111.0
+    lon_delta = radius_km / max(111.0 * math.cos(math.radians(latitude)), 1e-6)
+
+    centre = (_cell(latitude, size), _cell(longitude, size))
+    # Cells further than MAX_REGION_CELLS from the centre on either axis can
+    # never be among the nearest MAX_REGION_CELLS, so large radii (and the
+    # huge longitude span near the poles) stay cheap
+    reach = MAX_REGION_CELLS
+    lat_range = range(max(_cell(max(latitude - lat_delta, -90), size), centre[0] - reach),
+                      min(_cell(min(latitude + lat_delta, 90), size), centre[0] + reach) + 1)
+    lon_range = range(max(_cell(longitude - lon_delta, size), centre[1] - reach),
+                      min(_cell(longitude + lon_delta, size), centre[1] + reach) + 1)
+
+    cells = sorted(
+        ((lat, lon) for lat in lat_range for lon in lon_range),
+        key=lambda c: ((c[0] - centre[0]) ** 2 + (c[1] - centre[1]) ** 2, c)
+    )
+    rooms = []
+    for lat, lon in cells:
+        room = f"geo_{lat}_{_wrap(lon, size)}"
+        # Very large cells can wrap onto one another
+        if room not in rooms:
+            rooms.append(room)
+            if len(rooms) == MAX_REGION_CELLS:
+                break
+    return rooms
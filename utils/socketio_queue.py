@@ -0,0 +1,89 @@
+# utils/socketio_queue.py - Pub/sub backends for Socket.IO fan-out across workers
+import pickle
+import queue
+import threading
+import socketio
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """
+    In-process pub/sub bus for Socket.IO servers.
+
+    Every server created with the same channel in this process receives the
+    emits, room changes and disconnects of the others, exactly as servers
+    connected through Redis would. Used for tests and single-process
+    deployments that host several Socket.IO servers; messages are pickled so
+    no objects are shared between servers.
+    """
+
+    name = 'memory'
+
+    _subscribers = {}
+    _subscribers_lock = threading.Lock()
+
+    def __init__(self, channel='flask-socketio', write_only=False, logger=None, max_queue=10000):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._queue = queue.Queue(maxsize=max_queue)
+        if not write_only:
+            with self._subscribers_lock:
+                self._subscribers.setdefault(channel, []).append(self._queue)
+
+    def _publish(self, data):
+        message = pickle.dumps(data)
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.get(self.channel, []))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # A stalled server must not block the others
+                self._get_logger().warning('Socket.IO memory queue full; message dropped')
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+    def close(self):
+        """Detach this server from the channel"""
+        with self._subscribers_lock:
+            subscribers = self._subscribers.get(self.channel, [])
+            if self._queue in subscribers:
+                subscribers.remove(self._queue)
+
+
+def on_remote_emit(manager, listener):
+    """
+    Call ``listener(event, data, room)`` for every emit another worker
+    publishes through ``manager`` (any ``socketio.PubSubManager``), once it
+    has been delivered to the clients of this one.
+    """
+    handle_emit = manager._handle_emit
+
+    def _handle_emit(message):
+        handle_emit(message)
+        # Emits of this worker pass through here too
+        if message.get('host_id') != manager.host_id:
+            listener(message['event'], message['data'], message.get('room'))
+
+    manager._handle_emit = _handle_emit
+
+
+def socketio_queue_options(config):
+    """
+    Return the ``socketio.init_app`` keyword arguments for the configured queue.
+
+    ``SOCKETIO_MESSAGE_QUEUE`` selects the backend:
+
+    - unset: no queue, broadcasts stay inside this process (single worker)
+    - ``memory://``: :class:`LocalPubSubManager`, shared by servers in this process
+    - ``redis://`` / ``rediss://``: Redis or any Redis-compatible server
+      (Valkey, KeyDB, ...); required to run several workers or nodes
+    - ``kafka://``, ``zmq+tcp://``, ``amqp://``: the other python-socketio backends
+    """
+    url = config.get('SOCKETIO_MESSAGE_QUEUE')
+    channel = config.get('SOCKETIO_CHANNEL', 'flask-socketio')
+    if not url:
+        return {}
+    if url.startswith('memory://'):
+        return {'client_manager': LocalPubSubManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
@@ -0,0 +1,182 @@
+# utils/token_blocklist.py - JWT revocation list for logout
+import hashlib
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from extensions import mongo, jwt
+from utils.cache import TTLCache
+
+# Revocations written by other workers are picked up by re-reading this far
+# behind the previous sync, so clock skew and slow inserts are not missed.
+_SYNC_LOOKBACK = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys.
+
+    ``capacity`` and ``error_rate`` size the bit array and the number of hash
+    functions. Membership tests can return false positives but never false
+    negatives.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: derive k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key):
+        if key in self:
+            return
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class TokenBlocklist:
+    """
+    Revoked JWT store backed by a MongoDB TTL collection.
+
+    Every authenticated request asks whether its token was revoked. The answer
+    is "no" for almost all of them, so lookups are answered by an in-process
+    Bloom filter first; only Bloom hits (revoked tokens and rare false
+    positives) consult a small LRU and then MongoDB. Revocations made by other
+    workers are merged into the filter every ``JWT_BLOCKLIST_SYNC_SECONDS`` by
+    a background thread, never by a request. Until the first sync of a
+    process has succeeded every token is looked up.
+
+    When that lookup fails the token is treated as revoked (the request gets
+    a 401), unless ``JWT_BLOCKLIST_FAIL_OPEN`` prefers availability.
+    """
+
+    collection_name = 'revoked_tokens'
+
+    def __init__(self):
+        self.capacity = 100000
+        self.error_rate = 0.001
+        self.sync_interval = 5
+        self.fail_open = False
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._lru = TTLCache(max_size=1024, ttl=self.sync_interval)
+        self._lock = threading.Lock()
+        self._synced_since = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.logger = None
+
+    def init_app(self, app):
+        """Configure from the app and register as the JWT blocklist loader"""
+        self.capacity = app.config.get('JWT_BLOCKLIST_CAPACITY', self.capacity)
+        self.error_rate = app.config.get('JWT_BLOCKLIST_ERROR_RATE', self.error_rate)
+        self.sync_interval = app.config.get('JWT_BLOCKLIST_SYNC_SECONDS', self.sync_interval)
+        self.fail_open = app.config.get('JWT_BLOCKLIST_FAIL_OPEN', False)
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._lru = TTLCache(
+            max_size=app.config.get('JWT_BLOCKLIST_LRU_SIZE', 1024),
+            ttl=self.sync_interval
+        )
+        self._synced_since = None
+        self.logger = app.logger
+
+        @jwt.token_in_blocklist_loader
+        def _check_if_token_revoked(jwt_header, jwt_payload):
+            return self.is_revoked(jwt_payload.get('jti'))
+
+    @property
+    def collection(self):
+        return mongo.db_for('critical')[self.collection_name]
+
+    def revoke(self, jti, expires_at):
+        """Revoke ``jti`` until ``expires_at`` (a naive UTC datetime)"""
+        self.collection.update_one(
+            {'jti': jti},
+            {'$set': {'expires_at': expires_at, 'revoked_at': datetime.utcnow()}},
+            upsert=True
+        )
+        with self._lock:
+            self._bloom.add(jti)
+        self._lru.set(jti, True)
+
+    def is_revoked(self, jti):
+        """Return True if ``jti`` has been revoked"""
+        if not jti:
+            return False
+        self._ensure_started()
+        if self._synced_since is not None and jti not in self._bloom:
+            return False
+
+        revoked = self._lru.get(jti)
+        if revoked is None:
+            try:
+                revoked = self.collection.find_one({'jti': jti}, {'_id': 1}) is not None
+            except Exception as e:
+                self._log_error(f"Token revocation lookup failed: {e}")
+                return not self.fail_open
+            self._lru.set(jti, revoked)
+        return revoked
+
+    def stop(self):
+        self._stopped.set()
+
+    def _ensure_started(self):
+        # Started lazily so each (forked) worker process owns its own thread
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='token-blocklist-sync', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        stopped = self._stopped
+        while not stopped.is_set():
+            try:
+                # revoke() waits, so it never adds to a filter being replaced
+                with self._lock:
+                    self._sync()
+            except Exception as e:
+                self._log_error(f"Token blocklist sync failed: {e}")
+            stopped.wait(self.sync_interval)
+
+    def _sync(self):
+        if mongo.db is None:
+            return
+        started_at = datetime.utcnow()
+
+        # Rebuild from scratch once expired tokens (removed by the TTL index)
+        # have filled the filter past its sizing
+        full_reload = self._synced_since is None or self._bloom.count > self.capacity
+        query = {} if full_reload else {'revoked_at': {'$gte': self._synced_since}}
+        bloom = BloomFilter(self.capacity, self.error_rate) if full_reload else self._bloom
+
+        for doc in self.collection.find(query, {'jti': 1, '_id': 0}):
+            bloom.add(doc['jti'])
+            self._lru.delete(doc['jti'])
+
+        self._bloom = bloom
+        self._synced_since = started_at - _SYNC_LOOKBACK
+
+    def _log_error(self, message):
+        if self.logger is not None:
+            self.logger.error(message)
+
+
+token_blocklist = TokenBlocklist()
@@ -0,0 +1,300 @@
+# utils/upload_queue.py - Photo uploads run by a bounded worker pool, tracked in `uploads`
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from extensions import mongo
+from utils.file_upload import content_type_for, object_key, photo_storage
+
+
+class UploadQueueFull(Exception):
+    """Raised by ``submit`` when ``UPLOAD_QUEUE_SIZE`` uploads are already pending"""
+
+
+class InvalidUpload(Exception):
+    """Raised by ``confirm`` when a direct upload is missing, too large or already confirmed"""
+
+
+class UploadQueue:
+    """
+    Runs photo uploads off the request thread.
+
+    ``submit`` copies the request file to a spool file (the request stream is
+    gone once the response is sent), records an ``uploads`` document and hands
+    the upload to a pool of ``UPLOAD_WORKERS`` threads, so the view can answer
+    with the upload id at once. At most ``UPLOAD_QUEUE_SIZE`` uploads wait or
+    run per process; beyond that ``submit`` raises ``UploadQueueFull``.
+
+    When the object is stored, ``process(upload, path)`` can derive more from
+    the spooled file (e.g. image variants); the fields it returns are added to
+    the upload. Then ``on_complete(upload)`` runs (e.g. to add the photo to
+    its event) and the upload becomes ``done``. Both run in an app context;
+    any error marks the upload ``failed``. Clients poll
+    ``GET /api/v1/uploads/<id>``.
+
+    Direct uploads skip the API server for the photo bytes: ``reserve``
+    records an ``awaiting_upload`` upload and returns a presigned form the
+    client posts the file with, straight to storage; ``confirm`` then checks
+    the stored object and queues ``process`` and ``on_complete`` as above.
+    The form is for an ``incoming/`` key and stays usable until it expires,
+    so the worker first moves the object to the upload's ``key``, which was
+    never presigned: what is processed and served cannot be replaced later.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.logger = None
+        self.workers = 4
+        self.max_pending = 64
+        self.spool_dir = None
+        self.max_bytes = 16 * 1024 * 1024
+        self.url_expires = 900
+        self.reserved = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = {}
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read pool settings from the app config"""
+        self.app = app
+        self.logger = app.logger
+        self.workers = app.config.get('UPLOAD_WORKERS', 4)
+        self.max_pending = app.config.get('UPLOAD_QUEUE_SIZE', 64)
+        self.spool_dir = app.config.get('UPLOAD_SPOOL_DIR') or None
+        self.max_bytes = app.config.get('UPLOAD_MAX_BYTES', self.max_bytes)
+        self.url_expires = app.config.get('UPLOAD_URL_EXPIRES', self.url_expires)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, file, folder_name, kind, user_id, on_complete=None, process=None, **fields):
+        """
+        Queue ``file`` for upload under ``folder_name`` and return its record.
+
+        ``fields`` are stored on the record (e.g. ``event_id``) for
+        ``on_complete`` to use. The record's ``url`` is where the photo will
+        be once the upload is ``done``.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise UploadQueueFull(f"{self.max_pending} uploads already pending")
+        spool_path = None
+        try:
+            photo_storage.validate()
+            spool_path = self._spool(file)
+            upload = self._record(file.filename, folder_name, kind, user_id, 'pending',
+                                  content_type=file.content_type, size=os.path.getsize(spool_path), **fields)
+            self._collection().insert_one(upload)
+            self._start(upload, spool_path, process, on_complete)
+        except Exception:
+            self._slots.release()
+            if spool_path:
+                os.remove(spool_path)
+            raise
+
+        self._count('submitted')
+        return upload
+
+    def reserve(self, filename, folder_name, kind, user_id, **fields):
+        """
+        Record a direct upload of ``filename`` and return ``(upload, form)``.
+
+        ``form`` holds the ``url`` and ``fields`` the client posts the file
+        with (the file goes last, as ``file``); it is valid for
+        ``UPLOAD_URL_EXPIRES`` seconds and accepts up to ``UPLOAD_MAX_BYTES``.
+        """
+        photo_storage.validate()
+        upload = self._record(filename, folder_name, kind, user_id, 'awaiting_upload',
+                              content_type=content_type_for(filename), size=None, **fields)
+        upload['upload_key'] = f"incoming/{upload['key']}"
+        form = photo_storage.presign(upload['upload_key'], upload['content_type'], self.max_bytes, self.url_expires)
+        self._collection().insert_one(upload)
+        self._count('reserved')
+        return upload, form
+
+    def confirm(self, upload, on_complete=None, process=None):
+        """
+        Queue a reserved upload once the client has stored its file.
+
+        Raises ``InvalidUpload`` when there is no object at the upload's key,
+        when it is too large (it is then deleted) or when the upload was
+        already confirmed; ``UploadQueueFull`` as ``submit`` does.
+        """
+        # Uploads reserved before incoming/ keys were posted to their key
+        upload_key = upload.get('upload_key', upload['key'])
+        stored = photo_storage.head(upload_key)
+        if stored is None:
+            raise InvalidUpload("Photo was not uploaded")
+        if stored['size'] > self.max_bytes:
+            photo_storage.delete(upload_key)
+            raise InvalidUpload("Photo is too large")
+
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise UploadQueueFull(f"{self.max_pending} uploads already pending")
+        try:
+            # Only one confirmation of an upload gets past this
+            upload = self._collection().find_one_and_update(
+                {'_id': upload['_id'], 'status': 'awaiting_upload'},
+                {'$set': {'status': 'pending', 'size': stored['size'], 'updated_at': datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+            if upload is None:
+                raise InvalidUpload("Upload was already confirmed")
+            self._start(upload, None, process, on_complete)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._count('submitted')
+        return upload
+
+    def wait(self, upload_id, timeout=None):
+        """Block until an upload submitted by this process has finished (tests, scripts)"""
+        finished = self._pending.get(str(upload_id))
+        if finished is not None:
+            finished.wait(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'reserved_total': self.reserved,
+                'submitted_total': self.submitted,
+                'completed_total': self.completed,
+                'failed_total': self.failed,
+                'rejected_total': self.rejected
+            }
+
+    def _count(self, counter):
+        # Request threads and pool threads update these concurrently; += is not atomic
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record(self, filename, folder_name, kind, user_id, status, **fields):
+        key = object_key(filename, folder_name)
+        now = datetime.utcnow()
+        return {
+            '_id': ObjectId(),
+            'kind': kind,
+            'user_id': ObjectId(user_id),
+            'key': key,
+            'url': photo_storage.url(key),
+            'status': status,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+            **fields
+        }
+
+    def _start(self, upload, spool_path, process, on_complete):
+        executor = self._ensure_started()
+        upload_id = str(upload['_id'])
+        self._pending[upload_id] = threading.Event()
+        try:
+            executor.submit(self._run, upload, spool_path, process, on_complete)
+        except Exception:
+            self._pending.pop(upload_id, None)
+            raise
+
+    def _spool(self, file):
+        # FileStorage.save copies in chunks; large request files are already
+        # on disk, so the photo is never held in memory whole
+        fd, path = tempfile.mkstemp(prefix='upload-', dir=self.spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                file.save(out)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    def _run(self, upload, spool_path, process, on_complete):
+        # Without a spool file the client has stored the object already
+        with self.app.app_context():
+            try:
+                stored = {}
+                if spool_path is not None:
+                    self._set_status(upload, 'uploading')
+                    with open(spool_path, 'rb') as fileobj:
+                        photo_storage.upload(fileobj, upload['key'], upload['content_type'])
+                elif upload.get('upload_key'):
+                    stored = self._move_into_place(upload)
+                if spool_path is None and process is not None:
+                    spool_path = self._fetch(upload['key'])
+                derived = process(upload, spool_path) if process is not None else {}
+                upload.update(derived)
+                if on_complete is not None:
+                    on_complete(upload)
+                self._set_status(upload, 'done', **stored, **derived)
+                self._count('completed')
+            except Exception as e:
+                self._count('failed')
+                self.logger.error(f"Upload {upload['_id']} failed: {e}")
+                try:
+                    self._set_status(upload, 'failed', error=str(e))
+                except Exception as status_error:
+                    self.logger.error(f"Could not record failure of upload {upload['_id']}: {status_error}")
+            finally:
+                if spool_path is not None:
+                    os.remove(spool_path)
+                self._finished(str(upload['_id']))
+
+    def _move_into_place(self, upload):
+        # The object may have been replaced since confirm checked it, so the
+        # moved copy is checked again
+        photo_storage.move(upload['upload_key'], upload['key'], upload['content_type'])
+        stored = photo_storage.head(upload['key'])
+        if stored['size'] > self.max_bytes:
+            photo_storage.delete(upload['key'])
+            raise InvalidUpload("Photo is too large")
+        upload['size'] = stored['size']
+        return {'size': stored['size']}
+
+    def _fetch(self, key):
+        fd, path = tempfile.mkstemp(prefix='upload-', dir=self.spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                photo_storage.download(key, out)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    def _set_status(self, upload, status, error=None, **fields):
+        self._collection().update_one(
+            {'_id': upload['_id']},
+            {'$set': {'status': status, 'error': error, 'updated_at': datetime.utcnow(), **fields}}
+        )
+
+    def _finished(self, upload_id):
+        finished = self._pending.pop(upload_id, None)
+        self._slots.release()
+        if finished is not None:
+            finished.set()
+
+    def _collection(self):
+        return mongo.db.uploads
+
+    def _ensure_started(self):
+        # Created lazily so each (forked) worker process owns its own pool
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='photo-upload')
+                    self._pending = {}
+                    self._pid = pid
+        return self._executor
+
+
+upload_queue = UploadQueue()
@@ -0,0 +1,64 @@
+# utils/user_cache.py - Cached lookups of user documents keyed by JWT identity
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from bson import ObjectId
+from extensions import mongo
+from config import Config
+from utils.cache import TTLCache
+from utils.response_cache import response_cache
+
+# Process-wide cache shared by all requests in this worker. Entries are
+# invalidated by the endpoints that modify a user; the TTL bounds how long
+# another worker's writes can stay invisible here.
+user_cache = TTLCache(
+    max_size=Config.USER_CACHE_MAX_SIZE,
+    ttl=Config.USER_CACHE_TTL_SECONDS
+)
+
+# Never cache credentials
+_USER_PROJECTION = {'password_hash': 0}
+
+
+def _request_cache():
+    if '_user_cache' not in g:
+        g._user_cache = {}
+    return g._user_cache
+
+
+def get_user(user_id):
+    """
+    Return the user document for ``user_id`` or None if it does not exist.
+
+    Lookups are served from the request-scoped cache first, then the
+    process-wide LRU/TTL cache, and only then from MongoDB. The returned
+    document is shared between callers and must be treated as read-only.
+    """
+    key = str(user_id)
+    scoped = _request_cache()
+    if key in scoped:
+        return scoped[key]
+
+    user = user_cache.get(key)
+    if user is None:
+        user = mongo.db.users.find_one({'_id': ObjectId(key)}, _USER_PROJECTION)
+        if user is not None:
+            user_cache.set(key, user)
+
+    scoped[key] = user
+    return user
+
+
+def get_current_user():
+    """Return the document of the user identified by the current JWT"""
+    return get_user(get_jwt_identity())
+
+
+def invalidate_user(*user_ids):
+    """Drop cached documents after the given users have been modified"""
+    scoped = _request_cache()
+    for user_id in user_ids:
+        key = str(user_id)
+        user_cache.delete(key)
+        scoped.pop(key, None)
+    # Public profiles (GET /users/<id>) embed the same document
+    response_cache.invalidate(*(f'user:{user_id}' for user_id in user_ids))
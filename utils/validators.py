@@ -15,6 +15,10 @@ def validate_password(password):
 
 def validate_coordinates(longitude, latitude):
     """Validate geographic coordinates"""
+    for value in (longitude, latitude):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+    # NaN fails both range checks
     if not (-180 <= longitude <= 180):
         return False
     if not (-90 <= latitude <= 90):
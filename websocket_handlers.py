@@ -1,16 +1,91 @@
 # websocket_handlers.py - WebSocket Chat Implementation
-from flask_socketio import emit, join_room, leave_room
+from flask import session
+from flask_socketio import emit, join_room, leave_room, ConnectionRefusedError
 from flask_jwt_extended import decode_token
 from extensions import mongo
+from utils.user_cache import get_user
+from utils.token_blocklist import token_blocklist
+from utils.message_buffer import message_buffer
+from utils.chat_history import chat_history
+from utils.rooms import user_room, organizer_room, event_room, geo_rooms_around
 from bson import ObjectId
 from datetime import datetime
+import time
+
+
+def _authenticate_session(token):
+    """
+    Verify a JWT and remember its user in this connection's session.
+
+    Called once per connection, so later events read the identity and
+    username from the session instead of decoding the token and loading
+    the user on every message. The token's ``jti`` and ``exp`` are kept so
+    ``_session_user`` can still refuse it once it expires or is revoked by
+    a logout. Returns True on success.
+    """
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    try:
+        decoded = decode_token(token)
+    except Exception:
+        return False
+    if token_blocklist.is_revoked(decoded.get('jti')):
+        return False
+
+    user = get_user(decoded['sub'])
+    if not user:
+        return False
+
+    session['user_id'] = str(user['_id'])
+    session['username'] = user['username']
+    session['jti'] = decoded.get('jti')
+    session['exp'] = decoded.get('exp')
+    # Personal room for direct messages to this user
+    join_room(user_room(session['user_id']))
+    return True
+
+
+def _session_user(data):
+    """
+    Return ``(user_id, username)`` for the current connection, or None.
+
+    Clients that still send ``token`` with each event instead of at connect
+    time are authenticated on their first event and served from the session
+    afterwards. The token is rechecked on every event (an in-memory Bloom
+    filter lookup for unrevoked tokens); an expired or revoked one ends the
+    session's identity.
+    """
+    if 'user_id' in session and not _session_token_valid():
+        _forget_session_user()
+    if 'user_id' not in session:
+        token = data.get('token')
+        if not token or not _authenticate_session(token):
+            return None
+    return session['user_id'], session['username']
+
+
+def _session_token_valid():
+    exp = session.get('exp')
+    if exp is not None and time.time() >= exp:
+        return False
+    return not token_blocklist.is_revoked(session.get('jti'))
+
+
+def _forget_session_user():
+    leave_room(user_room(session['user_id']))
+    for key in ('user_id', 'username', 'jti', 'exp'):
+        session.pop(key, None)
+
 
 def register_socketio_handlers(socketio):
     """Register WebSocket event handlers"""
     
     @socketio.on('connect')
-    def handle_connect():
-        """Handle client connection"""
+    def handle_connect(auth=None):
+        """Handle client connection, authenticating when a token is supplied"""
+        token = auth.get('token') if isinstance(auth, dict) else None
+        if token and not _authenticate_session(token):
+            raise ConnectionRefusedError('Invalid token')
         print('Client connected')
     
     @socketio.on('disconnect')
@@ -22,53 +97,36 @@ def register_socketio_handlers(socketio):
     def handle_join_chat(data):
         """Join a chat room for an event"""
         try:
-            token = data.get('token')
             event_id = data.get('event_id')
             
-            if not token or not event_id:
-                emit('error', {'message': 'Token and event_id required'})
+            if not event_id:
+                emit('error', {'message': 'event_id required'})
                 return
             
-            # Verify JWT token
-            try:
-                decoded = decode_token(token)
-                user_id = decoded['sub']
-            except Exception as e:
+            # Identity comes from the connection, not from the payload
+            identity = _session_user(data)
+            if identity is None:
                 emit('error', {'message': 'Invalid token'})
                 return
+            _, username = identity
             
             # Verify event exists
-            event = mongo.db.events.find_one({'_id': ObjectId(event_id)})
+            event = mongo.db.events.find_one({'_id': ObjectId(event_id)}, {'_id': 1})
             if not event:
                 emit('error', {'message': 'Event not found'})
                 return
             
             # Join the room
-            join_room(event_id)
-            
-            # Get user info
-            user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+            join_room(event_room(event_id))
             
             # Notify room
             emit('user_joined', {
-                'username': user['username'],
-                'message': f"{user['username']} joined the chat"
-            }, room=event_id)
+                'username': username,
+                'message': f"{username} joined the chat"
+            }, room=event_room(event_id))
             
             # Send recent messages to the newly joined user
-            recent_messages = mongo.db.messages.find({
-                'event_id': ObjectId(event_id)
-            }).sort('timestamp', -1).limit(50)
-            
-            messages = []
-            for msg in reversed(list(recent_messages)):
-                messages.append({
-                    'username': msg['username'],
-                    'text': msg['text'],
-                    'timestamp': msg['timestamp'].isoformat()
-                })
-            
-            emit('recent_messages', {'messages': messages})
+            emit('recent_messages', {'messages': chat_history.recent(event_id)})
             
         except Exception as e:
             emit('error', {'message': f'Failed to join chat: {str(e)}'})
@@ -78,16 +136,16 @@ def register_socketio_handlers(socketio):
         """Leave a chat room"""
         try:
             event_id = data.get('event_id')
-            username = data.get('username')
+            username = session.get('username') or data.get('username')
             
             if event_id:
-                leave_room(event_id)
+                leave_room(event_room(event_id))
                 
                 # Notify room
                 emit('user_left', {
                     'username': username,
                     'message': f"{username} left the chat"
-                }, room=event_id)
+                }, room=event_room(event_id))
                 
         except Exception as e:
             emit('error', {'message': f'Failed to leave chat: {str(e)}'})
@@ -96,46 +154,42 @@ def register_socketio_handlers(socketio):
     def handle_send_message(data):
         """Handle incoming chat message"""
         try:
-            token = data.get('token')
             event_id = data.get('event_id')
             text = data.get('text')
             
-            if not all([token, event_id, text]):
-                emit('error', {'message': 'Token, event_id, and text required'})
+            if not all([event_id, text]):
+                emit('error', {'message': 'event_id and text required'})
                 return
             
-            # Verify JWT token
-            try:
-                decoded = decode_token(token)
-                user_id = decoded['sub']
-            except Exception as e:
+            # Identity comes from the connection, not from the payload
+            identity = _session_user(data)
+            if identity is None:
                 emit('error', {'message': 'Invalid token'})
                 return
+            user_id, username = identity
             
-            # Get user info
-            user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-            if not user:
-                emit('error', {'message': 'User not found'})
-                return
-            
-            # Save message to database
+            # Queue for batched persistence and broadcast right away
             timestamp = datetime.utcnow()
             message = {
+                # Identifies the message in the buffer, the history and the database
+                '_id': ObjectId(),
                 'event_id': ObjectId(event_id),
                 'user_id': ObjectId(user_id),
-                'username': user['username'],
+                'username': username,
                 'text': text,
                 'timestamp': timestamp
             }
             
-            mongo.db.messages.insert_one(message)
+            message_buffer.add(message)
+            chat_history.append(event_id, message)
             
             # Broadcast message to all clients in the room
             emit('new_message', {
-                'username': user['username'],
+                'message_id': str(message['_id']),
+                'username': username,
                 'text': text,
                 'timestamp': timestamp.isoformat()
-            }, room=event_id)
+            }, room=event_room(event_id))
             
         except Exception as e:
             emit('error', {'message': f'Failed to send message: {str(e)}'})
@@ -151,13 +205,42 @@ def register_socketio_handlers(socketio):
                 return
 
             # Join the organizer room
-            join_room(f"organizer_{organizer_id}")
+            join_room(organizer_room(organizer_id))
 
             emit('joined_organizer_room', {'message': 'Joined organizer room'})
 
         except Exception as e:
             emit('error', {'message': f'Failed to join organizer room: {str(e)}'})
 
+    @socketio.on('subscribe_region')
+    def handle_subscribe_region(data):
+        """Receive event_created announcements for new events near a location"""
+        try:
+            latitude = float(data['lat'])
+            longitude = float(data['lon'])
+            radius_km = float(data.get('radius_km') or 10)
+
+            # Replace any previous subscription
+            for room in session.get('regions', []):
+                leave_room(room)
+            rooms = geo_rooms_around(longitude, latitude, radius_km)
+            for room in rooms:
+                join_room(room)
+            session['regions'] = rooms
+
+            emit('subscribed_region', {'cells': len(rooms)})
+
+        except (KeyError, TypeError, ValueError):
+            emit('error', {'message': 'lat and lon required'})
+        except Exception as e:
+            emit('error', {'message': f'Failed to subscribe to region: {str(e)}'})
+
+    @socketio.on('unsubscribe_region')
+    def handle_unsubscribe_region(data=None):
+        """Stop receiving new-event announcements"""
+        for room in session.pop('regions', []):
+            leave_room(room)
+
     @socketio.on('event_created')
     def handle_event_created(data):
         """Handle event creation broadcast"""
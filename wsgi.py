@@ -1,33 +1,19 @@
-"""WSGI entrypoint for Gunicorn with Eventlet.
-This module monkey-patches early, creates the Flask app, and exposes
-the Socket.IO WSGI application as `application` for Gunicorn to serve.
+"""WSGI entrypoint for Gunicorn.
+This module selects the concurrency model (and monkey-patches for it) first,
+creates the Flask app, and exposes the Socket.IO WSGI application as
+`application` for Gunicorn to serve. Run it with `gunicorn -c gunicorn.conf.py
+wsgi:application` so the worker class matches ASYNC_MODE.
 """
-import os
+import concurrency
 
-try:
-    import eventlet
-    eventlet.monkey_patch()
-except Exception:
-    # eventlet missing — Gunicorn may still run with other workers
-    pass
+concurrency.monkey_patch()
 
-from app import create_app, socketio
-from socketio import WSGIApp as SocketIO_WSGIApp
+from app import get_app
 
-env = os.environ.get('FLASK_ENV', 'production')
-app = create_app(env)
+# One app per process; the Mongo client is created lazily in each worker
+app = get_app()
 
-# Expose the WSGI application wrapped with the python-socketio WSGIApp middleware.
-# Pass the underlying Socket.IO server object (socketio.server) if available.
-try:
-    sio_server = getattr(socketio, 'server', None)
-    if sio_server is None:
-        # Fallback: some versions expose 'server' under a different attribute
-        sio_server = getattr(socketio, 'socketio', None)
-    if sio_server is not None:
-        application = SocketIO_WSGIApp(sio_server, app)
-    else:
-        # If we can't get the underlying server, fall back to the Flask app.
-        application = app
-except Exception:
-    application = app
+# socketio.init_app() already wrapped app.wsgi_app with Flask-SocketIO's
+# middleware, which serves /socket.io/ and hands handlers their Flask app.
+# Wrapping again in a bare socketio.WSGIApp skips that and breaks handlers.
+application = app